@@ -10,6 +10,12 @@ interface UserData {
     aGrades: number
 }
 
+interface PageInfo {
+    page: number
+    limit: number
+    pages: number
+}
+
 interface AdminStats {
     registeredUsers: number
     guestSessions: number
@@ -20,6 +26,7 @@ interface AdminStats {
 export default function AdminPage() {
     const [stats, setStats] = useState<AdminStats | null>(null)
     const [users, setUsers] = useState<UserData[]>([])
+    const [pageInfo, setPageInfo] = useState<PageInfo>({ page: 1, limit: 50, pages: 1 })
     const [loading, setLoading] = useState(true)
     const [error, setError] = useState<string | null>(null)
 
@@ -67,15 +74,16 @@ export default function AdminPage() {
         }
     }
 
-    const fetchStats = async () => {
+    const fetchStats = async (page = 1) => {
         setLoading(true)
         try {
-            const res = await fetch("/api/admin/stats")
+            const res = await fetch(`/api/admin/stats?page=${page}`)
             const data = await res.json()
 
             if (data.success) {
                 setStats(data.stats)
                 setUsers(data.users)
+                if (data.page) setPageInfo(data.page)
             } else {
                 setError(data.error || "Failed to load stats")
             }
@@ -110,6 +118,16 @@ export default function AdminPage() {
     const darkText: React.CSSProperties = { color: "#1f2937" }
     const grayText: React.CSSProperties = { color: "#6b7280" }
     const mutedText: React.CSSProperties = { color: "#9ca3af" }
+    const pageButton = (disabled: boolean): React.CSSProperties => ({
+        background: "rgba(99, 102, 241, 0.2)",
+        color: "#a5b4fc",
+        border: "1px solid rgba(99, 102, 241, 0.3)",
+        padding: "0.25rem 0.75rem",
+        borderRadius: "8px",
+        cursor: disabled ? "default" : "pointer",
+        opacity: disabled ? 0.5 : 1,
+        fontSize: "0.875rem"
+    })
 
     // Password login screen
     if (!isAuthenticated) {
@@ -270,9 +288,32 @@ export default function AdminPage() {
                     border: "1px solid #e2e8f0",
                     boxShadow: "0 1px 3px 0 rgba(0,0,0,0.1)"
                 }}>
-                    <h2 style={{ ...darkText, fontSize: "1.25rem", fontWeight: "600", marginBottom: "1rem" }}>
-                        Registered Users
-                    </h2>
+                    <div style={{ display: "flex", justifyContent: "space-between", alignItems: "center", marginBottom: "1rem" }}>
+                        <h2 style={{ ...darkText, fontSize: "1.25rem", fontWeight: "600" }}>
+                            Registered Users
+                        </h2>
+                        {pageInfo.pages > 1 && (
+                            <div style={{ display: "flex", alignItems: "center", gap: "0.5rem" }}>
+                                <button
+                                    onClick={() => fetchStats(pageInfo.page - 1)}
+                                    disabled={pageInfo.page <= 1}
+                                    style={pageButton(pageInfo.page <= 1)}
+                                >
+                                    Previous
+                                </button>
+                                <span style={{ ...grayText, fontSize: "0.875rem" }}>
+                                    Page {pageInfo.page} of {pageInfo.pages}
+                                </span>
+                                <button
+                                    onClick={() => fetchStats(pageInfo.page + 1)}
+                                    disabled={pageInfo.page >= pageInfo.pages}
+                                    style={pageButton(pageInfo.page >= pageInfo.pages)}
+                                >
+                                    Next
+                                </button>
+                            </div>
+                        )}
+                    </div>
 
                     {users.length === 0 ? (
                         <p style={{ ...grayText, textAlign: "center", padding: "2rem" }}>
@@ -366,7 +407,7 @@ export default function AdminPage() {
                 {/* Refresh Button */}
                 <div style={{ marginTop: "1rem", textAlign: "center" }}>
                     <button
-                        onClick={() => fetchStats()}
+                        onClick={() => fetchStats(pageInfo.page)}
                         style={{
                             background: "rgba(99, 102, 241, 0.2)",
                             color: "#a5b4fc",
@@ -0,0 +1,72 @@
+import { config } from "@/lib/config"
+import { forEachConcurrent } from "@/lib/concurrency"
+import { gradeAnswer, isGradeRequest } from "@/lib/grader"
+
+// Force dynamic rendering
+export const dynamic = "force-dynamic"
+export const maxDuration = 60
+
+// Items per request. At GRADE_CONCURRENCY 6 that is 4 rounds of model calls, which leaves room for
+// multi-second latency and a retry within maxDuration; lib/grade-client.ts sends a longer paper
+// as several batches at once. Items still running when the platform stops the function are never
+// reported, and the client resolves them as 502 "Grading did not finish".
+const MAX_BATCH_ITEMS = 24
+
+// POST /api/grade/batch
+// Body: { items: [{ id, question, answer, marks, sampleAnswer? }, ...] }
+// Grades the items concurrently and streams one NDJSON line per item as soon as it is graded:
+//   { "id": ..., "status": 200, "score": 2, "feedback": "...", "source": "model" }
+//   { "id": ..., "status": 503, "error": "...", "code": "AI_UNAVAILABLE" }
+export async function POST(req: Request) {
+  let items: unknown
+  try {
+    items = (await req.json())?.items
+  } catch {
+    items = undefined
+  }
+
+  if (!Array.isArray(items) || items.length === 0 || items.length > MAX_BATCH_ITEMS) {
+    return new Response(JSON.stringify({ error: `Expected 1-${MAX_BATCH_ITEMS} items to grade` }), {
+      status: 400,
+      headers: { "Content-Type": "application/json" },
+    })
+  }
+
+  console.log(`🤖 AI Batch Grading Request: ${items.length} answers`)
+  const startedAt = Date.now()
+  const encoder = new TextEncoder()
+
+  const stream = new ReadableStream<Uint8Array>({
+    async start(controller) {
+      const send = (line: object) => controller.enqueue(encoder.encode(JSON.stringify(line) + "\n"))
+
+      await forEachConcurrent(items as any[], config.gradeConcurrency, async (item, index) => {
+        const id = item?.id ?? index
+        if (!isGradeRequest(item)) {
+          send({ id, status: 400, error: "Missing required fields", code: "BAD_REQUEST" })
+          return
+        }
+        try {
+          const outcome = await gradeAnswer(item)
+          if (outcome.ok) {
+            send({ id, status: 200, ...outcome.grade, source: outcome.source })
+          } else {
+            const { status, error, code, details } = outcome
+            send({ id, status, error, code, details })
+          }
+        } catch (error) {
+          const message = error instanceof Error ? error.message : "Unknown error"
+          console.error(`❌ Grading answer ${id} failed:`, message)
+          send({ id, status: 502, error: `AI grading failed: ${message}`, code: "AI_ERROR", details: message })
+        }
+      })
+
+      console.log(`✅ Batch of ${items.length} graded in ${Date.now() - startedAt}ms`)
+      controller.close()
+    },
+  })
+
+  return new Response(stream, {
+    headers: { "Content-Type": "application/x-ndjson; charset=utf-8", "Cache-Control": "no-store" },
+  })
+}
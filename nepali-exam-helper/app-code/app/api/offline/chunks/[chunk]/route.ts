@@ -0,0 +1,14 @@
+import { NextResponse } from "next/server"
+import { bundleResponse } from "@/lib/question-bundles"
+import { loadChunk } from "@/lib/offline-packs"
+
+export const dynamic = "force-dynamic"
+
+// Chunks are named by their content hash, so they never change and can be cached for good
+export async function GET(request: Request, { params }: { params: { chunk: string } }) {
+  const chunk = await loadChunk(params.chunk)
+  if (!chunk) {
+    return NextResponse.json({ error: "Chunk not found" }, { status: 404 })
+  }
+  return bundleResponse(request, chunk, "public, max-age=31536000, immutable")
+}
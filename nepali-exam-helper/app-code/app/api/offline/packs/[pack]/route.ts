@@ -0,0 +1,15 @@
+import { NextResponse } from "next/server"
+import { bundleResponse } from "@/lib/question-bundles"
+import { loadPackManifest } from "@/lib/offline-packs"
+
+export const dynamic = "force-dynamic"
+
+// A pack manifest; its ETag is the pack hash, so the service worker's update check is a 304 until
+// the pack is rebuilt with different content
+export async function GET(request: Request, { params }: { params: { pack: string } }) {
+  const manifest = await loadPackManifest(params.pack)
+  if (!manifest) {
+    return NextResponse.json({ error: "Pack not found" }, { status: 404 })
+  }
+  return bundleResponse(request, manifest)
+}
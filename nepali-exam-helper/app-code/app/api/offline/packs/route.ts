@@ -0,0 +1,14 @@
+import { NextResponse } from "next/server"
+import { bundleResponse } from "@/lib/question-bundles"
+import { loadOfflineIndex } from "@/lib/offline-packs"
+
+export const dynamic = "force-dynamic"
+
+// The offline packs built by scripts/build_offline_packs.py, with each pack's hash and tests
+export async function GET(request: Request) {
+  const index = await loadOfflineIndex()
+  if (!index) {
+    return NextResponse.json({ error: "No offline packs built" }, { status: 404 })
+  }
+  return bundleResponse(request, index)
+}
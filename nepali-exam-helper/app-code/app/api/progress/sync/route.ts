@@ -1,15 +1,49 @@
 import { NextRequest, NextResponse } from "next/server"
+import type { Document } from "mongodb"
 import { connectToDatabase } from "@/lib/mongodb"
+import { MAX_ATTEMPTS, isAnswerPath, type ProgressDelta } from "@/lib/progress-sync"
+import { recordProgress, touchUserStats } from "@/lib/user-stats"
 
 // Force dynamic rendering
 export const dynamic = "force-dynamic"
 
+// The update for a delta (see lib/progress-sync.ts), or null if it is malformed
+function deltaUpdate(delta: ProgressDelta, now: Date): Document | null {
+    const { set = {}, unset = [], currentTab, attempts = [] } = delta
+    if (typeof delta.baseVersion !== "number" || typeof set !== "object" || !Array.isArray(unset) || !Array.isArray(attempts)) {
+        return null
+    }
+    if (!Object.keys(set).every(isAnswerPath) || !unset.every(isAnswerPath)) {
+        return null
+    }
+
+    const fields: Record<string, unknown> = { lastUpdated: now }
+    for (const [path, value] of Object.entries(set)) {
+        fields[`answers.${path}`] = value
+    }
+    if (typeof currentTab === "string") {
+        fields.currentTab = currentTab
+    }
+
+    const update: Document = { $set: fields, $inc: { syncVersion: 1 } }
+    if (unset.length > 0) {
+        update.$unset = Object.fromEntries(unset.map((path) => [`answers.${path}`, ""]))
+    }
+    if (attempts.length > 0) {
+        update.$push = { attempts: { $each: attempts, $slice: -MAX_ATTEMPTS } }
+    }
+    return update
+}
+
+// POST { email, progress } replaces the stored progress for a test; POST { email, delta } applies
+// only what changed, if the stored syncVersion is still delta.baseVersion (409 otherwise).
+// Both answer with the new version.
 export async function POST(request: NextRequest) {
     try {
         const body = await request.json()
-        const { email, progress } = body
+        const { email, progress, delta } = body
 
-        if (!email || !progress) {
+        if (!email || (!progress && !delta)) {
             return NextResponse.json(
                 { error: "Email and progress are required" },
                 { status: 400 }
@@ -17,17 +51,7 @@ export async function POST(request: NextRequest) {
         }
 
         const normalizedEmail = email.toLowerCase().trim()
-
-        const { db } = await connectToDatabase()
-        const progressCollection = db.collection("user_progress")
-
-        // Create compound index on email + testId for efficient lookups
-        await progressCollection.createIndex(
-            { email: 1, testId: 1 },
-            { unique: true }
-        )
-
-        const testId = progress.testId
+        const testId = (delta || progress).testId
 
         if (!testId) {
             return NextResponse.json(
@@ -36,8 +60,53 @@ export async function POST(request: NextRequest) {
             )
         }
 
+        const { db } = await connectToDatabase()
+        const progressCollection = db.collection("user_progress")
+        const now = new Date()
+
+        if (delta) {
+            const update = deltaUpdate(delta, now)
+            if (!update) {
+                return NextResponse.json(
+                    { error: "Invalid progress delta" },
+                    { status: 400 }
+                )
+            }
+
+            const pushed = Boolean(update.$push)
+            const updated = await progressCollection.findOneAndUpdate(
+                { email: normalizedEmail, testId, syncVersion: delta.baseVersion },
+                update,
+                { returnDocument: "after", projection: pushed ? { syncVersion: 1, attempts: 1 } : { syncVersion: 1 } }
+            )
+
+            if (!updated) {
+                return NextResponse.json(
+                    { error: "Progress changed since the last sync", code: "VERSION_CONFLICT" },
+                    { status: 409 }
+                )
+            }
+
+            // Keep the admin dashboard's rollup current; a miss is repaired by /api/admin/stats?rebuild=1
+            try {
+                if (pushed) {
+                    await recordProgress(db, normalizedEmail, testId, updated.attempts || [], now)
+                } else {
+                    await touchUserStats(db, normalizedEmail, now)
+                }
+            } catch (error) {
+                console.error("⚠️ User stats rollup update failed:", error)
+            }
+
+            return NextResponse.json({
+                success: true,
+                message: "Progress synced successfully",
+                version: updated.syncVersion,
+            })
+        }
+
         // Upsert the progress for this email + testId combination
-        await progressCollection.updateOne(
+        const updated = await progressCollection.findOneAndUpdate(
             { email: normalizedEmail, testId },
             {
                 $set: {
@@ -46,20 +115,32 @@ export async function POST(request: NextRequest) {
                     answers: progress.answers || {},
                     currentTab: progress.currentTab || "groupA",
                     attempts: progress.attempts || [],
-                    lastUpdated: new Date(),
+                    lastUpdated: now,
                 },
                 $setOnInsert: {
-                    createdAt: new Date(),
+                    createdAt: now,
+                },
+                $inc: {
+                    syncVersion: 1,
                 },
             },
-            { upsert: true }
+            { upsert: true, returnDocument: "after", projection: { syncVersion: 1 } }
         )
 
+        // Keep the admin dashboard's rollup current; a miss is repaired by /api/admin/stats?rebuild=1
+        try {
+            const attempts = Array.isArray(progress.attempts) ? progress.attempts : []
+            await recordProgress(db, normalizedEmail, testId, attempts, now)
+        } catch (error) {
+            console.error("⚠️ User stats rollup update failed:", error)
+        }
+
         console.log(`✅ Progress synced for ${normalizedEmail} on test ${testId}`)
 
         return NextResponse.json({
             success: true,
             message: "Progress synced successfully",
+            version: updated?.syncVersion,
         })
     } catch (error) {
         console.error("❌ Progress sync error:", error)
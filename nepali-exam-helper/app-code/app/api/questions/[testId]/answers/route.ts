@@ -0,0 +1,39 @@
+import { type NextRequest, NextResponse } from "next/server"
+import { connectToDatabase } from "@/lib/mongodb"
+import { adaptDatabaseQuestions } from "@/lib/question-adapter"
+import { splitAnswerKey } from "@/lib/answer-key"
+import { bundleResponse, loadQuestionBundle } from "@/lib/question-bundles"
+
+// Force dynamic rendering - this route uses database and params
+export const dynamic = "force-dynamic"
+
+// Answer key (correct answers, sample answers, explanations) for a test.
+// The client only fetches this on submit and merges it with mergeAnswerKey().
+export async function GET(request: NextRequest, { params }: { params: { testId: string } }) {
+  try {
+    const { testId } = params
+
+    if (!testId) {
+      return NextResponse.json({ error: "Test ID is required" }, { status: 400 })
+    }
+
+    const bundle = await loadQuestionBundle(testId, "answers")
+    if (bundle) {
+      return bundleResponse(request, bundle)
+    }
+
+    const { db } = await connectToDatabase()
+    const questionsDoc = await db.collection("questions").findOne({ testId })
+
+    if (!questionsDoc) {
+      return NextResponse.json({ error: "Questions not found" }, { status: 404 })
+    }
+
+    const { answers } = splitAnswerKey(adaptDatabaseQuestions(questionsDoc.questions || {}))
+
+    return NextResponse.json({ success: true, answers })
+  } catch (error) {
+    console.error("Error fetching answers:", error)
+    return NextResponse.json({ error: "Failed to fetch answers" }, { status: 500 })
+  }
+}
@@ -1,6 +1,8 @@
 import { type NextRequest, NextResponse } from "next/server"
 import { connectToDatabase } from "@/lib/mongodb"
 import { adaptDatabaseQuestions } from "@/lib/question-adapter"
+import { splitAnswerKey } from "@/lib/answer-key"
+import { bundleResponse, loadQuestionBundle } from "@/lib/question-bundles"
 
 // Force dynamic rendering - this route uses database and params
 export const dynamic = "force-dynamic"
@@ -13,6 +15,12 @@ export async function GET(request: NextRequest, { params }: { params: { testId:
       return NextResponse.json({ error: "Test ID is required" }, { status: 400 })
     }
 
+    // Serve the prebuilt bundle when one exists (python scripts/build_bundles.py)
+    const bundle = await loadQuestionBundle(testId)
+    if (bundle) {
+      return bundleResponse(request, bundle)
+    }
+
     const { db } = await connectToDatabase()
     const questionsCollection = db.collection("questions")
 
@@ -23,8 +31,9 @@ export async function GET(request: NextRequest, { params }: { params: { testId:
       return NextResponse.json({ error: "Questions not found" }, { status: 404 })
     }
 
-    // Adapt the questions to the expected format
-    const adaptedQuestions = adaptDatabaseQuestions(questionsDoc.questions || {})
+    // Adapt the questions to the expected format; the answer key is served
+    // separately by /api/questions/[testId]/answers
+    const { questions: adaptedQuestions } = splitAnswerKey(adaptDatabaseQuestions(questionsDoc.questions || {}))
 
     // Extract metadata for timer and display
     const metadata = {
@@ -39,6 +48,7 @@ export async function GET(request: NextRequest, { params }: { params: { testId:
       success: true,
       questions: adaptedQuestions,
       metadata,
+      answersDeferred: true,
     })
   } catch (error) {
     console.error("Error fetching questions:", error)
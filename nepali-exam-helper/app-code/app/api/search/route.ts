@@ -0,0 +1,43 @@
+import { NextResponse } from "next/server"
+import { MAX_RESULTS, search } from "@/lib/search-index"
+
+// Force dynamic rendering - results depend on the query string
+export const dynamic = "force-dynamic"
+
+// GET /api/search?q=chapter 3 pressure&subject=science&chapter=3&lesson=1&test=<testId>&limit=20&offset=0
+export async function GET(req: Request) {
+  const params = new URL(req.url).searchParams
+  const query = params.get("q") || ""
+  const number = (name: string) => {
+    const value = params.get(name)
+    return value && /^\d+$/.test(value) ? Number(value) : undefined
+  }
+
+  const started = performance.now()
+  try {
+    const found = await search(
+      query,
+      {
+        subject: params.get("subject") || undefined,
+        testId: params.get("test") || undefined,
+        chapter: number("chapter"),
+        lesson: number("lesson"),
+      },
+      { limit: Math.min(number("limit") ?? 20, MAX_RESULTS), offset: number("offset") ?? 0 },
+    )
+    if (!found) {
+      console.error("❌ Search index not built (run scripts/build_search_index.py)")
+      return NextResponse.json({ success: false, error: "Search index not available" }, { status: 503 })
+    }
+
+    const took = Math.round((performance.now() - started) * 1000) / 1000
+    console.log(`🔍 Search "${query}": ${found.total} results in ${took}ms`)
+    return NextResponse.json({ success: true, query, total: found.total, took, results: found.results })
+  } catch (error) {
+    console.error("❌ Search error:", error)
+    return NextResponse.json(
+      { success: false, error: error instanceof Error ? error.message : "Search failed" },
+      { status: 500 },
+    )
+  }
+}
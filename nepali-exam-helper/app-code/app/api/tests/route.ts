@@ -1,42 +1,16 @@
 import { NextResponse } from "next/server"
 import { connectToDatabase } from "@/lib/mongodb"
+import { getTestCatalog } from "@/lib/test-catalog"
 
 // Force dynamic rendering - this route uses database
 export const dynamic = "force-dynamic"
 
+// The list comes from the in-process catalog cache (lib/test-catalog.ts), reloaded after imports
 export async function GET() {
   try {
-    console.log("🔍 /api/tests called - ONLY checking database on port 47017")
-
     const { db } = await connectToDatabase()
-    const practiceTests = await db.collection("practice_tests").find({}).sort({ _id: 1 }).toArray()
-
-    console.log(`📊 Database query returned ${practiceTests.length} documents`)
-
-    if (practiceTests.length === 0) {
-      console.log("⚠️  Database is empty - returning empty array")
-      return NextResponse.json({ ok: true, tests: [] })
-    }
-
-    practiceTests.forEach((test) => {
-      console.log(`  - ${test._id}: ${test.title}`)
-    })
-
-    // Transform the data
-    const tests = practiceTests.map((t: any) => ({
-      id: t._id,
-      title: t.title,
-      titleNepali: t.titleNepali,
-      titleEnglish: t.titleEnglish || t.title,
-      subject: t.subject,
-      year: t.year,
-      totalMarks: t.totalMarks,
-      duration: t.duration,
-      sections: t.sections,
-      isActive: t.isActive !== false,
-    }))
+    const tests = await getTestCatalog(db)
 
-    console.log(`✅ Returning ${tests.length} tests from DATABASE ONLY`)
     return NextResponse.json({ ok: true, tests })
   } catch (error) {
     console.error("❌ Database error:", error)
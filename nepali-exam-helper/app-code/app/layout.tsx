@@ -7,6 +7,7 @@ import { LanguageProvider } from "@/lib/language-context"
 import { VersionIndicator } from "@/components/version-indicator"
 import { LanguageSwitch } from "@/components/language-switch"
 import { OfflineBanner } from "@/components/offline-banner"
+import { ServiceWorker } from "@/components/service-worker"
 import Image from "next/image"
 import "./globals.css"
 
@@ -67,6 +68,7 @@ export default function RootLayout({
           <LanguageProvider>
             {/* Offline Warning Banner */}
             <OfflineBanner />
+            <ServiceWorker />
             {/* Looma Logo - Fixed top left */}
             <a
               href="https://looma.website"
@@ -12,6 +12,7 @@ import { NepaliQuestionRenderer } from "./nepali-question-renderer"
 import { MathQuestionRenderer } from "./math-question-renderer"
 import { ExamTimer } from "./exam-timer"
 import { useQuestions } from "@/lib/use-questions"
+import { requestGrade } from "@/lib/grade-client"
 import { loadStudentProgress, saveStudentProgress, saveAttemptHistory, syncProgressToServer, loadProgressFromServer } from "@/lib/storage"
 import { useLanguage } from "@/lib/language-context"
 
@@ -25,7 +26,7 @@ interface ExamTabsProps {
 }
 
 export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onShowResults, onBackToTestSelection }: ExamTabsProps) {
-  const { questions, metadata, loading, error } = useQuestions(testId)
+  const { questions, metadata, loading, error, loadAnswers } = useQuestions(testId)
   const { language } = useLanguage()
   const [answers, setAnswers] = useState<Record<string, any>>({})
   const [isSubmitting, setIsSubmitting] = useState(false)
@@ -42,9 +43,6 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
   const timerRef = useRef<NodeJS.Timeout | null>(null)
   const timerInitializedRef = useRef(false)
 
-  // Ref for debounced server sync
-  const syncTimeoutRef = useRef<NodeJS.Timeout | null>(null)
-
   // Localized error message for grading failures
   const getGradingErrorMessage = () => language === 'english'
     ? 'Could not grade this answer. Please check your internet connection.'
@@ -231,21 +229,13 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
     setLastSaved(new Date())
     onProgressUpdate()
 
-    // Debounced sync to server for authenticated users (wait 2s after last change)
+    // Sync to server for authenticated users; lib/progress-sync.ts coalesces the saves (and
+    // flushes the last one when the tab is closed)
     if (userEmail) {
       setSyncStatus('pending')
-
-      // Clear any existing timeout
-      if (syncTimeoutRef.current) {
-        clearTimeout(syncTimeoutRef.current)
-      }
-
-      // Set a new timeout to sync after 2 seconds of inactivity
-      syncTimeoutRef.current = setTimeout(() => {
-        syncProgressToServer(userEmail, progressData).then((success) => {
-          setSyncStatus(success ? 'synced' : 'failed')
-        })
-      }, 2000)
+      syncProgressToServer(userEmail, progressData).then((success) => {
+        setSyncStatus(success ? 'synced' : 'failed')
+      })
     }
   }, [answers, studentId, testId, onProgressUpdate, currentTab, userEmail])
 
@@ -594,6 +584,8 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
     try {
       console.log("🚀 Starting test submission with AI grading...")
 
+      // The exam payload has no answer key; grading needs it
+      const questions = await loadAnswers()
       if (!questions) {
         throw new Error("No questions available")
       }
@@ -860,15 +852,11 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
                             }
 
                             gradingPromises.push(
-                              fetch("/api/grade", {
-                                method: "POST",
-                                headers: { "Content-Type": "application/json" },
-                                body: JSON.stringify({
-                                  question: subQ.questionEnglish || subQ.question || subQ.questionNepali,
-                                  answer: userSubAnswer,
-                                  marks: subQuestionMarks,
-                                  sampleAnswer: aiContext,
-                                }),
+                              requestGrade({
+                                question: subQ.questionEnglish || subQ.question || subQ.questionNepali,
+                                answer: userSubAnswer,
+                                marks: subQuestionMarks,
+                                sampleAnswer: aiContext,
                               })
                                 .then(async (res) => {
                                   const result = await res.json()
@@ -926,15 +914,11 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
                     const aiContext = explanation ? `${correctAnswer}\n\nGrammar rule: ${explanation}` : correctAnswer
 
                     gradingPromises.push(
-                      fetch("/api/grade", {
-                        method: "POST",
-                        headers: { "Content-Type": "application/json" },
-                        body: JSON.stringify({
-                          question: subQ.questionEnglish || subQ.question || subQ.questionNepali,
-                          answer: userSubAnswer,
-                          marks: subQuestionMarks,
-                          sampleAnswer: aiContext,
-                        }),
+                      requestGrade({
+                        question: subQ.questionEnglish || subQ.question || subQ.questionNepali,
+                        answer: userSubAnswer,
+                        marks: subQuestionMarks,
+                        sampleAnswer: aiContext,
                       })
                         .then(async (res) => {
                           const result = await res.json()
@@ -976,15 +960,11 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
 
               if (userWritingAnswer && typeof userWritingAnswer === 'string' && userWritingAnswer.trim().length > 0) {
                 gradingPromises.push(
-                  fetch("/api/grade", {
-                    method: "POST",
-                    headers: { "Content-Type": "application/json" },
-                    body: JSON.stringify({
-                      question: (question as any).titleEnglish || (question as any).title || (question as any).titleNepali,
-                      answer: userWritingAnswer,
-                      marks: (question as any).marksEnglish || (question as any).marks,
-                      sampleAnswer: (question as any).sampleAnswerEnglish?.content || (question as any).sampleAnswer?.content || (question as any).sampleAnswerNepali?.content,
-                    }),
+                  requestGrade({
+                    question: (question as any).titleEnglish || (question as any).title || (question as any).titleNepali,
+                    answer: userWritingAnswer,
+                    marks: (question as any).marksEnglish || (question as any).marks,
+                    sampleAnswer: (question as any).sampleAnswerEnglish?.content || (question as any).sampleAnswer?.content || (question as any).sampleAnswerNepali?.content,
                   })
                     .then(async (res) => {
                       const result = await res.json()
@@ -1076,15 +1056,11 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
                       } else {
                         // Use AI grading for non-exact matches (handles paraphrasing, etc.)
                         gradingPromises.push(
-                          fetch("/api/grade", {
-                            method: "POST",
-                            headers: { "Content-Type": "application/json" },
-                            body: JSON.stringify({
-                              question: `Fill in the blank (${gapId}): ${(question as any).passageEnglish || (question as any).passage || (question as any).passageNepali}`,
-                              answer: gapAnswer,
-                              marks: gapMarks,
-                              sampleAnswer: gap.correctAnswerEnglish || gap.correctAnswer || gap.correctAnswerNepali,
-                            }),
+                          requestGrade({
+                            question: `Fill in the blank (${gapId}): ${(question as any).passageEnglish || (question as any).passage || (question as any).passageNepali}`,
+                            answer: gapAnswer,
+                            marks: gapMarks,
+                            sampleAnswer: gap.correctAnswerEnglish || gap.correctAnswer || gap.correctAnswerNepali,
                           })
                             .then(async (res) => {
                               const result = await res.json()
@@ -1584,15 +1560,11 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
                 : (answerEnglish || answerNepali || '')
 
               gradingPromises.push(
-                fetch("/api/grade", {
-                  method: "POST",
-                  headers: { "Content-Type": "application/json" },
-                  body: JSON.stringify({
-                    question: questionTextEnglish,
-                    answer: userAnswer,
-                    marks: marks,
-                    sampleAnswer: sampleAnswerContext,
-                  }),
+                requestGrade({
+                  question: questionTextEnglish,
+                  answer: userAnswer,
+                  marks: marks,
+                  sampleAnswer: sampleAnswerContext,
                 })
                   .then(async (res) => {
                     const result = await res.json()
@@ -1744,15 +1716,11 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
           const userAnswer = answers.groupB?.[question.id] || ""
           if (typeof userAnswer === 'string' && userAnswer.trim()) {
             gradingPromises.push(
-              fetch("/api/grade", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({
-                  question: question.english || question.nepali,
-                  answer: userAnswer,
-                  marks: question.marks,
-                  sampleAnswer: question.sampleAnswerEnglish || question.sampleAnswerNepali || question.sampleAnswer,
-                }),
+              requestGrade({
+                question: question.english || question.nepali,
+                answer: userAnswer,
+                marks: question.marks,
+                sampleAnswer: question.sampleAnswerEnglish || question.sampleAnswerNepali || question.sampleAnswer,
               })
                 .then((res) => res.json())
                 .then((result) => ({
@@ -1790,15 +1758,11 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
           const userAnswer = answers.groupC?.[question.id] || ""
           if (typeof userAnswer === 'string' && userAnswer.trim()) {
             gradingPromises.push(
-              fetch("/api/grade", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({
-                  question: question.english || question.nepali,
-                  answer: userAnswer,
-                  marks: question.marks,
-                  sampleAnswer: question.sampleAnswerEnglish || question.sampleAnswerNepali || question.sampleAnswer,
-                }),
+              requestGrade({
+                question: question.english || question.nepali,
+                answer: userAnswer,
+                marks: question.marks,
+                sampleAnswer: question.sampleAnswerEnglish || question.sampleAnswerNepali || question.sampleAnswer,
               })
                 .then((res) => res.json())
                 .then((result) => ({
@@ -1836,15 +1800,11 @@ export function ExamTabs({ studentId, testId, userEmail, onProgressUpdate, onSho
           const userAnswer = answers.groupD?.[question.id] || ""
           if (typeof userAnswer === 'string' && userAnswer.trim()) {
             gradingPromises.push(
-              fetch("/api/grade", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({
-                  question: question.english || question.nepali,
-                  answer: userAnswer,
-                  marks: question.marks,
-                  sampleAnswer: question.sampleAnswerEnglish || question.sampleAnswerNepali || question.sampleAnswer,
-                }),
+              requestGrade({
+                question: question.english || question.nepali,
+                answer: userAnswer,
+                marks: question.marks,
+                sampleAnswer: question.sampleAnswerEnglish || question.sampleAnswerNepali || question.sampleAnswer,
               })
                 .then((res) => res.json())
                 .then((result) => ({
@@ -3,6 +3,7 @@
 import React from "react"
 import "katex/dist/katex.min.css"
 import { InlineMath, BlockMath } from "react-katex"
+import { mathMarkup } from "@/lib/math-markup"
 
 interface MathTextProps {
     text: string
@@ -15,6 +16,7 @@ interface MathTextProps {
  * - Block math: $$...$$
  * 
  * Falls back to raw text if KaTeX fails to parse.
+ * Math pre-rendered at build time (lib/math-markup.ts) is injected as is, without running KaTeX.
  */
 export function MathText({ text, className }: MathTextProps) {
     if (!text) return null
@@ -27,6 +29,12 @@ export function MathText({ text, className }: MathTextProps) {
             {parts.map((part, index) => {
                 if (part.type === "text") {
                     return <span key={index} style={{ whiteSpace: 'pre-line' }}>{part.content}</span>
+                }
+                const html = mathMarkup(part.source)
+                if (html && part.type === "inline-math") {
+                    return <span key={index} className="inline-block align-middle" dangerouslySetInnerHTML={{ __html: html }} />
+                } else if (html) {
+                    return <div key={index} className="my-2" dangerouslySetInnerHTML={{ __html: html }} />
                 } else if (part.type === "inline-math") {
                     return (
                         <span key={index} className="inline-block align-middle">
@@ -49,6 +57,8 @@ export function MathText({ text, className }: MathTextProps) {
 interface MathPart {
     type: "text" | "inline-math" | "block-math"
     content: string
+    // The span with its delimiters, for math
+    source: string
 }
 
 function parseMathText(text: string): MathPart[] {
@@ -85,17 +95,17 @@ function parseMathText(text: string): MathPart[] {
 
             // Add text before the match
             if (matchIndex > 0) {
-                parts.push({ type: "text", content: remaining.substring(0, matchIndex) })
+                parts.push({ type: "text", content: remaining.substring(0, matchIndex), source: "" })
             }
 
             // Add the math part
-            parts.push({ type, content: match[1] })
+            parts.push({ type, content: match[1], source: match[0] })
 
             // Continue with remaining text
             remaining = remaining.substring(matchIndex + match[0].length)
         } else {
             // No more math, add remaining text
-            parts.push({ type: "text", content: remaining })
+            parts.push({ type: "text", content: remaining, source: "" })
             break
         }
     }
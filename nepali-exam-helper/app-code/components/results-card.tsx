@@ -67,7 +67,7 @@ export function ResultsCard({
   studentId,
   testId,
 }: ResultsCardProps) {
-  const { questions } = useQuestions(testId)
+  const { questions } = useQuestions(testId, { withAnswers: true })
   const { language } = useLanguage()
   const progress = loadStudentProgress(`${studentId}_${testId}`)
   const answers = progress?.answers || {}
@@ -0,0 +1,15 @@
+"use client"
+
+import { useEffect } from "react"
+import { registerServiceWorker } from "@/lib/offline-client"
+
+// Registers public/sw.js, which serves installed offline exam packs (production builds only, so
+// development never runs against a stale cache)
+export function ServiceWorker() {
+  useEffect(() => {
+    if (process.env.NODE_ENV !== "production") return
+    registerServiceWorker()
+  }, [])
+
+  return null
+}
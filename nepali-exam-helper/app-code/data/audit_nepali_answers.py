@@ -1,77 +1,31 @@
-import json
+import argparse
 import os
-import re
+import sys
+from functools import partial
 
-def is_ascii(s):
-    return all(ord(c) < 128 for c in s)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
 
-def audit_file(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            print(f"Error decoding {filepath}")
-            return []
+from corpus_runner import add_runner_args, run_from_args
+from lint_corpus import lint_file
 
-    file_issues = []
+# Find English (ASCII) keys inside sampleAnswerNepali / correctAnswerNepali.
+# This is the "nepali-answer-ascii-key" rule of scripts/lint_corpus.py; the
+# findings are also written to audit_results.txt next to this script.
 
-    def find_english_answers(data, path, res):
-        if isinstance(data, dict):
-            for k, v in data.items():
-                if is_ascii(k):
-                     res.append((path, k))
-                find_english_answers(v, path + f".{k}", res)
-        elif isinstance(data, list):
-            for i, item in enumerate(data):
-                find_english_answers(item, path + f"[{i}]", res)
+results_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audit_results.txt")
 
-    def traverse_question(q, q_num_str, file_issues):
-        for field in ['sampleAnswerNepali', 'correctAnswerNepali']:
-            if field in q:
-                value = q[field]
-                sub_results = []
-                find_english_answers(value, field, sub_results)
-                for path, key in sub_results:
-                    file_issues.append(f"Q{q_num_str}: {path} -> Key '{key}' is English")
+if __name__ == "__main__":
+    parser = add_runner_args(argparse.ArgumentParser(description="Find English keys in Nepali answers."),
+                             default_subjects=["nepali"])
+    report = run_from_args(partial(lint_file, rule_ids={"nepali-answer-ascii-key"}, stream=True),
+                           parser.parse_args(), label="issues")
 
-        if 'subQuestions' in q:
-            for i, sub_q in enumerate(q['subQuestions']):
-                # Construct a readable subquestion ID
-                sq_id = sub_q.get('idEnglish', sub_q.get('idNepali', f"sub{i+1}"))
-                traverse_question(sub_q, f"{q_num_str}.{sq_id}", file_issues)
-
-    # Root can be a list of objects. One usually contains "testId", another "questions".
-    if isinstance(data, list):
-        root = data
-    else:
-        root = [data]
-
-    for item in root:
-        if 'questions' in item:
-            for q in item['questions']:
-                q_num = q.get('questionNumberEnglish', q.get('questionNumberNepali', '?'))
-                traverse_question(q, str(q_num), file_issues)
-    
-    return file_issues
-
-files = [
-    "see_2081_nepali_practice_1_generated.json",
-    "see_2081_nepali_practice_2_generated.json",
-    "see_2081_nepali_practice_3_generated.json",
-    "see_2081_nepali_practice_4_generated.json",
-    "see_2081_nepali_practice_5_generated.json"
-]
-
-dir_path = r"c:\Users\porte\Desktop\Looma-SEE\nepali-exam-helper\app-code\data"
-
-with open("audit_results.txt", "w", encoding="utf-8") as f_out:
-    for filename in files:
-        path = os.path.join(dir_path, filename)
-        if os.path.exists(path):
-            issues = audit_file(path)
+    with open(results_path, "w", encoding="utf-8") as f_out:
+        for entry in report["files"]:
+            issues = (entry["result"] or {}).get("issues", [])
             if issues:
-                f_out.write(f"--- {filename} ---\n")
+                f_out.write(f"--- {entry['file']} ---\n")
                 for issue in issues:
-                    f_out.write(issue + "\n")
+                    f_out.write(f"{issue['path']} -> {issue['message']}\n")
                 f_out.write("\n")
-print("Audit complete. Results written to audit_results.txt")
+    print("Audit complete. Results written to audit_results.txt")
@@ -0,0 +1,8 @@
+// Next.js runs register() once when a server process starts (experimental.instrumentationHook)
+export async function register() {
+  // Only the Node.js server talks to MongoDB, not the edge runtime
+  if (process.env.NEXT_RUNTIME === "nodejs" && process.env.MONGODB_URI) {
+    const { warmUpDatabase } = await import("./lib/mongodb")
+    await warmUpDatabase()
+  }
+}
@@ -0,0 +1,153 @@
+// Local grading against the pre-graded answer index (see scripts/build_answer_index.py).
+// Short reference answers are stored normalised, so a student answer that matches one
+// can be given full marks without calling the model.
+import crypto from "node:crypto"
+import { buildArtifact } from "@/lib/build-artifact"
+
+const INDEX_VERSION = 1
+
+// Same limit the index builder uses for reference answers
+const MAX_ANSWER_TOKENS = 6
+
+// "Contains = correct", but only for answers that add a little to a longer worded reference
+const MAX_EXTRA_TOKENS = 8
+
+// --- Normalisation (mirrors scripts/corpus_text.py) -------------------------
+
+export const UNIT_ALIASES: Record<string, string[]> = {
+  m: ["metre", "metres", "meter", "meters", "मिटर"],
+  cm: ["centimetre", "centimetres", "centimeter", "centimeters", "सेन्टिमिटर"],
+  km: ["kilometre", "kilometres", "kilometer", "kilometers", "किलोमिटर"],
+  kg: ["kilogram", "kilograms", "kgs", "किलोग्राम", "केजी"],
+  g: ["gram", "grams", "ग्राम"],
+  s: ["sec", "secs", "second", "seconds", "सेकेन्ड", "सेकेण्ड"],
+  min: ["minute", "minutes", "मिनेट"],
+  h: ["hr", "hrs", "hour", "hours", "घण्टा"],
+  n: ["newton", "newtons", "न्युटन"],
+  j: ["joule", "joules", "जुल"],
+  w: ["watt", "watts", "वाट"],
+  v: ["volt", "volts", "भोल्ट"],
+  a: ["ampere", "amperes", "amp", "amps", "एम्पियर"],
+  pa: ["pascal", "pascals", "प्यास्कल"],
+  hz: ["hertz", "हर्ज"],
+  c: ["celsius", "centigrade", "सेल्सियस"],
+  rs: ["rupee", "rupees", "nrs", "रुपैयाँ", "रु"],
+  percent: ["प्रतिशत"],
+  // "30 degree celsius" and "30°C" should agree
+  "": ["degree", "degrees", "डिग्री"],
+}
+
+const unitTokens = new Map(
+  Object.entries(UNIT_ALIASES).flatMap(([unit, aliases]) => aliases.map((alias) => [alias, unit] as const)),
+)
+
+export const NEPALI_DIGITS = "०१२३४५६७८९"
+
+export function normalizeText(text: string): string {
+  const cleaned = String(text)
+    .normalize("NFC")
+    .toLowerCase()
+    .replace(/[०-९]/g, (d) => String(NEPALI_DIGITS.indexOf(d)))
+    .replace(/%/g, " percent ")
+    .replace(/[^a-z0-9ऀ-ॣ॰-ॿ]+/g, " ")
+    .replace(/([0-9])([^0-9\s])/g, "$1 $2")
+    .replace(/([^0-9\s])([0-9])/g, "$1 $2")
+  return cleaned
+    .split(/\s+/)
+    .map((token) => unitTokens.get(token) ?? token)
+    .filter(Boolean)
+    .join(" ")
+}
+
+// Content-addressed id of a question: hash of its normalised text
+export function textKey(text: string): string {
+  return crypto.createHash("sha256").update(normalizeText(text), "utf8").digest("hex").slice(0, 16)
+}
+
+// --- Index ------------------------------------------------------------------
+
+interface AnswerIndex {
+  version: number
+  questions: Record<string, string[]>
+}
+
+const loadIndex = buildArtifact<AnswerIndex>("answer-index.json", INDEX_VERSION, process.env.ANSWER_INDEX_PATH)
+
+// The client sends composed texts such as "<context>\n\nPart (a): <question>",
+// so the last paragraph without its part label is tried as well.
+export function questionTexts(question: string) {
+  const last = question.split(/\n\s*\n/).pop() || ""
+  return [question, last.replace(/^\s*(?:Part|भाग)\s*\([^)]*\)\s*:\s*/, "")]
+}
+
+export async function referenceAnswers(question: string, sampleAnswer?: unknown): Promise<string[]> {
+  const answers = new Set<string>()
+  const current = await loadIndex()
+  if (current) {
+    for (const text of questionTexts(question)) {
+      const key = textKey(text)
+      if (Object.prototype.hasOwnProperty.call(current.questions, key)) {
+        current.questions[key].forEach((answer) => answers.add(answer))
+        break
+      }
+    }
+  }
+  if (typeof sampleAnswer === "string" || typeof sampleAnswer === "number") {
+    const normalized = normalizeText(String(sampleAnswer))
+    if (normalized && normalized.split(" ").length <= MAX_ANSWER_TOKENS) answers.add(normalized)
+  }
+  return [...answers]
+}
+
+// --- Matching ---------------------------------------------------------------
+
+// A negated answer never matches a reference that isn't negated itself, and one that
+// hedges between alternatives ("true or false") never matches one that doesn't
+const NEGATIONS = new Set(["not", "no", "never", "none", "nor", "cannot", "t", "होइन", "हैन", "छैन", "छैनन्", "हुँदैन", "गर्दैन", "नभएको"])
+const HEDGES = new Set(["or", "वा", "अथवा"])
+
+function hasAny(tokens: string[], words: Set<string>) {
+  return tokens.some((token) => words.has(token))
+}
+
+// References this short, or with a number in them, are matched exactly: "10" must not be
+// found inside a guessed list such as "8, 9, 10, 11"
+const MAX_CONTAINED_TOKENS = 2
+
+function isNumber(token: string) {
+  return /^[0-9]+$/.test(token)
+}
+
+function containsSequence(haystack: string[], needle: string[]) {
+  for (let i = 0; i + needle.length <= haystack.length; i++) {
+    if (needle.every((token, j) => haystack[i + j] === token)) return true
+  }
+  return false
+}
+
+export function matchesReference(answer: string, references: string[]): boolean {
+  const tokens = normalizeText(answer).split(" ").filter(Boolean)
+  if (tokens.length === 0) return false
+  const negated = hasAny(tokens, NEGATIONS)
+  const hedged = hasAny(tokens, HEDGES)
+  const numbers = tokens.filter(isNumber).length
+
+  return references.some((reference) => {
+    const expected = reference.split(" ")
+    if (negated && !hasAny(expected, NEGATIONS)) return false
+    if (hedged && !hasAny(expected, HEDGES)) return false
+    // More numbers than the reference has is a list of guesses, or working the model should see
+    const expectedNumbers = expected.filter(isNumber).length
+    if (numbers > expectedNumbers) return false
+    if (expectedNumbers > 0 || expected.length <= MAX_CONTAINED_TOKENS) {
+      return tokens.length === expected.length && tokens.every((token, i) => token === expected[i])
+    }
+    if (tokens.length > expected.length + MAX_EXTRA_TOKENS) return false
+    return containsSequence(tokens, expected)
+  })
+}
+
+export async function gradeLocally(question: string, answer: string, sampleAnswer?: unknown): Promise<boolean> {
+  const references = await referenceAnswers(question, sampleAnswer)
+  return references.length > 0 && matchesReference(answer, references)
+}
@@ -0,0 +1,68 @@
+// Splits the answer key (correct answers, sample answers, explanations) out of an
+// adapted questions payload so exams load without it, and merges it back on submit.
+// scripts/build_bundles.py implements the same split for the prebuilt bundles.
+
+export const ANSWER_KEYS = new Set([
+  "correctAnswer",
+  "correctAnswerNepali",
+  "correctAnswerEnglish",
+  "sampleAnswer",
+  "sampleAnswerNepali",
+  "sampleAnswerEnglish",
+  "answerNepali",
+  "answerEnglish",
+  "explanation",
+  "explanationNepali",
+  "explanationEnglish",
+])
+
+// Question types whose renderer builds the question itself from correctAnswer
+// (the words to classify, the number of note points), so it has to stay inline
+const INLINE_ANSWER_TYPES = new Set(["parts_of_speech", "note_taking"])
+
+// [path to the object, the answer fields removed from it]
+export type AnswerKeyEntry = [(string | number)[], Record<string, any>]
+
+function keepsAnswer(node: Record<string, any>, key: string) {
+  return key.startsWith("correctAnswer") && INLINE_ANSWER_TYPES.has(node.type)
+}
+
+export function splitAnswerKey<T>(questions: T): { questions: T; answers: AnswerKeyEntry[] } {
+  const answers: AnswerKeyEntry[] = []
+
+  const visit = (node: any, path: (string | number)[]): any => {
+    if (Array.isArray(node)) {
+      return node.map((item, index) => visit(item, [...path, index]))
+    }
+    if (!node || typeof node !== "object") return node
+
+    const kept: Record<string, any> = {}
+    const removed: Record<string, any> = {}
+    for (const [key, value] of Object.entries(node)) {
+      // Undefined fields never reach the JSON body anyway
+      if (value === undefined) continue
+      if (ANSWER_KEYS.has(key) && !keepsAnswer(node, key)) {
+        removed[key] = value
+      } else {
+        kept[key] = value
+      }
+    }
+    if (Object.keys(removed).length > 0) answers.push([path, removed])
+    for (const key of Object.keys(kept)) {
+      kept[key] = visit(kept[key], [...path, key])
+    }
+    return kept
+  }
+
+  return { questions: visit(questions, []), answers }
+}
+
+export function mergeAnswerKey<T>(questions: T, answers: AnswerKeyEntry[]): T {
+  const merged = structuredClone(questions) as any
+  for (const [path, values] of answers) {
+    let node = merged
+    for (const key of path) node = node?.[key]
+    if (node && typeof node === "object") Object.assign(node, values)
+  }
+  return merged
+}
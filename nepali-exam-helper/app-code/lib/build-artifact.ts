@@ -0,0 +1,45 @@
+// Files the Python build scripts write to build/ (answer index, grading spec, search index).
+// A loaded file is re-read when its mtime changes, checked at most every few seconds,
+// so a rebuild is picked up without restarting the server.
+import fs from "node:fs/promises"
+import path from "node:path"
+
+// Development rechecks often, so scripts/watch_corpus.py rebuilds show up straight away
+const RECHECK_MS = process.env.NODE_ENV === "production" ? 10_000 : 500
+
+// parse() turns the raw bytes into the loaded value, or null if they're from another version
+export function watchedFile<T>(fileName: string, parse: (raw: Buffer) => T | null, filePath?: string) {
+  const resolvedPath = filePath || path.join(process.cwd(), "build", fileName)
+  let data: T | null = null
+  let mtimeMs = 0
+  let checkedAt = 0
+
+  return async function load(): Promise<T | null> {
+    const now = Date.now()
+    if (now - checkedAt < RECHECK_MS) return data
+    checkedAt = now
+
+    try {
+      const stat = await fs.stat(resolvedPath)
+      if (!data || stat.mtimeMs !== mtimeMs) {
+        data = parse(await fs.readFile(resolvedPath))
+        mtimeMs = stat.mtimeMs
+      }
+    } catch {
+      // Not built: callers fall back to their slower path
+      data = null
+    }
+    return data
+  }
+}
+
+export function buildArtifact<T extends { version: number }>(fileName: string, version: number, filePath?: string) {
+  return watchedFile<T>(
+    fileName,
+    (raw) => {
+      const loaded = JSON.parse(raw.toString("utf8"))
+      return loaded.version === version ? loaded : null
+    },
+    filePath,
+  )
+}
@@ -0,0 +1,57 @@
+// Small helpers for calling rate-limited services from route handlers
+
+export function sleep(ms: number) {
+  return new Promise<void>((resolve) => setTimeout(resolve, ms))
+}
+
+// Token bucket: limits how often calls start (a burst of up to `capacity`, then `perMinute`
+// per minute), not how many run at once; forEachConcurrent's `limit` caps that.
+// take() waits for a token instead of failing, so callers just get spread out.
+export class TokenBucket {
+  private tokens: number
+  private updatedAt = Date.now()
+
+  constructor(
+    private readonly capacity: number,
+    private readonly perMinute: number,
+  ) {
+    this.tokens = capacity
+  }
+
+  private refill() {
+    const now = Date.now()
+    this.tokens = Math.min(this.capacity, this.tokens + ((now - this.updatedAt) * this.perMinute) / 60_000)
+    this.updatedAt = now
+  }
+
+  async take() {
+    for (;;) {
+      this.refill()
+      if (this.tokens >= 1) {
+        this.tokens -= 1
+        return
+      }
+      await sleep(Math.ceil(((1 - this.tokens) * 60_000) / this.perMinute))
+    }
+  }
+}
+
+// Exponential backoff with full jitter, so retries from concurrent calls don't line up.
+// A server-provided Retry-After (in seconds) is used as the lower bound.
+export function backoffDelay(attempt: number, retryAfter?: string | null, baseMs = 500, maxMs = 8000) {
+  const jittered = Math.random() * Math.min(maxMs, baseMs * 2 ** (attempt - 1))
+  const hinted = Number(retryAfter) * 1000
+  return Number.isFinite(hinted) && hinted > 0 ? Math.min(maxMs, hinted) + jittered / 4 : jittered
+}
+
+// Run `task` over `items` with at most `limit` in flight, in whatever order they finish
+export async function forEachConcurrent<T>(items: T[], limit: number, task: (item: T, index: number) => Promise<void>) {
+  let next = 0
+  const worker = async () => {
+    while (next < items.length) {
+      const index = next++
+      await task(items[index], index)
+    }
+  }
+  await Promise.all(Array.from({ length: Math.max(1, Math.min(limit, items.length)) }, worker))
+}
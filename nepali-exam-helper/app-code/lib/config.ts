@@ -1,7 +1,15 @@
 // Centralized config - only environment variables, no fallbacks
 export const config = {
   mongodbUri: process.env.MONGODB_URI,
+  // Connection pool per server process; minPoolSize connections are opened at startup
+  mongodbMaxPoolSize: Number(process.env.MONGODB_MAX_POOL_SIZE) || 20,
+  mongodbMinPoolSize: Number(process.env.MONGODB_MIN_POOL_SIZE) || 2,
   openaiApiKey: process.env.OPENAI_API_KEY, // No fallback - must be in .env.local
+  // Any OpenAI-compatible server, e.g. the load test's stub (scripts/stub_openai.py)
+  openaiBaseUrl: (process.env.OPENAI_BASE_URL || "https://api.openai.com/v1").replace(/\/+$/, ""),
+  // Model grading limits, shared by every grading request in a process
+  gradeConcurrency: Number(process.env.GRADE_CONCURRENCY) || 6,
+  openaiRequestsPerMinute: Number(process.env.OPENAI_REQUESTS_PER_MINUTE) || 300,
   // Email configuration (Resend)
   resendApiKey: process.env.RESEND_API_KEY,
   emailFromAddress: process.env.EMAIL_FROM_ADDRESS || "SEE Practice <donotreply@testprep.looma.website>",
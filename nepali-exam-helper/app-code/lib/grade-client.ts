@@ -0,0 +1,111 @@
+// Client side of POST /api/grade/batch.
+// requestGrade() takes the same payload as POST /api/grade and resolves to a Response in the
+// same shape, but the calls made while a submission is being assembled are sent as one batch
+// and each one resolves as soon as its line of the streamed result arrives.
+
+export interface GradePayload {
+  question: string
+  answer: string
+  marks: number
+  sampleAnswer?: unknown
+}
+
+// Keep in sync with MAX_BATCH_ITEMS in app/api/grade/batch/route.ts; a longer submission is sent
+// as several batches at once, each graded within the route's maxDuration
+const MAX_BATCH_ITEMS = 24
+
+interface PendingGrade {
+  payload: GradePayload
+  resolve: (response: Response) => void
+  reject: (error: unknown) => void
+}
+
+let queue: PendingGrade[] = []
+let flushScheduled = false
+
+function jsonResponse(body: unknown, status: number) {
+  return new Response(JSON.stringify(body), { status, headers: { "Content-Type": "application/json" } })
+}
+
+// Older deployments (or a rejected batch) still have the one-answer endpoint
+function gradeSingly(batch: PendingGrade[]) {
+  for (const { payload, resolve, reject } of batch) {
+    fetch("/api/grade", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(payload),
+    }).then(resolve, reject)
+  }
+}
+
+async function sendBatch(batch: PendingGrade[]) {
+  const pending = new Map(batch.map((entry, id) => [id, entry]))
+
+  let res: Response
+  try {
+    res = await fetch("/api/grade/batch", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ items: batch.map(({ payload }, id) => ({ id, ...payload })) }),
+    })
+  } catch (error) {
+    batch.forEach(({ reject }) => reject(error))
+    return
+  }
+
+  if (!res.ok || !res.body) {
+    console.warn(`⚠️ Batch grading unavailable (HTTP ${res.status}), grading answers one by one`)
+    gradeSingly(batch)
+    return
+  }
+
+  const settle = (line: string) => {
+    if (!line.trim()) return
+    const { id, status, ...result } = JSON.parse(line)
+    const entry = pending.get(id)
+    if (!entry) return
+    pending.delete(id)
+    entry.resolve(jsonResponse(result, status))
+  }
+
+  try {
+    const reader = res.body.getReader()
+    const decoder = new TextDecoder()
+    let buffered = ""
+    for (;;) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffered += decoder.decode(value, { stream: true })
+      const lines = buffered.split("\n")
+      buffered = lines.pop() || ""
+      lines.forEach(settle)
+    }
+    settle(buffered + decoder.decode())
+  } catch (error) {
+    console.error("❌ Batch grading stream failed:", error)
+  }
+
+  // Answers the stream never reported (connection dropped, function timed out)
+  for (const { resolve } of pending.values()) {
+    resolve(jsonResponse({ error: "Grading did not finish", code: "AI_ERROR" }, 502))
+  }
+}
+
+function flush() {
+  flushScheduled = false
+  const batch = queue
+  queue = []
+  for (let start = 0; start < batch.length; start += MAX_BATCH_ITEMS) {
+    sendBatch(batch.slice(start, start + MAX_BATCH_ITEMS))
+  }
+}
+
+export function requestGrade(payload: GradePayload): Promise<Response> {
+  return new Promise((resolve, reject) => {
+    queue.push({ payload, resolve, reject })
+    if (!flushScheduled) {
+      flushScheduled = true
+      setTimeout(flush, 0)
+    }
+  })
+}
@@ -0,0 +1,183 @@
+// Deterministic checks against the grading spec (see scripts/build_grading_spec.py).
+// A numeric answer with the expected value (within tolerance), a plainly wrong one, or
+// a named multiple-choice option is graded here; anything else returns null and goes
+// on to the answer index and the model.
+import { buildArtifact } from "@/lib/build-artifact"
+import { NEPALI_DIGITS, UNIT_ALIASES, normalizeText, questionTexts, textKey } from "@/lib/answer-index"
+
+const SPEC_VERSION = 2
+
+// Deducted when the value is right but the expected units are missing (as the model prompt does);
+// the score is then floored to whole marks, as parseGrade in lib/grader.ts floors the model's
+const MISSING_UNITS_PENALTY = 0.5
+
+// A value this far from the expected one is a different answer, not a rounding difference
+const NEAR_MISS_RELATIVE = 0.05
+const NEAR_MISS_TOLERANCES = 10
+
+interface NumericSpec {
+  kind: "numeric"
+  expected: string
+  values: number[]
+  tolerances: number[]
+  units: string[]
+  ordered: boolean
+}
+
+interface ChoiceSpec {
+  kind: "choice"
+  expected: string
+  correct: string[]
+  wrong: string[]
+}
+
+interface GradingSpec {
+  version: number
+  questions: Record<string, NumericSpec | ChoiceSpec>
+}
+
+const loadSpec = buildArtifact<GradingSpec>("grading-spec.json", SPEC_VERSION, process.env.GRADING_SPEC_PATH)
+
+// --- Quantities (mirrors parse_quantity in scripts/corpus_text.py) -----------
+
+const QUANTITY_UNITS = new Set([...Object.keys(UNIT_ALIASES).filter(Boolean), "mm", "ft", "l", "ml"])
+
+// Area and volume markers before a unit: "sq. cm", "cubic metres", "वर्ग मिटर" -> "cm2", "m3"
+const UNIT_POWERS = new Map([["sq", "2"], ["square", "2"], ["वर्ग", "2"], ["cubic", "3"], ["cu", "3"], ["घन", "3"]])
+const COUNT_WORDS = new Set([
+  "year", "years", "month", "months", "day", "days", "students", "people", "persons", "times",
+  "units", "unit", "वर्ष", "महिना", "दिन", "जना",
+])
+const LIST_WORDS = new Set(["and", "र"])
+
+const latexTextPattern = /\\(?:text|mathrm)\{([^{}]*)\}/g
+const answerPrefixPattern = /^\s*(?:ans(?:wer)?\b\.?\s*[:=-]?|[a-z]\s*=)\s*/
+const thousandsPattern = /(?<=\d),(?=(?:\d{2},)*\d{3}(?!\d))/g
+// "cm^2", "cm2", "m³" (superscripts rewritten first): rewritten as "sq cm", "cubic m"
+const powerPattern = /([a-zऀ-ॣ॰-ॿ]+)\^?([23])(?![0-9.])/g
+const POWER_WORDS: Record<string, string> = { "2": "sq", "3": "cubic" }
+const numberPattern = /(?<![a-z0-9.])-?\d+(?:\.\d+)?(?:\/\d+)?(?![0-9])/g
+
+function parseNumber(token: string): number | null {
+  if (token.includes("/")) {
+    const [numerator, denominator] = token.split("/").map(Number)
+    return denominator ? numerator / denominator : null
+  }
+  return Number(token)
+}
+
+export function parseQuantity(text: string): { values: number[]; units: string[] } | null {
+  let cleaned = String(text)
+    .normalize("NFC")
+    .toLowerCase()
+    .replace(/[०-९]/g, (d) => String(NEPALI_DIGITS.indexOf(d)))
+    .replace(/²/g, "^2")
+    .replace(/³/g, "^3")
+    .replace(latexTextPattern, "$1")
+    .replace(/\\%/g, "%")
+    .replace(/\$/g, " ")
+    .replace(answerPrefixPattern, "")
+  // "2(3), 3(1)" pairs values up; leave structured answers to the model
+  if (/[()[\]]/.test(cleaned)) return null
+  cleaned = cleaned
+    .replace(thousandsPattern, "")
+    .replace(powerPattern, (_, unit: string, power: string) => ` ${POWER_WORDS[power]} ${unit}`)
+
+  const values = (cleaned.match(numberPattern) || []).map(parseNumber)
+  if (values.length === 0 || values.some((value) => value === null)) return null
+  const units: string[] = []
+  let power = ""
+  for (const token of normalizeText(cleaned.replace(numberPattern, " ")).split(" ").filter(Boolean)) {
+    if (COUNT_WORDS.has(token) || LIST_WORDS.has(token)) continue
+    if (UNIT_POWERS.has(token) && !power) {
+      power = UNIT_POWERS.get(token)!
+      continue
+    }
+    if (!QUANTITY_UNITS.has(token)) return null
+    const unit = token + power
+    power = ""
+    if (!units.includes(unit)) units.push(unit)
+  }
+  // "24 square units": an area without a unit to attach it to
+  if (power) return null
+  return { values: values as number[], units }
+}
+
+// --- Checks -----------------------------------------------------------------
+
+type Language = "nepali" | "english"
+
+const messages = {
+  correct: {
+    english: () => "Correct! Your answer matches the expected answer.",
+    nepali: () => "सही उत्तर! तपाईंको उत्तर अपेक्षित उत्तरसँग मेल खान्छ।",
+  },
+  missingUnits: {
+    english: (expected: string) => `Correct value, but missing units - answer should include the unit (expected: ${expected}).`,
+    nepali: (expected: string) => `मान सही छ, तर एकाइ छुटेको छ - उत्तरमा एकाइ लेख्नुपर्छ (अपेक्षित उत्तर: ${expected})।`,
+  },
+  incorrect: {
+    english: (expected: string) => `Incorrect. The correct answer is ${expected}.`,
+    nepali: (expected: string) => `गलत। सही उत्तर ${expected} हो।`,
+  },
+}
+
+function checkNumeric(spec: NumericSpec, answer: string, marks: number, language: Language) {
+  const given = parseQuantity(answer)
+  if (!given || given.values.length !== spec.values.length) return null
+
+  const expected = spec.values.map((value, i) => ({ value, tolerance: spec.tolerances[i] ?? 0 }))
+  const values = [...given.values]
+  if (!spec.ordered) {
+    expected.sort((a, b) => a.value - b.value)
+    values.sort((a, b) => a - b)
+  }
+
+  let matched = true
+  for (let i = 0; i < values.length; i++) {
+    const { value, tolerance } = expected[i]
+    const difference = Math.abs(values[i] - value)
+    if (difference <= tolerance + 1e-9) continue
+    // Close but outside the tolerance: a rounding question for the model
+    if (difference <= Math.max(Math.abs(value) * NEAR_MISS_RELATIVE, tolerance * NEAR_MISS_TOLERANCES)) return null
+    matched = false
+  }
+
+  const sameUnits = given.units.length === spec.units.length && given.units.every((unit) => spec.units.includes(unit))
+  if (given.units.length > 0 && !sameUnits) {
+    // Other units may be a conversion ("5 km" for "5000 m")
+    return null
+  }
+  if (!matched) return { score: 0, feedback: messages.incorrect[language](spec.expected) }
+  if (given.units.length === 0 && spec.units.length > 0) {
+    return {
+      score: Math.max(0, Math.floor(marks - MISSING_UNITS_PENALTY)),
+      feedback: messages.missingUnits[language](spec.expected),
+    }
+  }
+  return { score: marks, feedback: messages.correct[language]() }
+}
+
+function checkChoice(spec: ChoiceSpec, answer: string, marks: number, language: Language) {
+  const given = normalizeText(answer)
+  if (spec.correct.includes(given)) return { score: marks, feedback: messages.correct[language]() }
+  if (spec.wrong.includes(given)) return { score: 0, feedback: messages.incorrect[language](spec.expected) }
+  return null
+}
+
+export async function checkAnswer(
+  question: string,
+  answer: string,
+  marks: number,
+  language: Language,
+): Promise<{ score: number; feedback: string } | null> {
+  const current = await loadSpec()
+  if (!current) return null
+  for (const text of questionTexts(question)) {
+    const key = textKey(text)
+    if (!Object.prototype.hasOwnProperty.call(current.questions, key)) continue
+    const spec = current.questions[key]
+    return spec.kind === "choice" ? checkChoice(spec, answer, marks, language) : checkNumeric(spec, answer, marks, language)
+  }
+  return null
+}
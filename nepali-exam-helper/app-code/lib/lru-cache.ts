@@ -0,0 +1,35 @@
+// Small in-process LRU map. Map keeps insertion order, so a hit re-inserts the
+// key and the first key is always the least recently used one.
+export class LruCache<K, V> {
+  private entries = new Map<K, V>()
+
+  constructor(private readonly maxEntries: number) {}
+
+  get(key: K): V | undefined {
+    const value = this.entries.get(key)
+    if (value === undefined) return undefined
+    this.entries.delete(key)
+    this.entries.set(key, value)
+    return value
+  }
+
+  set(key: K, value: V) {
+    this.entries.delete(key)
+    this.entries.set(key, value)
+    if (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value as K)
+    }
+  }
+
+  delete(key: K) {
+    return this.entries.delete(key)
+  }
+
+  clear() {
+    this.entries.clear()
+  }
+
+  get size() {
+    return this.entries.size
+  }
+}
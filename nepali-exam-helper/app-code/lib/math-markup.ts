@@ -0,0 +1,40 @@
+// KaTeX markup pre-rendered at build time (scripts/prerender_math.py), keyed by mathKey() of the
+// delimited span ("$x^2$", "$$\frac{a}{b}$$"). Question bundles carry the markup of their own
+// math ("math" in the /api/questions responses); useQuestions() adds it here, and MathText
+// injects it instead of running KaTeX. Spans without markup (database fallback, unparseable
+// expressions) are still rendered by KaTeX in the browser.
+
+const markup = new Map<string, string>()
+
+const encoder = new TextEncoder()
+
+// 64-bit FNV-1a of the span's UTF-8 bytes, as 16 hex digits (corpus_text.math_key). Computed in
+// four 16-bit limbs, lowest first, so no BigInt is needed; the prime is 2^40 + 0x1b3.
+export function mathKey(source: string): string {
+  let h0 = 0x2325
+  let h1 = 0x8422
+  let h2 = 0x9ce4
+  let h3 = 0xcbf2
+  const bytes = encoder.encode(source)
+  for (let i = 0; i < bytes.length; i++) {
+    h0 ^= bytes[i]
+    const r0 = h0 * 0x1b3
+    const r1 = h1 * 0x1b3 + (r0 >>> 16)
+    const r2 = h2 * 0x1b3 + h0 * 0x100 + (r1 >>> 16)
+    const r3 = h3 * 0x1b3 + h1 * 0x100 + (r2 >>> 16)
+    h0 = r0 & 0xffff
+    h1 = r1 & 0xffff
+    h2 = r2 & 0xffff
+    h3 = r3 & 0xffff
+  }
+  return [h3, h2, h1, h0].map((limb) => limb.toString(16).padStart(4, "0")).join("")
+}
+
+export function addMathMarkup(table: Record<string, string> | undefined) {
+  if (!table) return
+  for (const [key, html] of Object.entries(table)) markup.set(key, html)
+}
+
+export function mathMarkup(source: string): string | undefined {
+  return markup.size > 0 ? markup.get(mathKey(source)) : undefined
+}
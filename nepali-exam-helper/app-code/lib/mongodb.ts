@@ -1,30 +1,51 @@
 import { MongoClient, type Db } from "mongodb"
 import { config } from "./config"
+import { getTestCatalog } from "./test-catalog"
 
 // Use config-based URI with fallback to environment
 const MONGODB_URI = process.env.MONGODB_URI || config.mongodbUri
 
 let cachedClient: MongoClient | null = null
 let cachedDb: Db | null = null
+// Concurrent first requests share one connection attempt
+let connecting: Promise<{ client: MongoClient; db: Db }> | null = null
 
-export async function connectToDatabase() {
-  if (cachedClient && cachedDb) {
-    return { client: cachedClient, db: cachedDb }
+// Created once per process on first connect, not on every request
+async function ensureIndexes(db: Db) {
+  try {
+    await Promise.all([
+      db.collection("user_progress").createIndex({ email: 1, testId: 1 }, { unique: true }),
+      db.collection("user_stats").createIndex({ lastActive: -1, _id: 1 }),
+    ])
+  } catch (error) {
+    console.error("⚠️ Failed to create indexes:", error)
   }
+}
 
-  try {
-    console.log("🔗 Connecting to MongoDB:", MONGODB_URI)
+// The URI without its credentials, for logs
+function redactedUri(uri: string) {
+  return uri.replace(/\/\/[^@/]*@/, "//***@")
+}
 
+async function connect() {
+  try {
     if (!MONGODB_URI) {
       throw new Error("MONGODB_URI is not defined in environment variables or config")
     }
 
-    const client = new MongoClient(MONGODB_URI)
+    console.log("🔗 Connecting to MongoDB:", redactedUri(MONGODB_URI))
+
+    const client = new MongoClient(MONGODB_URI, {
+      maxPoolSize: config.mongodbMaxPoolSize,
+      minPoolSize: Math.min(config.mongodbMinPoolSize, config.mongodbMaxPoolSize),
+      maxIdleTimeMS: 5 * 60_000,
+    })
     await client.connect()
     console.log("✅ Connected to MongoDB")
 
     const db = client.db("see_exam_system")
     console.log("📊 Using database: see_exam_system")
+    await ensureIndexes(db)
 
     cachedClient = client
     cachedDb = db
@@ -35,3 +56,29 @@ export async function connectToDatabase() {
     throw error
   }
 }
+
+export async function connectToDatabase() {
+  if (cachedClient && cachedDb) {
+    return { client: cachedClient, db: cachedDb }
+  }
+
+  connecting ??= connect().finally(() => {
+    connecting = null
+  })
+  return connecting
+}
+
+// Called once at server start (instrumentation.ts): connect, run a round trip so the pool's first
+// connection is ready, and load the test catalog, so the first request doesn't pay for any of it
+export async function warmUpDatabase() {
+  const started = Date.now()
+  try {
+    const { db } = await connectToDatabase()
+    await db.command({ ping: 1 })
+    await getTestCatalog(db)
+    console.log(`🔥 MongoDB warmed up in ${Date.now() - started}ms`)
+  } catch (error) {
+    // Requests will retry the connection themselves
+    console.error("⚠️ MongoDB warm-up failed:", error)
+  }
+}
@@ -0,0 +1,62 @@
+"use client"
+
+// Talks to the service worker (public/sw.js) that keeps offline exam packs in the browser.
+// NEXT_PUBLIC_OFFLINE_PACKS lists the packs to install as soon as the worker is ready (e.g.
+// "science,math" or a school's pack); "auto" in the list also installs the pack of every test a
+// student opens, so it's there the next time the connection drops.
+const configuredPacks = (process.env.NEXT_PUBLIC_OFFLINE_PACKS || "")
+  .split(",")
+  .map((pack) => pack.trim())
+  .filter(Boolean)
+
+const autoInstall = configuredPacks.includes("auto")
+
+interface WorkerReply {
+  ok: boolean
+  error?: string
+}
+
+async function postToWorker(message: Record<string, unknown>): Promise<WorkerReply> {
+  if (typeof navigator === "undefined" || !("serviceWorker" in navigator)) return { ok: false, error: "unsupported" }
+  const registration = await navigator.serviceWorker.ready
+  const worker = registration.active
+  if (!worker) return { ok: false, error: "no active service worker" }
+  return new Promise((resolve) => {
+    const channel = new MessageChannel()
+    channel.port1.onmessage = (event) => resolve(event.data as WorkerReply)
+    worker.postMessage(message, [channel.port2])
+  })
+}
+
+export function installOfflinePack(pack: string) {
+  return postToWorker({ type: "install-pack", pack })
+}
+
+export function updateOfflinePacks() {
+  return postToWorker({ type: "update-packs" })
+}
+
+// Called once a test has loaded online; a no-op unless packs are auto-installed
+export function ensureOfflinePackFor(testId: string) {
+  if (!autoInstall || !navigator.onLine) return
+  postToWorker({ type: "install-pack-for", testId }).then((reply) => {
+    if (!reply.ok) console.warn("⚠️ Offline pack not installed:", reply.error)
+  })
+}
+
+export async function registerServiceWorker() {
+  if (!("serviceWorker" in navigator)) return
+  try {
+    await navigator.serviceWorker.register("/sw.js")
+  } catch (error) {
+    console.warn("⚠️ Service worker registration failed:", error)
+    return
+  }
+  if (!navigator.onLine) return
+  for (const pack of configuredPacks) {
+    if (pack === "auto") continue
+    const reply = await installOfflinePack(pack)
+    if (!reply.ok) console.warn(`⚠️ Offline pack ${pack} not installed:`, reply.error)
+  }
+  await updateOfflinePacks()
+}
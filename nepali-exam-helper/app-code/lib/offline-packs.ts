@@ -0,0 +1,92 @@
+// Serves the offline exam packs from build/offline (see scripts/build_offline_packs.py)
+// index.json lists the packs; each pack manifest names the content-addressed chunks its tests are
+// made of. public/sw.js installs packs from these routes and keeps them up to date by fetching
+// only the chunks a new manifest adds.
+import crypto from "node:crypto"
+import fs from "node:fs/promises"
+import path from "node:path"
+import { watchedFile } from "@/lib/build-artifact"
+import { LruCache } from "@/lib/lru-cache"
+import type { QuestionBundle } from "@/lib/question-bundles"
+
+const OFFLINE_DIR = process.env.OFFLINE_PACK_DIR || path.join(process.cwd(), "build", "offline")
+
+const PACK_VERSION = 1
+
+// Chunks are small (a question or a group each); keep the hot ones in memory
+const MAX_CACHED_CHUNKS = 2_000
+
+const CHUNK_ID = /^[0-9a-f]{32}$/
+
+export interface OfflinePackIndex {
+  version: number
+  encodings: string[]
+  packs: Record<string, { hash: string; tests: string[]; chunks: number; bytes: number }>
+}
+
+// The raw index.json, served as is by /api/offline/packs
+let indexBundle: QuestionBundle | null = null
+
+const loadIndex = watchedFile<OfflinePackIndex>(
+  "index.json",
+  (raw) => {
+    const loaded = JSON.parse(raw.toString("utf8"))
+    if (loaded.version !== PACK_VERSION) return null
+    indexBundle = { etag: `"${crypto.createHash("sha256").update(raw).digest("hex").slice(0, 32)}"`, identity: raw }
+    return loaded
+  },
+  path.join(OFFLINE_DIR, "index.json"),
+)
+
+// Manifests by pack name, dropped when the index lists a new hash for the pack
+const manifests = new Map<string, QuestionBundle>()
+const chunks = new LruCache<string, QuestionBundle>(MAX_CACHED_CHUNKS)
+
+async function readOptional(filePath: string): Promise<Buffer | undefined> {
+  try {
+    return await fs.readFile(filePath)
+  } catch {
+    return undefined
+  }
+}
+
+export async function loadOfflineIndex(): Promise<QuestionBundle | null> {
+  const index = await loadIndex()
+  return index ? indexBundle : null
+}
+
+export async function loadPackManifest(pack: string): Promise<QuestionBundle | null> {
+  const index = await loadIndex()
+  // Only packs listed in the index are looked up, so the name never reaches the filesystem unchecked
+  if (!index || !Object.prototype.hasOwnProperty.call(index.packs, pack)) return null
+  const etag = `"${index.packs[pack].hash}"`
+  const cached = manifests.get(pack)
+  if (cached && cached.etag === etag) return cached
+
+  const identity = await readOptional(path.join(OFFLINE_DIR, "packs", `${pack}.json`))
+  if (!identity) return null
+  const manifest: QuestionBundle = { etag, identity }
+  manifests.set(pack, manifest)
+  return manifest
+}
+
+export async function loadChunk(id: string): Promise<QuestionBundle | null> {
+  if (!CHUNK_ID.test(id)) return null
+  const cached = chunks.get(id)
+  if (cached) return cached
+
+  const index = await loadIndex()
+  if (!index) return null
+  const base = path.join(OFFLINE_DIR, "chunks", id)
+  const identity = await readOptional(`${base}.json`)
+  if (!identity) return null
+
+  const chunk: QuestionBundle = {
+    etag: `"${id}"`,
+    identity,
+    gzip: index.encodings.includes("gzip") ? await readOptional(`${base}.json.gz`) : undefined,
+    br: index.encodings.includes("br") ? await readOptional(`${base}.json.br`) : undefined,
+  }
+  chunks.set(id, chunk)
+  return chunk
+}
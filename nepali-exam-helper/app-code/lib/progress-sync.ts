@@ -0,0 +1,211 @@
+// Client side of POST /api/progress/sync: coalesced, versioned delta writes.
+// Saves made within DEBOUNCE_MS of each other (at most MAX_WAIT_MS apart) become one request, and
+// only one request per test is in flight at a time. The first write of a session is a full one;
+// after that only what changed since the last acknowledged write is sent:
+//   { email, delta: { testId, baseVersion, set: { "<group>.<qid>": answer }, unset: ["<path>"],
+//                     currentTab?, attempts?: [new attempts] } }
+// The server applies it with $set/$unset on answers.<path> and $push on attempts, but only if its
+// syncVersion is still baseVersion; otherwise (another device, a reset) it answers 409 and the
+// client falls back to a full write, the last writer winning as before.
+import type { AttemptHistory, StudentProgress } from "@/lib/storage"
+
+export const DEBOUNCE_MS = 2000
+export const MAX_WAIT_MS = 10_000
+
+// Attempts kept per test, here and in lib/storage.ts
+export const MAX_ATTEMPTS = 10
+
+export interface ProgressDelta {
+  testId: string
+  baseVersion: number
+  set?: Record<string, unknown>
+  unset?: string[]
+  currentTab?: string
+  attempts?: AttemptHistory[]
+}
+
+type SyncedProgress = Omit<StudentProgress, "lastUpdated">
+
+// Answer paths are one or two keys deep ("groupA.q3", "math.5", "q12"); keys that MongoDB
+// would read as operators or nested paths make the whole answers map go in a full write
+const segmentPattern = /^[^.$][^.]*$/
+
+export function isAnswerPath(path: unknown): path is string {
+  if (typeof path !== "string") return false
+  const segments = path.split(".")
+  return segments.length <= 2 && segments.every((segment) => segmentPattern.test(segment))
+}
+
+function isPlainObject(value: unknown): value is Record<string, unknown> {
+  return typeof value === "object" && value !== null && !Array.isArray(value)
+}
+
+// path -> serialised answer, or null if a key can't be a path
+function answerLeaves(answers: Record<string, unknown>): Map<string, string> | null {
+  const leaves = new Map<string, string>()
+  for (const [key, value] of Object.entries(answers || {})) {
+    if (!segmentPattern.test(key)) return null
+    const children = isPlainObject(value) ? Object.entries(value) : []
+    if (children.length > 0 && children.every(([child]) => segmentPattern.test(child))) {
+      for (const [child, answer] of children) leaves.set(`${key}.${child}`, JSON.stringify(answer ?? null))
+    } else {
+      leaves.set(key, JSON.stringify(value ?? null))
+    }
+  }
+  return leaves
+}
+
+interface Snapshot {
+  version: number
+  leaves: Map<string, string>
+  attemptIds: Set<string>
+  currentTab: string
+}
+
+function snapshotOf(progress: SyncedProgress, version: number, leaves: Map<string, string>): Snapshot {
+  return {
+    version,
+    leaves,
+    attemptIds: new Set((progress.attempts || []).map((attempt) => attempt.id)),
+    currentTab: progress.currentTab,
+  }
+}
+
+// The delta from the last acknowledged write, or null when only a full write will do
+function diff(snapshot: Snapshot, progress: SyncedProgress, leaves: Map<string, string>): ProgressDelta | null {
+  const set: Record<string, unknown> = {}
+  for (const [path, value] of leaves) {
+    if (snapshot.leaves.get(path) !== value) set[path] = JSON.parse(value)
+  }
+  // A path that moved between levels ("math" <-> "math.3") is simply set; unsetting it as well
+  // would make the update conflict with itself
+  const setPaths = Object.keys(set)
+  const unset = [...snapshot.leaves.keys()].filter(
+    (path) =>
+      !leaves.has(path) &&
+      !setPaths.some((setPath) => setPath.startsWith(`${path}.`) || path.startsWith(`${setPath}.`)),
+  )
+
+  // New attempts are pushed and the server keeps the last MAX_ATTEMPTS, as lib/storage.ts does;
+  // attempts dropped any other way (a reset) can't be expressed as a push
+  const attempts = (progress.attempts || []).filter((attempt) => !snapshot.attemptIds.has(attempt.id))
+  const kept = (progress.attempts || []).length - attempts.length
+  const expected = Math.min(snapshot.attemptIds.size, MAX_ATTEMPTS - attempts.length)
+  if (kept !== Math.max(0, expected)) return null
+
+  const delta: ProgressDelta = { testId: progress.testId, baseVersion: snapshot.version }
+  if (setPaths.length > 0) delta.set = set
+  if (unset.length > 0) delta.unset = unset
+  if (progress.currentTab !== snapshot.currentTab) delta.currentTab = progress.currentTab
+  if (attempts.length > 0) delta.attempts = attempts
+  return delta
+}
+
+interface SyncState {
+  pending: SyncedProgress | null
+  waiters: ((ok: boolean) => void)[]
+  firstQueuedAt: number
+  timer: ReturnType<typeof setTimeout> | null
+  inFlight: boolean
+  snapshot: Snapshot | null
+}
+
+const states = new Map<string, SyncState>()
+let unloadHandlerAdded = false
+
+async function post(body: unknown, keepalive: boolean): Promise<Response> {
+  return fetch("/api/progress/sync", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+    keepalive,
+  })
+}
+
+async function send(email: string, state: SyncState, progress: SyncedProgress, keepalive: boolean): Promise<boolean> {
+  const leaves = answerLeaves(progress.answers)
+  const delta = state.snapshot && leaves ? diff(state.snapshot, progress, leaves) : null
+
+  if (delta && state.snapshot && leaves) {
+    if (!delta.set && !delta.unset && !delta.attempts && delta.currentTab === undefined) return true
+    const response = await post({ email, delta }, keepalive)
+    if (response.ok) {
+      const { version } = await response.json()
+      state.snapshot = snapshotOf(progress, version, leaves)
+      return true
+    }
+    if (response.status !== 409) {
+      console.error("❌ Server sync failed:", response.statusText)
+      return false
+    }
+    console.warn("⚠️ Progress changed on the server, sending a full sync")
+  }
+
+  const response = await post({ email, progress }, keepalive)
+  if (!response.ok) {
+    console.error("❌ Server sync failed:", response.statusText)
+    state.snapshot = null
+    return false
+  }
+  const { version } = await response.json()
+  state.snapshot = typeof version === "number" && leaves ? snapshotOf(progress, version, leaves) : null
+  return true
+}
+
+async function flush(email: string, state: SyncState, keepalive = false) {
+  if (state.timer) clearTimeout(state.timer)
+  state.timer = null
+  if (state.inFlight || !state.pending) return
+
+  const progress = state.pending
+  const waiters = state.waiters
+  state.pending = null
+  state.waiters = []
+  state.inFlight = true
+
+  let ok = false
+  try {
+    ok = await send(email, state, progress, keepalive)
+    if (ok) console.log(`☁️ Progress synced to server for ${email}`)
+  } catch (error) {
+    console.error("❌ Server sync error:", error)
+    state.snapshot = null
+  } finally {
+    state.inFlight = false
+  }
+  waiters.forEach((resolve) => resolve(ok))
+
+  // Saves that arrived while this one was in flight
+  if (state.pending) schedule(email, state)
+}
+
+function schedule(email: string, state: SyncState) {
+  if (state.timer) clearTimeout(state.timer)
+  const wait = Math.max(0, Math.min(DEBOUNCE_MS, state.firstQueuedAt + MAX_WAIT_MS - Date.now()))
+  state.timer = setTimeout(() => flush(email, state), wait)
+}
+
+// Send whatever is queued now, e.g. when the page is being hidden or closed
+export function flushProgressSync() {
+  for (const [key, state] of states) flush(key.split("\n")[0], state, true)
+}
+
+export function queueProgressSync(email: string, progress: SyncedProgress): Promise<boolean> {
+  const key = `${email}\n${progress.testId}`
+  let state = states.get(key)
+  if (!state) {
+    state = { pending: null, waiters: [], firstQueuedAt: 0, timer: null, inFlight: false, snapshot: null }
+    states.set(key, state)
+  }
+  if (!unloadHandlerAdded && typeof window !== "undefined") {
+    unloadHandlerAdded = true
+    window.addEventListener("pagehide", flushProgressSync)
+  }
+
+  if (!state.pending) state.firstQueuedAt = Date.now()
+  state.pending = progress
+  const queued = state
+  const done = new Promise<boolean>((resolve) => queued.waiters.push(resolve))
+  if (!state.inFlight) schedule(email, state)
+  return done
+}
@@ -0,0 +1,121 @@
+// Serves prebuilt question bundles from build/bundles (see scripts/build_bundles.py)
+// Each bundle is the exact /api/questions/[testId] response body, already adapted and
+// precompressed, so a hit never touches MongoDB. The answer key of each test is a
+// separate bundle (<testId>.answers.json) served by /api/questions/[testId]/answers.
+import fs from "node:fs/promises"
+import path from "node:path"
+
+const BUNDLE_DIR = process.env.QUESTION_BUNDLE_DIR || path.join(process.cwd(), "build", "bundles")
+
+// How often to check whether index.json was rebuilt; in development often enough that a bank
+// saved under scripts/watch_corpus.py shows up on the next reload
+const INDEX_RECHECK_MS = process.env.NODE_ENV === "production" ? 10_000 : 500
+
+export interface QuestionBundle {
+  etag: string
+  identity: Buffer
+  gzip?: Buffer
+  br?: Buffer
+}
+
+export type BundlePart = "questions" | "answers"
+
+interface BundleIndex {
+  encodings: string[]
+  tests: Record<string, { hash: string; bytes: number; answersHash: string; answersBytes: number }>
+}
+
+let index: BundleIndex | null = null
+let indexMtimeMs = 0
+let indexCheckedAt = 0
+const bundles = new Map<string, QuestionBundle>()
+
+async function readOptional(filePath: string): Promise<Buffer | undefined> {
+  try {
+    return await fs.readFile(filePath)
+  } catch {
+    return undefined
+  }
+}
+
+async function loadIndex(): Promise<BundleIndex | null> {
+  const now = Date.now()
+  if (now - indexCheckedAt < INDEX_RECHECK_MS) return index
+  indexCheckedAt = now
+
+  try {
+    const stat = await fs.stat(path.join(BUNDLE_DIR, "index.json"))
+    if (!index || stat.mtimeMs !== indexMtimeMs) {
+      index = JSON.parse(await fs.readFile(path.join(BUNDLE_DIR, "index.json"), "utf8"))
+      indexMtimeMs = stat.mtimeMs
+      bundles.clear()
+    }
+  } catch {
+    // No bundles built - callers fall back to the database
+    index = null
+    bundles.clear()
+  }
+  return index
+}
+
+export async function loadQuestionBundle(testId: string, part: BundlePart = "questions"): Promise<QuestionBundle | null> {
+  const current = await loadIndex()
+  // Only ids listed in the index are looked up, so testId never reaches the filesystem unchecked
+  if (!current || !Object.prototype.hasOwnProperty.call(current.tests, testId)) return null
+  const entry = current.tests[testId]
+  const hash = part === "answers" ? entry.answersHash : entry.hash
+  if (!hash) return null
+
+  const cacheKey = `${part}:${testId}`
+  const cached = bundles.get(cacheKey)
+  if (cached) return cached
+
+  const base = path.join(BUNDLE_DIR, part === "answers" ? `${testId}.answers` : testId)
+  const identity = await readOptional(`${base}.json`)
+  if (!identity) return null
+
+  const bundle: QuestionBundle = {
+    etag: `"${hash}"`,
+    identity,
+    gzip: current.encodings.includes("gzip") ? await readOptional(`${base}.json.gz`) : undefined,
+    br: current.encodings.includes("br") ? await readOptional(`${base}.json.br`) : undefined,
+  }
+  bundles.set(cacheKey, bundle)
+  return bundle
+}
+
+function etagMatches(ifNoneMatch: string | null, etag: string) {
+  if (!ifNoneMatch) return false
+  return ifNoneMatch.split(",").some((tag) => {
+    const value = tag.trim()
+    return value === "*" || value === etag || value === `W/${etag}`
+  })
+}
+
+// Build the response for a bundle: 304 on a matching ETag, otherwise the best precompressed variant.
+// By default the client always revalidates; unchanged content costs a 304 with no body.
+export function bundleResponse(request: Request, bundle: QuestionBundle, cacheControl = "no-cache"): Response {
+  const headers: Record<string, string> = {
+    ETag: bundle.etag,
+    "Cache-Control": cacheControl,
+    Vary: "Accept-Encoding",
+  }
+
+  if (etagMatches(request.headers.get("if-none-match"), bundle.etag)) {
+    return new Response(null, { status: 304, headers })
+  }
+
+  const acceptEncoding = request.headers.get("accept-encoding") || ""
+  let body = bundle.identity
+  if (bundle.br && /\bbr\b/.test(acceptEncoding)) {
+    body = bundle.br
+    headers["Content-Encoding"] = "br"
+  } else if (bundle.gzip && /\bgzip\b/.test(acceptEncoding)) {
+    body = bundle.gzip
+    headers["Content-Encoding"] = "gzip"
+  }
+
+  headers["Content-Type"] = "application/json; charset=utf-8"
+  headers["Content-Length"] = String(body.length)
+  return new Response(body, { status: 200, headers })
+}
@@ -0,0 +1,285 @@
+// Full-text search over every question bank (see scripts/build_search_index.py for the format).
+// The index is one Buffer read from build/search-index.bin and queried in place: terms are
+// binary-searched in the sorted term table and only the posting lists a query touches are
+// decoded, so a query costs a few hundred microseconds whatever the size of the corpus.
+import { watchedFile } from "@/lib/build-artifact"
+import { NEPALI_DIGITS } from "@/lib/answer-index"
+
+const INDEX_VERSION = 1
+const MAGIC = "NSIX"
+const HEADER_SIZE = 40
+const TERM_SIZE = 16
+const DOC_SIZE = 12
+
+// BM25 parameters
+const K1 = 1.2
+const B = 0.75
+
+export const MAX_RESULTS = 100
+
+// --- Tokens (mirrors search_tokens in scripts/corpus_text.py) ------------------
+
+const searchTokenPattern = /[a-z0-9]+|[ऀ-ॣ॰-ॿ]+/g
+
+const SEARCH_STOPWORDS = new Set([
+  "a", "an", "the", "of", "in", "on", "at", "to", "for", "from", "by", "with", "and", "or", "is", "are",
+  "was", "were", "be", "it", "its", "this", "that", "these", "those", "what", "which", "who", "how", "why",
+  "when", "where", "do", "does", "your", "you", "their", "as", "into", "about", "all", "any", "question",
+  "questions", "related",
+  "र", "वा", "छ", "छन्", "हो", "हुन्", "के", "कुन", "को", "का", "की", "मा", "ले", "लाई", "पनि", "यो", "त्यो", "सबै", "प्रश्न",
+])
+
+const NEPALI_SUFFIXES = [
+  "हरूलाई", "हरूबाट", "हरूको", "हरूका", "हरूकी", "हरूले", "हरूमा", "हरुको", "हरुले", "हरुमा",
+  "द्वारा", "हरू", "हरु", "लाई", "बाट", "देखि", "सम्म", "को", "का", "की", "ले", "मा",
+]
+
+const doubledConsonantPattern = /([b-df-hj-np-tv-z])\1$/
+
+function stemEnglish(word: string): string {
+  if (word.length <= 3 || !/^[a-z]+$/.test(word)) return word
+  if (word.endsWith("ies") && word.length > 4) word = word.slice(0, -3) + "y"
+  else if (word.endsWith("sses")) word = word.slice(0, -2)
+  else if (["xes", "ches", "shes", "zes"].some((suffix) => word.endsWith(suffix))) word = word.slice(0, -2)
+  else if (word.endsWith("s") && !["ss", "us", "is"].some((suffix) => word.endsWith(suffix))) word = word.slice(0, -1)
+  for (const suffix of ["ing", "ed"]) {
+    if (word.endsWith(suffix) && word.length - suffix.length >= 3) {
+      word = word.slice(0, -suffix.length)
+      if (doubledConsonantPattern.test(word) && !["ll", "ss", "zz"].some((end) => word.endsWith(end))) {
+        word = word.slice(0, -1)
+      }
+      break
+    }
+  }
+  if (word.endsWith("ly") && word.length >= 6) word = word.slice(0, -2)
+  if (word.endsWith("e") && word.length > 4) word = word.slice(0, -1)
+  return word
+}
+
+function stemNepali(word: string): string {
+  for (const suffix of NEPALI_SUFFIXES) {
+    if (word.endsWith(suffix) && word.length - suffix.length >= 2) return word.slice(0, -suffix.length)
+  }
+  return word
+}
+
+function toLatinDigits(text: string): string {
+  return text.replace(/[०-९]/g, (d) => String(NEPALI_DIGITS.indexOf(d)))
+}
+
+export function searchTokens(text: string): string[] {
+  const tokens: string[] = []
+  for (let token of toLatinDigits(String(text).normalize("NFC").toLowerCase()).match(searchTokenPattern) || []) {
+    if (SEARCH_STOPWORDS.has(token)) continue
+    token = token[0] >= "ऀ" ? stemNepali(token) : stemEnglish(token)
+    if (!SEARCH_STOPWORDS.has(token)) tokens.push(token)
+  }
+  return tokens
+}
+
+// --- Queries ----------------------------------------------------------------
+
+export interface SearchFilters {
+  subject?: string
+  testId?: string
+  chapter?: number
+  lesson?: number
+}
+
+// Chapter/lesson references are read the way lib/citation-utils.ts reads citations:
+// "अध्याय ४, पाठ २" is chapter 4 lesson 2, a lone "पाठ ९" is a chapter
+const chapterLessonPattern = /(?:chapter|अध्याय)\s*(\d+)\s*[,;]?\s*(?:lesson|पाठ)\s*(\d+)/i
+const lessonPattern = /lesson\s*(\d+)/i
+const chapterPattern = /(?:chapter|ch\.|अध्याय|पाठ)\s*(\d+)/i
+
+// "chapter 3 pressure" -> text "pressure", chapter 3
+export function parseQuery(query: string): { text: string; filters: SearchFilters } {
+  let text = toLatinDigits(String(query).normalize("NFC"))
+  const filters: SearchFilters = {}
+  const take = (pattern: RegExp) => {
+    const match = text.match(pattern)
+    if (match) text = text.replace(pattern, " ")
+    return match
+  }
+
+  const both = take(chapterLessonPattern)
+  if (both) {
+    filters.chapter = Number(both[1])
+    filters.lesson = Number(both[2])
+  }
+  const lesson = take(lessonPattern)
+  if (lesson && filters.lesson === undefined) filters.lesson = Number(lesson[1])
+  const chapter = take(chapterPattern)
+  if (chapter && filters.chapter === undefined) filters.chapter = Number(chapter[1])
+  return { text: text.trim(), filters }
+}
+
+// --- Index ------------------------------------------------------------------
+
+interface SearchIndex {
+  buffer: Buffer
+  docCount: number
+  termCount: number
+  averageLength: number
+  termsOffset: number
+  stringsOffset: number
+  postingsOffset: number
+  docsOffset: number
+  metaOffset: number
+}
+
+export interface SearchResult {
+  testId: string
+  subject: string
+  path: (string | number)[]
+  question: string
+  questionNepali: string
+  chapter: number | null
+  lesson: number | null
+  score: number
+}
+
+function parseIndex(buffer: Buffer): SearchIndex | null {
+  if (buffer.length < HEADER_SIZE || buffer.toString("latin1", 0, 4) !== MAGIC) return null
+  const u32 = (i: number) => buffer.readUInt32LE(4 + i * 4)
+  if (u32(0) !== INDEX_VERSION) return null
+  const docCount = u32(1)
+  return {
+    buffer,
+    docCount,
+    termCount: u32(2),
+    averageLength: docCount ? u32(3) / docCount : 0,
+    termsOffset: u32(4),
+    stringsOffset: u32(5),
+    postingsOffset: u32(6),
+    docsOffset: u32(7),
+    metaOffset: u32(8),
+  }
+}
+
+const loadIndex = watchedFile("search-index.bin", parseIndex, process.env.SEARCH_INDEX_PATH)
+
+interface Postings {
+  docs: Uint32Array
+  frequencies: Uint32Array
+}
+
+function findPostings(index: SearchIndex, term: string): Postings | null {
+  const { buffer } = index
+  const key = Buffer.from(term, "utf8")
+  let low = 0
+  let high = index.termCount - 1
+  while (low <= high) {
+    const middle = (low + high) >>> 1
+    const entry = index.termsOffset + middle * TERM_SIZE
+    const start = index.stringsOffset + buffer.readUInt32LE(entry)
+    const order = buffer.compare(key, 0, key.length, start, start + buffer.readUInt32LE(entry + 4))
+    if (order < 0) low = middle + 1
+    else if (order > 0) high = middle - 1
+    else return decodePostings(buffer, index.postingsOffset + buffer.readUInt32LE(entry + 8), buffer.readUInt32LE(entry + 12))
+  }
+  return null
+}
+
+function decodePostings(buffer: Buffer, offset: number, count: number): Postings {
+  const docs = new Uint32Array(count)
+  const frequencies = new Uint32Array(count)
+  let position = offset
+  const varint = () => {
+    let value = 0
+    let shift = 0
+    let byte: number
+    do {
+      byte = buffer[position++]
+      value += (byte & 0x7f) * 2 ** shift
+      shift += 7
+    } while (byte & 0x80)
+    return value
+  }
+  let doc = 0
+  for (let i = 0; i < count; i++) {
+    doc += varint()
+    docs[i] = doc
+    frequencies[i] = varint()
+  }
+  return { docs, frequencies }
+}
+
+// Documents in every list (all lists are sorted by doc id)
+function intersect(lists: Uint32Array[]): Uint32Array {
+  const [first, ...rest] = [...lists].sort((a, b) => a.length - b.length)
+  const cursors = rest.map(() => 0)
+  const matched: number[] = []
+  outer: for (const doc of first) {
+    for (let i = 0; i < rest.length; i++) {
+      const list = rest[i]
+      while (cursors[i] < list.length && list[cursors[i]] < doc) cursors[i]++
+      if (cursors[i] === list.length) break outer
+      if (list[cursors[i]] !== doc) continue outer
+    }
+    matched.push(doc)
+  }
+  return Uint32Array.from(matched)
+}
+
+function docEntry(index: SearchIndex, doc: number) {
+  const entry = index.docsOffset + doc * DOC_SIZE
+  return {
+    metaStart: index.metaOffset + index.buffer.readUInt32LE(entry),
+    metaLength: index.buffer.readUInt32LE(entry + 4),
+    length: index.buffer.readUInt32LE(entry + 8),
+  }
+}
+
+// All documents matching every word of the query and every filter, best first (BM25).
+// Returns null when the index hasn't been built.
+export async function search(
+  query: string,
+  filters: SearchFilters = {},
+  { limit = 20, offset = 0 }: { limit?: number; offset?: number } = {},
+): Promise<{ total: number; results: SearchResult[] } | null> {
+  const index = await loadIndex()
+  if (!index) return null
+
+  const parsed = parseQuery(query)
+  const combined = { ...parsed.filters, ...Object.fromEntries(Object.entries(filters).filter(([, v]) => v !== undefined)) }
+  const terms = [...new Set(searchTokens(parsed.text))]
+  const facets = [
+    combined.subject && `subject:${combined.subject}`,
+    combined.testId && `test:${combined.testId}`,
+    combined.chapter !== undefined && `chapter:${combined.chapter}`,
+    combined.lesson !== undefined && `lesson:${combined.lesson}`,
+  ].filter((facet): facet is string => Boolean(facet))
+  if (terms.length === 0 && facets.length === 0) return { total: 0, results: [] }
+
+  const termPostings: Postings[] = []
+  const lists: Uint32Array[] = []
+  for (const term of [...terms, ...facets]) {
+    const postings = findPostings(index, term)
+    if (!postings) return { total: 0, results: [] }
+    if (termPostings.length < terms.length) termPostings.push(postings)
+    lists.push(postings.docs)
+  }
+
+  const candidates = intersect(lists)
+  const scores = new Map<number, number>()
+  for (const doc of candidates) scores.set(doc, 0)
+  for (const { docs, frequencies } of termPostings) {
+    const idf = Math.log(1 + (index.docCount - docs.length + 0.5) / (docs.length + 0.5))
+    for (let i = 0; i < docs.length; i++) {
+      const score = scores.get(docs[i])
+      if (score === undefined) continue
+      const frequency = frequencies[i]
+      const norm = K1 * (1 - B + (B * docEntry(index, docs[i]).length) / (index.averageLength || 1))
+      scores.set(docs[i], score + (idf * frequency * (K1 + 1)) / (frequency + norm))
+    }
+  }
+
+  const ranked = [...scores].sort((a, b) => b[1] - a[1] || a[0] - b[0])
+  const results = ranked.slice(offset, offset + Math.min(limit, MAX_RESULTS)).map(([doc, score]) => {
+    const { metaStart, metaLength } = docEntry(index, doc)
+    const meta = JSON.parse(index.buffer.toString("utf8", metaStart, metaStart + metaLength))
+    return { ...meta, score: Math.round(score * 1000) / 1000 } as SearchResult
+  })
+  return { total: ranked.length, results }
+}
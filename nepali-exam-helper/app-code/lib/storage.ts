@@ -1,3 +1,5 @@
+import { MAX_ATTEMPTS, queueProgressSync } from "@/lib/progress-sync"
+
 export interface StudentProgress {
   studentId: string
   testId: string
@@ -132,7 +134,7 @@ export function saveAttemptHistory(
       }
       progress.attempts = progress.attempts || []
       progress.attempts.push(newAttempt)
-      if (progress.attempts.length > 10) progress.attempts = progress.attempts.slice(-10)
+      if (progress.attempts.length > MAX_ATTEMPTS) progress.attempts = progress.attempts.slice(-MAX_ATTEMPTS)
       saveStudentProgress(studentId, progress)
     }
   } catch (error) {
@@ -190,28 +192,12 @@ export function clearAuthState(): void {
   }
 }
 
-export async function syncProgressToServer(
+// Saves are coalesced and sent as deltas (lib/progress-sync.ts); resolves once this one reached the server
+export function syncProgressToServer(
   email: string,
   progress: Omit<StudentProgress, "lastUpdated">
 ): Promise<boolean> {
-  try {
-    const response = await fetch("/api/progress/sync", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ email, progress }),
-    })
-
-    if (!response.ok) {
-      console.error("❌ Server sync failed:", response.statusText)
-      return false
-    }
-
-    console.log(`☁️ Progress synced to server for ${email}`)
-    return true
-  } catch (error) {
-    console.error("❌ Server sync error:", error)
-    return false
-  }
+  return queueProgressSync(email, progress)
 }
 
 export async function loadProgressFromServer(
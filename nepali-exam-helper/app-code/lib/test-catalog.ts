@@ -0,0 +1,97 @@
+// In-process cache of the test list served by GET /api/tests.
+// practice_tests only changes when scripts/import-all-tests.mjs runs, and that script bumps
+// analytics/"test_catalog".version whenever it writes. The cached list is served from memory;
+// at most every RECHECK_MS a request also reads the stamp in the background (one _id lookup)
+// and the list is reloaded only if the version moved, so an import shows up within seconds.
+import type { Db, ObjectId } from "mongodb"
+
+export const CATALOG_STAMP_ID = "test_catalog" as unknown as ObjectId
+
+// Development rechecks often, so tests pushed by scripts/watch_corpus.py show up straight away
+const RECHECK_MS = process.env.NODE_ENV === "production" ? 5_000 : 500
+
+export interface CatalogTest {
+  id: string
+  title: string
+  titleNepali?: string
+  titleEnglish: string
+  subject: string
+  year?: number
+  totalMarks?: number
+  duration?: number
+  sections?: unknown
+  isActive: boolean
+}
+
+interface Catalog {
+  version: number
+  tests: CatalogTest[]
+}
+
+let catalog: Catalog | null = null
+let checkedAt = 0
+let loading: Promise<Catalog> | null = null
+
+async function catalogVersion(db: Db): Promise<number> {
+  const stamp = await db.collection("analytics").findOne({ _id: CATALOG_STAMP_ID }, { projection: { version: 1 } })
+  return stamp?.version || 0
+}
+
+async function loadCatalog(db: Db): Promise<Catalog> {
+  const started = Date.now()
+  // Read the stamp first: an import landing in between leaves the list newer than its version,
+  // which only costs one extra reload
+  const version = await catalogVersion(db)
+  const practiceTests = await db
+    .collection("practice_tests")
+    .find({}, { projection: { title: 1, titleNepali: 1, titleEnglish: 1, subject: 1, year: 1, totalMarks: 1, duration: 1, sections: 1, isActive: 1 } })
+    .sort({ _id: 1 })
+    .toArray()
+
+  const tests = practiceTests.map((t: any) => ({
+    id: t._id,
+    title: t.title,
+    titleNepali: t.titleNepali,
+    titleEnglish: t.titleEnglish || t.title,
+    subject: t.subject,
+    year: t.year,
+    totalMarks: t.totalMarks,
+    duration: t.duration,
+    sections: t.sections,
+    isActive: t.isActive !== false,
+  }))
+  console.log(`📚 Loaded test catalog v${version}: ${tests.length} tests in ${Date.now() - started}ms`)
+  return { version, tests }
+}
+
+function reload(db: Db): Promise<Catalog> {
+  loading ??= loadCatalog(db)
+    .then((loaded) => {
+      catalog = loaded
+      checkedAt = Date.now()
+      return loaded
+    })
+    .finally(() => {
+      loading = null
+    })
+  return loading
+}
+
+async function revalidate(db: Db) {
+  try {
+    if (catalog && (await catalogVersion(db)) !== catalog.version) await reload(db)
+  } catch (error) {
+    console.error("⚠️ Test catalog check failed:", error)
+  }
+}
+
+export async function getTestCatalog(db: Db): Promise<CatalogTest[]> {
+  if (!catalog) return (await reload(db)).tests
+
+  const now = Date.now()
+  if (now - checkedAt >= RECHECK_MS) {
+    checkedAt = now
+    void revalidate(db)
+  }
+  return catalog.tests
+}
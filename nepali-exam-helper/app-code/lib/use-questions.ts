@@ -1,6 +1,9 @@
 "use client"
 
-import { useState, useEffect } from "react"
+import { useState, useEffect, useCallback, useRef } from "react"
+import { mergeAnswerKey } from "./answer-key"
+import { addMathMarkup } from "./math-markup"
+import { ensureOfflinePackFor } from "./offline-client"
 import type { EnglishQuestion } from "./english-question-types"
 import type { SocialStudiesGroup } from "./social-studies-types"
 import type { NepaliQuestion } from "./nepali-types"
@@ -43,23 +46,64 @@ interface QuestionsData {
   mathQuestions: MathQuestion[]
 }
 
-export function useQuestions(testId = "see_2080_science") {
+async function fetchAnswerKey(testId: string, questions: QuestionsData): Promise<QuestionsData> {
+  const response = await fetch(`/api/questions/${testId}/answers`)
+  if (!response.ok) {
+    const msg = await response.text()
+    throw new Error(msg || "Failed to fetch answers")
+  }
+  const data = await response.json()
+  addMathMarkup(data.math)
+  return mergeAnswerKey(questions, data.answers || [])
+}
+
+// The exam payload ships without answers and explanations (answersDeferred);
+// loadAnswers() fetches the answer key once and merges it in. Pass
+// { withAnswers: true } where answers are needed straight away (results).
+export function useQuestions(testId = "see_2080_science", { withAnswers = false } = {}) {
   const [questions, setQuestions] = useState<QuestionsData | null>(null)
   const [metadata, setMetadata] = useState<TestMetadata | null>(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
+  const deferredRef = useRef<QuestionsData | null>(null)
+  const answersRef = useRef<Promise<QuestionsData> | null>(null)
+
+  const loadAnswers = useCallback(async (): Promise<QuestionsData | null> => {
+    const deferred = deferredRef.current
+    if (!deferred) return questions
+    // Fetched once; a failed fetch is retried on the next call
+    answersRef.current ??= fetchAnswerKey(testId, deferred).catch((err) => {
+      answersRef.current = null
+      throw err
+    })
+    const merged = await answersRef.current
+    setQuestions(merged)
+    return merged
+  }, [testId, questions])
 
   useEffect(() => {
     async function fetchQuestions() {
       try {
         setLoading(true)
+        deferredRef.current = null
+        answersRef.current = null
         const response = await fetch(`/api/questions/${testId}`)
         if (!response.ok) {
           const msg = await response.text()
           throw new Error(msg || "Failed to fetch questions")
         }
         const data = await response.json()
+        addMathMarkup(data.math)
+        if (data.answersDeferred) {
+          deferredRef.current = data.questions
+          if (withAnswers) {
+            answersRef.current = fetchAnswerKey(testId, data.questions)
+            data.questions = await answersRef.current
+          }
+        }
         setQuestions(data.questions)
+        // Answered by the network (not an installed pack): the test's pack may be worth keeping
+        if (!response.headers.get("X-Offline-Pack")) ensureOfflinePackFor(testId)
         setMetadata(data.metadata || { durationEnglish: 180, durationNepali: '१८०', titleEnglish: testId, titleNepali: testId, fullMarksEnglish: 75 })
       } catch (err) {
         setError(err instanceof Error ? err.message : "Unknown error")
@@ -70,8 +114,8 @@ export function useQuestions(testId = "see_2080_science") {
     }
 
     fetchQuestions()
-  }, [testId])
+  }, [testId, withAnswers])
 
-  return { questions, metadata, loading, error }
+  return { questions, metadata, loading, error, loadAnswers }
 }
 
@@ -0,0 +1,191 @@
+// Per-student rollup of user_progress for the admin dashboard (indexed in lib/mongodb.ts).
+// user_stats holds one small document per student, kept current by every progress sync:
+//   { _id: email, tests: { <testId>: { attempts, bestGrade } }, testsAttempted, totalAttempts,
+//     aGrades, lastActive }
+// and analytics/"user_stats" holds the dashboard totals (registeredUsers, totalAttempts), moved by
+// the same syncs. GET /api/admin/stats reads one page of rollups and the totals document, never
+// user_progress. rebuildUserStats() recomputes everything with one aggregation run on the server;
+// it runs by itself the first time the dashboard finds no rollup built.
+import type { Db, Document, ObjectId } from "mongodb"
+
+export const USER_STATS_COLLECTION = "user_stats"
+
+const TOTALS_ID = "user_stats" as unknown as ObjectId
+
+// Worst to best; a grade's index is its rank
+const GRADES = ["E", "D", "C", "C+", "B", "B+", "A", "A+"]
+const A_GRADES = ["A", "A+"]
+
+export interface UserStats {
+  email: string
+  testsAttempted: string[]
+  totalAttempts: number
+  lastActive: string
+  aGrades: number
+}
+
+export interface UserStatsTotals {
+  registeredUsers: number
+  totalAttempts: number
+}
+
+export function bestGrade(attempts: unknown): string | null {
+  let best = -1
+  if (Array.isArray(attempts)) {
+    for (const attempt of attempts) best = Math.max(best, GRADES.indexOf(attempt?.grade))
+  }
+  return best >= 0 ? GRADES[best] : null
+}
+
+// The derived fields of a rollup, recomputed on the server from its tests map
+const derivedFields = {
+  testsAttempted: { $map: { input: { $objectToArray: "$tests" }, in: "$$this.k" } },
+  totalAttempts: { $sum: { $map: { input: { $objectToArray: "$tests" }, in: "$$this.v.attempts" } } },
+  aGrades: {
+    $size: {
+      $filter: { input: { $objectToArray: "$tests" }, cond: { $in: ["$$this.v.bestGrade", A_GRADES] } },
+    },
+  },
+}
+
+// A record's attempts array (older records may have none)
+const recordAttempts = { $cond: [{ $isArray: "$attempts" }, "$attempts", []] }
+
+// Fold one synced user_progress record into the student's rollup and the totals.
+// A record's attempts replace the previous ones for that test, as in user_progress.
+export async function recordProgress(db: Db, email: string, testId: string, attempts: unknown[], at: Date) {
+  const entry = { attempts: attempts.length || 1, bestGrade: bestGrade(attempts) }
+
+  // One atomic pipeline update; the document as it was tells how the totals move
+  const before = await db.collection(USER_STATS_COLLECTION).findOneAndUpdate(
+    { _id: email as unknown as ObjectId },
+    [
+      {
+        $set: {
+          email,
+          tests: { $mergeObjects: [{ $ifNull: ["$tests", {}] }, { $literal: { [testId]: entry } }] },
+          lastActive: { $max: [{ $ifNull: ["$lastActive", at] }, at] },
+        },
+      },
+      { $set: derivedFields },
+    ],
+    { upsert: true, returnDocument: "before", projection: { [`tests.${testId}.attempts`]: 1 } },
+  )
+
+  const previousAttempts = before?.tests?.[testId]?.attempts || 0
+  await db.collection("analytics").updateOne(
+    { _id: TOTALS_ID },
+    { $inc: { registeredUsers: before ? 0 : 1, totalAttempts: entry.attempts - previousAttempts } },
+    { upsert: true },
+  )
+}
+
+// A sync that only changed answers just keeps lastActive roughly current: the filter matches
+// (and the rollup is written) at most once per interval per student
+const TOUCH_INTERVAL_MS = 5 * 60_000
+
+export async function touchUserStats(db: Db, email: string, at: Date) {
+  await db.collection(USER_STATS_COLLECTION).updateOne(
+    { _id: email as unknown as ObjectId, lastActive: { $lt: new Date(at.getTime() - TOUCH_INTERVAL_MS) } },
+    { $set: { lastActive: at } },
+  )
+}
+
+// Rebuild every rollup and the totals from user_progress, entirely inside MongoDB
+export async function rebuildUserStats(db: Db) {
+  const started = Date.now()
+  const pipeline: Document[] = [
+    { $set: { user: { $ifNull: ["$email", "$studentId"] } } },
+    { $match: { user: { $type: "string", $ne: "" } } },
+    {
+      $group: {
+        _id: { user: "$user", testId: { $ifNull: ["$testId", "unknown"] } },
+        attempts: { $sum: { $max: [{ $size: recordAttempts }, 1] } },
+        rank: {
+          $max: {
+            $max: {
+              $map: {
+                input: recordAttempts,
+                in: { $indexOfArray: [GRADES, "$$this.grade"] },
+              },
+            },
+          },
+        },
+        lastActive: {
+          $max: {
+            $convert: { input: { $ifNull: ["$lastUpdated", "$updatedAt"] }, to: "date", onError: null, onNull: null },
+          },
+        },
+      },
+    },
+    {
+      $group: {
+        _id: "$_id.user",
+        tests: {
+          $push: {
+            k: "$_id.testId",
+            v: {
+              attempts: "$attempts",
+              bestGrade: { $cond: [{ $gte: ["$rank", 0] }, { $arrayElemAt: [GRADES, "$rank"] }, null] },
+            },
+          },
+        },
+        lastActive: { $max: "$lastActive" },
+      },
+    },
+    { $set: { email: "$_id", tests: { $arrayToObject: "$tests" } } },
+    { $set: derivedFields },
+    { $merge: { into: USER_STATS_COLLECTION, on: "_id", whenMatched: "replace", whenNotMatched: "insert" } },
+  ]
+  await db.collection("user_progress").aggregate(pipeline, { allowDiskUse: true }).toArray()
+
+  const [totals] = await db
+    .collection(USER_STATS_COLLECTION)
+    .aggregate([{ $group: { _id: null, registeredUsers: { $sum: 1 }, totalAttempts: { $sum: "$totalAttempts" } } }])
+    .toArray()
+  await db.collection("analytics").updateOne(
+    { _id: TOTALS_ID },
+    {
+      $set: {
+        registeredUsers: totals?.registeredUsers || 0,
+        totalAttempts: totals?.totalAttempts || 0,
+        builtAt: new Date(),
+      },
+    },
+    { upsert: true },
+  )
+  console.log(`📊 Rebuilt user stats for ${totals?.registeredUsers || 0} users in ${Date.now() - started}ms`)
+}
+
+let rebuilding: Promise<void> | null = null
+
+// The totals, rebuilding the rollups first if they have never been built
+export async function getUserStatsTotals(db: Db, { rebuild = false } = {}): Promise<UserStatsTotals> {
+  let totals = await db.collection("analytics").findOne({ _id: TOTALS_ID })
+  if (rebuild || !totals?.builtAt) {
+    rebuilding ??= rebuildUserStats(db).finally(() => {
+      rebuilding = null
+    })
+    await rebuilding
+    totals = await db.collection("analytics").findOne({ _id: TOTALS_ID })
+  }
+  return { registeredUsers: totals?.registeredUsers || 0, totalAttempts: totals?.totalAttempts || 0 }
+}
+
+// One page of rollups, most recently active first
+export async function getUserStatsPage(db: Db, page: number, limit: number): Promise<UserStats[]> {
+  const rollups = await db
+    .collection(USER_STATS_COLLECTION)
+    .find({}, { projection: { email: 1, testsAttempted: 1, totalAttempts: 1, lastActive: 1, aGrades: 1 } })
+    .sort({ lastActive: -1, _id: 1 })
+    .skip((page - 1) * limit)
+    .limit(limit)
+    .toArray()
+  return rollups.map((rollup) => ({
+    email: rollup.email || String(rollup._id),
+    testsAttempted: rollup.testsAttempted || [],
+    totalAttempts: rollup.totalAttempts || 0,
+    lastActive: rollup.lastActive instanceof Date ? rollup.lastActive.toISOString() : "",
+    aGrades: rollup.aGrades || 0,
+  }))
+}
@@ -16,7 +16,8 @@ const nextConfig = {
     unoptimized: true,
   },
   experimental: {
-    // Enable any experimental features you need
+    // instrumentation.ts: warm up MongoDB when the server starts
+    instrumentationHook: true,
   },
   // Fix for HTTPS CSS loading issues
   compiler: {
@@ -0,0 +1,295 @@
+// Service worker for offline exams (registered by components/service-worker.tsx)
+//
+// Offline packs (scripts/build_offline_packs.py) are installed into the "offline-packs" cache: the
+// pack manifest plus every content-addressed chunk it lists. An update fetches the manifest with
+// If-None-Match (a 304 while the pack is unchanged), downloads only the chunks that aren't cached
+// yet, and then drops the chunks no installed manifest references. The manifest is stored last,
+// so an interrupted update leaves the previous version of the pack usable. Installs and updates run
+// one at a time (packWork), so one pack's prune never drops chunks another is still installing;
+// an unchanged pack (304) still gets any chunks missing from the cache back.
+//
+// Requests:
+//   /api/questions/<testId>[/answers]  from an installed pack when it has the test (the body is
+//                                      put back together from its chunks), else the network
+//   /api/tests                         network first; offline, the catalogs of installed packs
+//   /_next/static/*                    cache first (file names are content hashed)
+//   page navigations                   network first, falling back to the last cached copy
+//
+// Messages from the page: { type: "install-pack", pack }, { type: "install-pack-for", testId }
+// and { type: "update-packs" }; the reply ({ ok, error? }) goes to event.ports[0].
+
+const PACK_CACHE = "offline-packs-v1"
+const RUNTIME_CACHE = "runtime-v1"
+
+const PACKS_URL = "/api/offline/packs"
+const CHUNKS_URL = "/api/offline/chunks"
+
+// Parallel chunk downloads while installing a pack
+const CHUNK_CONCURRENCY = 6
+// How often requests may trigger a background check for pack updates
+const UPDATE_CHECK_MS = 30 * 60 * 1000
+
+let manifestsPromise = null
+let lastUpdateCheck = 0
+// Tail of the queue of pack installs and updates
+let packWork = Promise.resolve()
+// Chunk lists of manifests being installed but not stored yet
+const pendingChunks = new Set()
+
+self.addEventListener("install", () => {
+  self.skipWaiting()
+})
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    (async () => {
+      const keep = new Set([PACK_CACHE, RUNTIME_CACHE])
+      for (const name of await caches.keys()) {
+        if (!keep.has(name)) await caches.delete(name)
+      }
+      await self.clients.claim()
+    })(),
+  )
+})
+
+// --- Packs ------------------------------------------------------------------
+
+function manifestUrl(pack) {
+  return `${PACKS_URL}/${encodeURIComponent(pack)}`
+}
+
+function chunkUrl(id) {
+  return `${CHUNKS_URL}/${id}`
+}
+
+// Installed manifests, read from the cache once and kept until a pack changes
+function installedManifests() {
+  manifestsPromise ??= (async () => {
+    const cache = await caches.open(PACK_CACHE)
+    const manifests = []
+    for (const request of await cache.keys()) {
+      if (!new URL(request.url).pathname.startsWith(`${PACKS_URL}/`)) continue
+      const response = await cache.match(request)
+      if (response) manifests.push(await response.json())
+    }
+    return manifests
+  })()
+  return manifestsPromise
+}
+
+async function sha256Hex(buffer) {
+  const digest = new Uint8Array(await crypto.subtle.digest("SHA-256", buffer))
+  return Array.from(digest, (byte) => byte.toString(16).padStart(2, "0")).join("")
+}
+
+async function fetchChunk(cache, id) {
+  const response = await fetch(chunkUrl(id))
+  if (!response.ok) throw new Error(`chunk ${id}: HTTP ${response.status}`)
+  const body = await response.arrayBuffer()
+  // The id is the hash of the chunk's bytes: never store a truncated or altered download
+  if (!(await sha256Hex(body)).startsWith(id)) throw new Error(`chunk ${id}: hash mismatch`)
+  await cache.put(chunkUrl(id), new Response(body, { headers: { "Content-Type": "application/json; charset=utf-8" } }))
+}
+
+async function fetchMissingChunks(cache, ids) {
+  const cached = new Set((await cache.keys()).map((request) => new URL(request.url).pathname))
+  const missing = ids.filter((id) => !cached.has(chunkUrl(id)))
+  let next = 0
+  async function worker() {
+    while (next < missing.length) await fetchChunk(cache, missing[next++])
+  }
+  await Promise.all(Array.from({ length: Math.min(CHUNK_CONCURRENCY, missing.length) }, worker))
+  return missing.length
+}
+
+async function pruneChunks(cache) {
+  const referenced = new Set()
+  for (const chunks of [...(await installedManifests()).map((manifest) => manifest.chunks), ...pendingChunks]) {
+    for (const id of chunks) referenced.add(chunkUrl(id))
+  }
+  for (const request of await cache.keys()) {
+    const { pathname } = new URL(request.url)
+    if (pathname.startsWith(`${CHUNKS_URL}/`) && !referenced.has(pathname)) await cache.delete(request)
+  }
+}
+
+// Run task after every install/update queued before it
+function queuePackWork(task) {
+  const run = packWork.then(task, task)
+  packWork = run.catch(() => {})
+  return run
+}
+
+// Install a pack, or bring an installed one up to date. Returns the number of chunks downloaded.
+// Only call it from queued work (queuePackWork).
+async function installPack(pack) {
+  const cache = await caches.open(PACK_CACHE)
+  const url = manifestUrl(pack)
+  const installed = await cache.match(url)
+  const headers = installed?.headers.get("ETag") ? { "If-None-Match": installed.headers.get("ETag") } : {}
+  const response = await fetch(url, { headers, cache: "no-store" })
+  if (response.status === 304) {
+    // Unchanged, but a chunk may have gone missing (evicted, or lost to an earlier failure)
+    return fetchMissingChunks(cache, (await installed.json()).chunks)
+  }
+  if (!response.ok) throw new Error(`pack ${pack}: HTTP ${response.status}`)
+
+  const manifest = await response.clone().json()
+  pendingChunks.add(manifest.chunks)
+  try {
+    const downloaded = await fetchMissingChunks(cache, manifest.chunks)
+    await cache.put(url, response)
+    manifestsPromise = null
+    await pruneChunks(cache)
+    return downloaded
+  } finally {
+    pendingChunks.delete(manifest.chunks)
+  }
+}
+
+async function updatePacks() {
+  for (const manifest of await installedManifests()) {
+    try {
+      await installPack(manifest.pack)
+    } catch (error) {
+      // Offline or the pack was removed: keep serving the installed version
+      console.warn(`⚠️ Offline pack ${manifest.pack} not updated:`, error)
+    }
+  }
+}
+
+function queueUpdate() {
+  lastUpdateCheck = Date.now()
+  return queuePackWork(updatePacks)
+}
+
+async function installPackFor(testId) {
+  if ((await installedManifests()).some((manifest) => testId in manifest.tests)) return 0
+  const response = await fetch(PACKS_URL, { cache: "no-store" })
+  if (!response.ok) throw new Error(`pack index: HTTP ${response.status}`)
+  const { packs } = await response.json()
+  const pack = Object.keys(packs).find((name) => packs[name].tests.includes(testId))
+  return pack ? installPack(pack) : 0
+}
+
+self.addEventListener("message", (event) => {
+  const { type, pack, testId } = event.data || {}
+  let work
+  if (type === "install-pack") work = queuePackWork(() => installPack(pack))
+  else if (type === "install-pack-for") work = queuePackWork(() => installPackFor(testId))
+  else if (type === "update-packs") work = queueUpdate()
+  else return
+
+  const port = event.ports && event.ports[0]
+  event.waitUntil(
+    work.then(
+      () => port?.postMessage({ ok: true }),
+      (error) => port?.postMessage({ ok: false, error: String(error) }),
+    ),
+  )
+})
+
+// --- Serving from packs ------------------------------------------------------
+
+// Put a value back together: {"$chunk": id} references are replaced by their chunk's value, and
+// every chunk's math markup is collected into `math`
+async function resolve(cache, value, math) {
+  if (Array.isArray(value)) return Promise.all(value.map((item) => resolve(cache, item, math)))
+  if (value === null || typeof value !== "object") return value
+  if (typeof value.$chunk === "string") {
+    const response = await cache.match(chunkUrl(value.$chunk))
+    if (!response) throw new Error(`chunk ${value.$chunk} is not cached`)
+    const chunk = await response.json()
+    if (chunk.math) Object.assign(math, chunk.math)
+    return resolve(cache, chunk.value, math)
+  }
+  const resolved = {}
+  for (const [key, item] of Object.entries(value)) resolved[key] = await resolve(cache, item, math)
+  return resolved
+}
+
+async function packResponse(testId, part) {
+  const manifest = (await installedManifests()).find((m) => Object.prototype.hasOwnProperty.call(m.tests, testId))
+  if (!manifest) return null
+  const cache = await caches.open(PACK_CACHE)
+  const math = {}
+  const body = await resolve(cache, { $chunk: manifest.tests[testId][part] }, math)
+  if (Object.keys(math).length > 0) body.math = math
+  return new Response(JSON.stringify(body), {
+    headers: { "Content-Type": "application/json; charset=utf-8", "X-Offline-Pack": manifest.pack },
+  })
+}
+
+async function serveQuestions(request, testId, part) {
+  try {
+    const response = await packResponse(testId, part)
+    if (response) return response
+  } catch (error) {
+    console.warn(`⚠️ Offline pack could not serve ${testId}:`, error)
+  }
+  return fetch(request)
+}
+
+async function serveCatalog(request) {
+  try {
+    return await fetch(request)
+  } catch (error) {
+    const manifests = await installedManifests()
+    if (manifests.length === 0) throw error
+    const seen = new Set()
+    const tests = []
+    for (const manifest of manifests) {
+      for (const test of manifest.catalog) {
+        if (!seen.has(test.id)) tests.push(test)
+        seen.add(test.id)
+      }
+    }
+    return new Response(JSON.stringify({ ok: true, tests, offline: true }), {
+      headers: { "Content-Type": "application/json; charset=utf-8" },
+    })
+  }
+}
+
+async function cacheFirst(request) {
+  const cache = await caches.open(RUNTIME_CACHE)
+  const cached = await cache.match(request)
+  if (cached) return cached
+  const response = await fetch(request)
+  if (response.ok) await cache.put(request, response.clone())
+  return response
+}
+
+async function networkFirst(request) {
+  const cache = await caches.open(RUNTIME_CACHE)
+  try {
+    const response = await fetch(request)
+    if (response.ok) await cache.put(request, response.clone())
+    return response
+  } catch (error) {
+    const cached = await cache.match(request, { ignoreSearch: true })
+    if (cached) return cached
+    throw error
+  }
+}
+
+const QUESTIONS_PATH = /^\/api\/questions\/([^/]+)(\/answers)?$/
+
+self.addEventListener("fetch", (event) => {
+  const { request } = event
+  if (request.method !== "GET") return
+  const url = new URL(request.url)
+  if (url.origin !== self.location.origin) return
+
+  const questions = QUESTIONS_PATH.exec(url.pathname)
+  if (questions) {
+    event.respondWith(serveQuestions(request, decodeURIComponent(questions[1]), questions[2] ? "answers" : "questions"))
+    // Pick up rebuilt packs now and then while the student is online
+    if (navigator.onLine && Date.now() - lastUpdateCheck > UPDATE_CHECK_MS) event.waitUntil(queueUpdate())
+  } else if (url.pathname === "/api/tests") {
+    event.respondWith(serveCatalog(request))
+  } else if (url.pathname.startsWith("/_next/static/")) {
+    event.respondWith(cacheFirst(request))
+  } else if (request.mode === "navigate") {
+    event.respondWith(networkFirst(request))
+  }
+})
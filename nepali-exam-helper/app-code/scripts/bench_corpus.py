@@ -0,0 +1,408 @@
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import audit_english_fields
+import build_answer_index
+import build_bundles
+import build_grading_spec
+import build_offline_packs
+import build_search_index
+import compile_corpus
+import corpus_io
+import corpus_pipeline
+import corpus_runner
+import dedupe_corpus
+import fix_newlines
+import lint_corpus
+import prerender_math
+from compile_corpus import GROUP_KEYS, find_header, find_questions_doc
+from corpus_runner import add_runner_args, files_from_args
+
+# Benchmark harness for the corpus scripts.
+# Synthesises a corpus N times the size of data/ from the real files, in their
+# own layouts (science questions.groupA..D, social groups[].questions, math and
+# English/Nepali question arrays), then runs every transform, build and audit
+# script over it end to end: its main() as on the command line, merged outputs
+# (indexes, packs, dedupe clusters, the pipeline cache) included, in one fresh
+# process per benchmark whose CORPUS_DATA_DIR is the synthetic corpus. Outputs
+# go to a scratch directory, never to build/.
+# Every run starts from the untouched synthetic corpus (a fresh copy for the
+# passes that rewrite it in place) and an empty scratch directory, and the
+# median of --repeat runs is the result.
+# Each run records wall time, peak RSS (the process and its pool workers) and
+# throughput; the run fails when a benchmark is slower or bigger than the
+# baseline by more than --tolerance, or fails where the baseline didn't.
+#
+# Two shapes:
+#   banks  every test keeps its file and grows N times more questions
+#   tests  every test is copied N times under new test ids (more years/papers)
+#
+# scripts/bench_baseline.json:
+# {
+#   "version": 2,
+#   "machine": {"platform": "...", "python": "3.11.4", "cpus": 8},
+#   "results": {
+#     "10x banks": {"pipeline": {"seconds": 1.2, "peakRssMb": 80.1, "mbPerSecond": 19.4, "inputMb": 23.2}}
+#   }
+# }
+#
+# Usage:
+#   python scripts/bench_corpus.py                          # 10x banks, compare with the baseline
+#   python scripts/bench_corpus.py --scale 100 --scale 1000 --shape tests
+#   python scripts/bench_corpus.py --only "lint*" --only pipeline
+#   python scripts/bench_corpus.py --update-baseline        # record this machine's numbers
+
+BASELINE_VERSION = 2
+
+baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# Benchmarks that rewrite the corpus files in place: every run gets a fresh copy
+CORPUS_WRITERS = ("pipeline", "pipeline:*", "fix_newlines")
+
+# Benchmarks whose script exits 1 when it finds issues: that is a result, not a failure
+REPORTERS = ("lint_corpus*", "audit_*")
+
+# Differences below these are noise, whatever the percentage
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 5
+
+
+def benchmarks(scratch_dir):
+    """name -> (script main, argv), in run order. Outputs go to scratch_dir; the corpus is data/."""
+    def out(name):
+        return os.path.join(scratch_dir, name)
+
+    # Scripts that default to one subject run over the whole corpus like the rest
+    every_subject = [arg for subject in corpus_runner.SUBJECTS for arg in ("--subject", subject)]
+
+    tasks = {"pipeline": (corpus_pipeline.main, [])}
+    for name in corpus_pipeline.VISITORS:
+        tasks[f"pipeline:{name}"] = (corpus_pipeline.main, ["--only", name])
+    tasks.update({
+        "fix_newlines": (fix_newlines.main, every_subject),
+        "compile_corpus": (compile_corpus.main, ["--out", out("corpus")]),
+        "build_bundles": (build_bundles.main, ["--out", out("bundles")]),
+        "build_offline_packs": (build_offline_packs.main, ["--out", out("offline")]),
+        "build_answer_index": (build_answer_index.main, ["--out", out("answer-index.json")]),
+        "build_grading_spec": (build_grading_spec.main, ["--out", out("grading-spec.json")]),
+        "build_search_index": (build_search_index.main, ["--out", out("search-index.bin")]),
+        "dedupe_corpus": (dedupe_corpus.main, ["--rebuild", "--store", out("dedupe-signatures.json"),
+                                               "--out", out("duplicates.json")]),
+        # Renders with KaTeX in node: fails where the app's node_modules aren't installed
+        "prerender_math": (prerender_math.main, ["--out", out("math-render.json")]),
+        "lint_corpus": (lint_corpus.main, []),
+        "lint_corpus --stream": (lint_corpus.main, ["--stream"]),
+        "audit_english_fields": (audit_english_fields.main, every_subject),
+        "audit_nepali_answers": (lint_corpus.main, ["--rule", "nepali-answer-ascii-key", "--stream"]),
+    })
+    return tasks
+
+
+# --- Synthetic corpus -------------------------------------------------------
+
+def question_lists(data):
+    """The question arrays of a parsed test file, whatever its layout."""
+    if isinstance(data, dict) and isinstance(data.get("exam_metadata"), dict):
+        return [data["questions"]] if isinstance(data.get("questions"), list) else []
+    docs = [doc for doc in (data if isinstance(data, list) else [data]) if isinstance(doc, dict)]
+    questions_doc = find_questions_doc(docs, find_header(docs))
+    if questions_doc is None:
+        return []
+    questions = questions_doc.get("questions")
+    if isinstance(questions, list):
+        return [questions]
+    if isinstance(questions, dict):
+        return [questions[key] for key in GROUP_KEYS if isinstance(questions.get(key), list)]
+    return [group["questions"] for group in questions_doc.get("groups") or []
+            if isinstance(group, dict) and isinstance(group.get("questions"), list)]
+
+
+def rename_test(data, suffix):
+    """Give a copied test its own id, so per-test outputs don't overwrite each other."""
+    if isinstance(data, dict) and isinstance(data.get("exam_metadata"), dict):
+        data["exam_metadata"]["title"] = f"{data['exam_metadata'].get('title') or ''} {suffix}"
+        return
+    docs = [doc for doc in (data if isinstance(data, list) else [data]) if isinstance(doc, dict)]
+    header = find_header(docs)
+    if header is None:
+        return
+    questions_doc = find_questions_doc(docs, header)
+    test_id = f"{header['_id']}_{suffix}"
+    header["_id"] = test_id
+    if questions_doc is not None and "testId" in questions_doc:
+        questions_doc["testId"] = test_id
+
+
+def synthesize(templates, out_dir, scale, shape):
+    """Write the scaled corpus to out_dir. Returns its size in bytes."""
+    os.makedirs(out_dir, exist_ok=True)
+    total = 0
+    for template in templates:
+        stem, ext = os.path.splitext(os.path.basename(template))
+        if shape == "banks":
+            data = corpus_io.load_json(template)
+            for questions in question_lists(data):
+                # Shared references are fine: the tree is serialised straight away
+                questions[:] = questions * scale
+            copies = [(stem + ext, data)]
+        else:
+            copies = []
+            for copy in range(1, scale + 1):
+                data = corpus_io.load_json(template)
+                rename_test(data, f"copy{copy}")
+                copies.append((f"{stem}_copy{copy}{ext}", data))
+        for name, data in copies:
+            output = corpus_io.dumps(data)
+            corpus_io.write_bytes(os.path.join(out_dir, name), output)
+            total += len(output)
+    return total
+
+
+# --- Measuring --------------------------------------------------------------
+
+def peak_rss_mb():
+    """Peak RSS of this process or any of its (pool worker) children."""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == "darwin":
+        return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, children) / (1024 * 1024)
+    # Linux keeps ru_maxrss across exec, so RUSAGE_SELF would report the
+    # harness's own peak; VmHWM is this process image's high-water mark
+    own = 0
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                own = int(line.split()[1])
+    return max(own, children) / 1024
+
+
+def measure(name, scratch_dir, workers, result_path):
+    """Run one benchmark in this (fresh) process and write its numbers to result_path."""
+    files = corpus_runner.discover_files()
+    input_bytes = sum(os.path.getsize(path) for path in files)
+    script_main, argv = benchmarks(scratch_dir)[name]
+    if workers:
+        argv = argv + ["--workers", str(workers)]
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            code = script_main(argv)
+    except SystemExit as e:
+        code = e.code
+    seconds = time.perf_counter() - start
+
+    result = {
+        "seconds": round(seconds, 3),
+        "peakRssMb": round(peak_rss_mb(), 1),
+        "mbPerSecond": round(input_bytes / 1e6 / seconds, 2) if seconds else None,
+        "inputMb": round(input_bytes / 1e6, 2),
+        "files": len(files),
+    }
+    allowed = (0, 1) if any(fnmatch.fnmatch(name, pattern) for pattern in REPORTERS) else (0,)
+    if (code or 0) not in allowed:
+        lines = [line for line in output.getvalue().splitlines() if line.strip()]
+        reason = code if isinstance(code, str) else f"exit code {code}" + (f": {lines[-1]}" if lines else "")
+        result["error"] = reason.splitlines()[0]
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def writes_corpus(name):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in CORPUS_WRITERS)
+
+
+def fresh_dir(path, source=None):
+    """Empty path, or make it a copy of source, so a run never sees what an earlier one wrote."""
+    shutil.rmtree(path, ignore_errors=True)
+    if source:
+        shutil.copytree(source, path)
+    else:
+        os.makedirs(path)
+    return path
+
+
+def run_benchmark(name, corpus_dir, scratch_dir, workers, timeout):
+    """Run one benchmark in a child process; a crash, OOM kill or timeout is a result too."""
+    result_path = os.path.join(scratch_dir, "result.json")
+    command = [sys.executable, os.path.abspath(__file__), "--measure", name,
+               "--scratch", scratch_dir, "--result", result_path]
+    if workers:
+        command += ["--workers", str(workers)]
+    env = dict(os.environ, CORPUS_DATA_DIR=corpus_dir)
+    start = time.perf_counter()
+    try:
+        child = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout, env=env)
+    except subprocess.TimeoutExpired:
+        return {"seconds": round(time.perf_counter() - start, 3), "error": f"timed out after {timeout}s"}
+    if child.returncode != 0:
+        reason = f"killed by signal {-child.returncode}" if child.returncode < 0 else f"exit code {child.returncode}"
+        stderr = child.stderr.decode("utf-8", "replace").strip().splitlines()
+        return {"seconds": round(time.perf_counter() - start, 3),
+                "error": f"{reason}: {stderr[-1]}" if stderr else reason}
+    with open(result_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# --- Baseline ---------------------------------------------------------------
+
+def machine():
+    return {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()}
+
+
+def load_baseline(path):
+    try:
+        baseline = corpus_io.load_json(path)
+    except FileNotFoundError:
+        return None
+    return baseline if baseline.get("version") == BASELINE_VERSION else None
+
+
+def regressions(results, baseline, tolerance):
+    """Human-readable list of everything worse than the baseline."""
+    found = []
+    for run, benches in results.items():
+        for name, current in benches.items():
+            base = ((baseline or {}).get("results", {}).get(run) or {}).get(name)
+            if not base:
+                continue
+            if current.get("error"):
+                if not base.get("error"):
+                    found.append(f"{run} / {name}: {current['error']}")
+                continue
+            if base.get("error"):
+                continue
+            if (current["seconds"] > base["seconds"] * (1 + tolerance)
+                    and current["seconds"] - base["seconds"] > MIN_SECONDS_DELTA):
+                found.append(f"{run} / {name}: {current['seconds']:.2f}s vs {base['seconds']:.2f}s baseline")
+            if (current["peakRssMb"] > base["peakRssMb"] * (1 + tolerance)
+                    and current["peakRssMb"] - base["peakRssMb"] > MIN_RSS_DELTA_MB):
+                found.append(f"{run} / {name}: peak RSS {current['peakRssMb']:.0f} MB "
+                             f"vs {base['peakRssMb']:.0f} MB baseline")
+    return found
+
+
+def change(current, base, key):
+    if not base or base.get("error") or current.get("error"):
+        return ""
+    return f"{(current[key] / base[key] - 1) * 100:+.0f}%" if base[key] else ""
+
+
+def print_run(run, benches, baseline):
+    print("=" * 78)
+    print(f"{run}")
+    print(f"  {'benchmark':34} {'seconds':>8} {'vs base':>8} {'MB/s':>8} {'RSS MB':>8} {'vs base':>8}")
+    for name, result in benches.items():
+        base = ((baseline or {}).get("results", {}).get(run) or {}).get(name)
+        if result.get("error"):
+            print(f"  {name:34} FAILED: {result['error']}")
+            continue
+        print(f"  {name:34} {result['seconds']:8.2f} {change(result, base, 'seconds'):>8} "
+              f"{result['mbPerSecond'] or 0:8.1f} {result['peakRssMb']:8.0f} {change(result, base, 'peakRssMb'):>8}")
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Benchmark the corpus scripts on scaled synthetic banks."))
+    parser.add_argument("--scale", type=int, action="append", help="corpus size multiplier (repeatable; default: 10)")
+    parser.add_argument("--shape", choices=["banks", "tests"], default="banks",
+                        help="grow every test's question banks, or copy every test (default: banks)")
+    parser.add_argument("--only", action="append", help="benchmark name pattern (repeatable; default: all)")
+    parser.add_argument("--baseline", default=baseline_path, help=f"baseline file (default: {baseline_path})")
+    parser.add_argument("--update-baseline", action="store_true", help="record these results in the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown/growth vs the baseline (default: 0.25 = 25%%)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the median counts (default: 3)")
+    parser.add_argument("--timeout", type=int, default=1800, help="seconds before a benchmark counts as failed")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic corpora (path is printed)")
+    # Internal: run one benchmark in this process
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--scratch", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        measure(args.measure, args.scratch, args.workers, args.result)
+        return 0
+
+    names = [name for name in benchmarks("")
+             if not args.only or any(fnmatch.fnmatch(name, pattern) for pattern in args.only)]
+    if not names:
+        parser.error("no benchmark matches --only")
+    templates = files_from_args(args)
+    baseline = load_baseline(args.baseline)
+    work_dir = tempfile.mkdtemp(prefix="corpus-bench-")
+    results = {}
+
+    try:
+        for scale in args.scale or [10]:
+            run = f"{scale}x {args.shape}"
+            corpus_dir = os.path.join(work_dir, run.replace(" ", "-"))
+            scratch_dir = corpus_dir + "-scratch"
+            work_corpus_dir = corpus_dir + "-work"
+            size = synthesize(templates, corpus_dir, scale, args.shape)
+            print(f"Synthesised {run}: {len(os.listdir(corpus_dir))} files, {size / 1e6:.1f} MB")
+            results[run] = {}
+            for name in names:
+                # Median of --repeat runs, each from the untouched synthetic corpus and an empty
+                # scratch directory (a rerun over already-fixed files would write nothing);
+                # a failure in any of them is the result
+                attempts = []
+                for _ in range(max(1, args.repeat)):
+                    run_corpus = fresh_dir(work_corpus_dir, corpus_dir) if writes_corpus(name) else corpus_dir
+                    attempts.append(run_benchmark(name, run_corpus, fresh_dir(scratch_dir), args.workers, args.timeout))
+                failed = [attempt for attempt in attempts if attempt.get("error")]
+                attempts.sort(key=lambda attempt: attempt["seconds"])
+                results[run][name] = failed[0] if failed else attempts[len(attempts) // 2]
+                print(f"  {name}: {results[run][name].get('error') or str(results[run][name]['seconds']) + 's'}")
+            print_run(run, results[run], baseline)
+            if not args.keep:
+                for path in (corpus_dir, scratch_dir, work_corpus_dir):
+                    shutil.rmtree(path, ignore_errors=True)
+    finally:
+        if args.keep:
+            print(f"Synthetic corpora kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"version": BASELINE_VERSION, "machine": machine(), "results": results}, f, indent=2)
+
+    if args.update_baseline:
+        updated = {"version": BASELINE_VERSION, "machine": machine(), "results": (baseline or {}).get("results", {})}
+        for run, benches in results.items():
+            updated["results"].setdefault(run, {}).update(benches)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(updated, f, indent=2)
+            f.write("\n")
+        print(f"Baseline updated -> {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    if baseline.get("machine") != machine():
+        print(f"⚠️ Baseline was recorded on {baseline.get('machine')}; timings may not be comparable")
+    found = regressions(results, baseline, args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    failed = [f"{run} / {name}" for run, benches in results.items() for name, result in benches.items()
+              if result.get("error")]
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import argparse
+import os
+import sys
+
+import corpus_io
+from build_grading_spec import sub_questions
+from compile_corpus import load_test
+from corpus_runner import add_runner_args, run_from_args
+from corpus_text import normalize_text, text_key
+from corpus_walk import iter_nodes
+
+# Pre-graded answer index for POST /api/grade.
+# Every question with a short reference answer (answerEnglish/answerNepali,
+# correctAnswer*, sampleAnswer*) is indexed under the hash of each of its
+# question texts, with all its answers in both languages already normalised
+# (corpus_text.normalize_text). The route normalises the student's answer the
+# same way and awards full marks on a match without calling the model.
+# Math sub-questions ("List the sample space outcomes.") are only indexed under
+# the text the exam page sends for them, "<context>\n\nPart (<label>): <question>"
+# (as in build_grading_spec.py), so one test's part never answers another's.
+# Abbreviated references ("{HHH, HHT, ..., TTT}") are left to the model.
+#
+# build/answer-index.json:
+# {
+#   "version": 1,
+#   "questions": {"<text key>": ["normalised answer", ...]}
+# }
+#
+# Usage:
+#   python scripts/build_answer_index.py
+
+INDEX_VERSION = 1
+
+index_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build", "answer-index.json"))
+
+QUESTION_TEXT_KEYS = ("questionEnglish", "questionNepali", "question", "english", "nepali")
+
+ANSWER_KEYS = (
+    "answerEnglish",
+    "answerNepali",
+    "correctAnswer",
+    "correctAnswerEnglish",
+    "correctAnswerNepali",
+    "sampleAnswer",
+    "sampleAnswerEnglish",
+    "sampleAnswerNepali",
+)
+
+# Longer reference answers are model answers, not something to match verbatim.
+MAX_ANSWER_TOKENS = 6
+
+
+def reference_answers(node):
+    answers = set()
+    for key in ANSWER_KEYS:
+        value = node.get(key)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            # "{HHH, HHT, ..., TTT}" is shorthand for the reader, not an answer to match
+            if isinstance(value, str) and ("..." in value or "…" in value):
+                continue
+            normalized = normalize_text(value)
+            if normalized and len(normalized.split()) <= MAX_ANSWER_TOKENS:
+                answers.add(normalized)
+    return answers
+
+
+def index_test(file_path):
+    """Index one test file. Returns {"changes": questions indexed, "entries": [[key, answers], ...]}."""
+    return index_compiled(load_test(file_path))
+
+
+def index_compiled(compiled):
+    entries = []
+    indexed = 0
+    parts = set()  # ids of math sub-questions, indexed with their problem's context
+    for node, _ in iter_nodes(compiled["questions"]):
+        for sub, text in sub_questions(node):
+            parts.add(id(sub))
+            answers = sorted(reference_answers(sub))
+            if answers:
+                entries.append([text_key(text), answers])
+                indexed += 1
+        # Multiple-choice questions are graded on the client
+        if id(node) in parts or "options" in node:
+            continue
+        answers = sorted(reference_answers(node))
+        if not answers:
+            continue
+        keys = {text_key(node[key]) for key in QUESTION_TEXT_KEYS
+                if isinstance(node.get(key), str) and normalize_text(node[key])}
+        entries.extend([key, answers] for key in sorted(keys))
+        indexed += bool(keys)
+    return {"changes": indexed, "entries": entries}
+
+
+def merge_entries(report):
+    """Combine all entries; a question text with conflicting answers is dropped."""
+    merged = {}
+    ambiguous = set()
+    for entry in report["files"]:
+        for key, answers in (entry["result"] or {}).get("entries") or []:
+            if key in merged and merged[key] != answers:
+                ambiguous.add(key)
+            merged.setdefault(key, answers)
+    for key in ambiguous:
+        del merged[key]
+    return dict(sorted(merged.items())), len(ambiguous)
+
+
+def write_index(report, out_path):
+    """Merge the report's entries into the index file. Returns (questions, ambiguous count)."""
+    questions, ambiguous = merge_entries(report)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    corpus_io.write_json(out_path, {"version": INDEX_VERSION, "questions": questions})
+    return questions, ambiguous
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Build the pre-graded answer index."))
+    parser.add_argument("--out", default=index_path, help=f"output file (default: {index_path})")
+    args = parser.parse_args(argv)
+
+    report = run_from_args(index_test, args, label="questions")
+    if report["failedFiles"]:
+        return 1
+    questions, ambiguous = write_index(report, args.out)
+    print(f"Indexed {len(questions)} question texts ({ambiguous} ambiguous dropped) -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+import argparse
+import gzip
+import os
+import re
+import sys
+from functools import partial
+
+import corpus_io
+from compile_corpus import load_test
+from corpus_cache import content_hash
+from corpus_runner import add_runner_args, run_from_args
+from prerender_math import markup_for, table_path
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip bundles are written without it
+    brotli = None
+
+# Build per-test question bundles for GET /api/questions/[testId].
+# Each bundle is the exact JSON body the route would return from Mongo
+# ({success, questions, metadata, answersDeferred}) with adaptDatabaseQuestions()
+# already applied, written as <testId>.json plus precompressed .json.gz (and
+# .json.br when the brotli module is installed). The answer key is split out
+# (see lib/answer-key.ts) into <testId>.answers.json, which the client only
+# fetches on submit. index.json maps testId -> content hashes, which the
+# routes serve as strong ETags. Both carry the KaTeX markup of their math
+# ("math": {key: html}) from build/math-render.json when
+# scripts/prerender_math.py has been run first.
+#
+# Usage:
+#   python scripts/build_bundles.py            # every test in data/ -> build/bundles/
+
+bundle_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build", "bundles"))
+
+# --- JavaScript semantics ---------------------------------------------------
+# The port below must produce what lib/question-adapter.ts + JSON.stringify
+# produce, so missing keys (undefined) and JS truthiness are modelled exactly.
+
+UNDEFINED = object()
+
+
+def js_get(obj, key):
+    if isinstance(obj, dict) and key in obj:
+        return obj[key]
+    return UNDEFINED
+
+
+def js_truthy(value):
+    if value is UNDEFINED or value is None or value is False:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value == value and value != 0
+    if isinstance(value, str):
+        return value != ""
+    return True  # objects and arrays, even empty ones
+
+
+def js_or(*values):
+    for value in values[:-1]:
+        if js_truthy(value):
+            return value
+    return values[-1]
+
+
+def js_str(value):
+    # value?.toString()
+    if value is UNDEFINED or value is None:
+        return UNDEFINED
+    if value is True or value is False:
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def js_parse_int(value):
+    match = re.match(r"\s*([+-]?\d+)", str(value))
+    return int(match.group(1)) if match else None  # NaN serialises as null
+
+
+def js_object(*pairs_or_spread):
+    """Build an object like `{...spread, key: value}`; undefined values are dropped."""
+    result = {}
+    for part in pairs_or_spread:
+        result.update(part)
+    return {key: value for key, value in result.items() if value is not UNDEFINED}
+
+
+# --- lib/question-adapter.ts ------------------------------------------------
+
+def adapt_nepali(q):
+    g = partial(js_get, q)
+    return js_object(q, {
+        "questionNumber": js_or(g("questionNumberEnglish"), g("questionNumber"), 0),
+        "questionNumberNepali": js_or(g("questionNumberNepali"), ""),
+        "questionNumberEnglish": js_or(g("questionNumberEnglish"), g("questionNumber"), 0),
+        "type": g("type"),
+        "title": js_or(g("titleNepali"), g("title"), ""),
+        "titleNepali": js_or(g("titleNepali"), g("title"), ""),
+        "titleEnglish": js_or(g("titleEnglish"), ""),
+        "marks": js_or(g("marksEnglish"), g("marks"), 0),
+        "marksNepali": js_or(g("marksNepali"), ""),
+        "marksEnglish": js_or(g("marksEnglish"), g("marks"), 0),
+        "explanation": js_or(g("explanationNepali"), g("explanation"), ""),
+        "explanationNepali": js_or(g("explanationNepali"), g("explanation"), ""),
+        "explanationEnglish": js_or(g("explanationEnglish"), ""),
+        "passage": js_or(g("passageNepali"), g("passage"), ""),
+        "passageNepali": js_or(g("passageNepali"), g("passage"), ""),
+        "passageEnglish": js_or(g("passageEnglish"), ""),
+        "columns": g("columns"),
+        "correctAnswer": js_or(g("correctAnswerNepali"), g("correctAnswer")),
+        "correctAnswerNepali": js_or(g("correctAnswerNepali"), g("correctAnswer")),
+        "correctAnswerEnglish": g("correctAnswerEnglish"),
+        "subQuestions": g("subQuestions"),
+        "sampleAnswer": js_or(g("sampleAnswerNepali"), g("sampleAnswer")),
+        "sampleAnswerNepali": js_or(g("sampleAnswerNepali"), g("sampleAnswer")),
+        "sampleAnswerEnglish": g("sampleAnswerEnglish"),
+        "subSections": g("subSections"),
+        "options": g("options"),
+        "topics": js_or(g("topicsNepali"), g("topics")),
+        "topicsNepali": js_or(g("topicsNepali"), g("topics")),
+        "topicsEnglish": g("topicsEnglish"),
+        "sampleAnswerId": g("sampleAnswerId"),
+        "quote": js_or(g("quoteNepali"), g("quote")),
+        "quoteNepali": js_or(g("quoteNepali"), g("quote")),
+        "quoteEnglish": g("quoteEnglish"),
+    })
+
+
+def adapt_social_group(group, group_index):
+    g = partial(js_get, group)
+    questions = []
+    for q_index, q in enumerate(js_or(g("questions"), [])):
+        q_get = partial(js_get, q)
+        number = js_or(js_str(q_get("questionNumberEnglish")), js_str(q_get("questionNumber")), q_index)
+        questions.append(js_object({
+            "id": f"g{group_index}-{js_str(number)}",
+            "questionNumber": js_or(q_get("questionNumber"), q_get("questionNumberNepali"), ""),
+            "questionNumberNepali": js_or(q_get("questionNumberNepali"), q_get("questionNumber"), ""),
+            "questionNumberEnglish": js_or(q_get("questionNumberEnglish"), ""),
+            "type": q_get("type"),
+            "marks": js_or(q_get("marksEnglish"), q_get("marks"), 1),
+            "marksNepali": js_or(q_get("marksNepali"), ""),
+            "marksEnglish": js_or(q_get("marksEnglish"), q_get("marks"), 1),
+            "questionNepali": js_or(q_get("questionNepali"), ""),
+            "questionEnglish": js_or(q_get("questionEnglish"), ""),
+            "answerNepali": js_or(q_get("answerNepali"), ""),
+            "answerEnglish": js_or(q_get("answerEnglish"), ""),
+            "explanationNepali": js_or(q_get("explanationNepali"), ""),
+            "explanationEnglish": js_or(q_get("explanationEnglish"), ""),
+        }))
+    return js_object({
+        "groupName": js_or(g("groupName"), ""),
+        "groupNameEnglish": js_or(g("groupNameEnglish"), ""),
+        "groupInstruction": js_or(g("groupInstruction"), ""),
+        "groupInstructionEnglish": js_or(g("groupInstructionEnglish"), ""),
+        "marksSchema": js_or(g("marksSchema"), ""),
+        "marksSchemaEnglish": js_or(g("marksSchemaEnglish"), ""),
+        "questions": questions,
+    })
+
+
+def adapt_english(q, index):
+    g = partial(js_get, q)
+    question_number = g("questionNumber")
+    if isinstance(question_number, (int, float)) and not isinstance(question_number, bool):
+        number = question_number
+    else:
+        number = js_or(g("questionNumberEnglish"), js_parse_int(js_or(question_number, "0")))
+    return js_object(q, {
+        # Math.random() in the adapter; a stable fallback keeps bundles reproducible.
+        "id": js_or(js_str(question_number), js_str(g("questionNumberEnglish")), g("_id"), f"q{index}"),
+        "questionNumber": number,
+        "questionNumberNepali": js_or(g("questionNumberNepali"), question_number),
+        "questionNumberEnglish": js_or(g("questionNumberEnglish"), question_number),
+        "type": g("type"),
+        "title": js_or(g("title"), g("titleEnglish"), ""),
+        "titleNepali": js_or(g("titleNepali"), g("title"), ""),
+        "titleEnglish": js_or(g("titleEnglish"), g("title"), ""),
+        "marks": js_or(g("marksEnglish"), g("marks"), 0),
+        "marksNepali": js_or(g("marksNepali"), g("marks")),
+        "marksEnglish": js_or(g("marksEnglish"), g("marks")),
+        "passage": g("passage"),
+        "subQuestions": g("subQuestions"),
+        "subSections": g("subSections"),
+        "wordCount": g("wordCount"),
+        "clues": g("clues"),
+        "sampleAnswer": g("sampleAnswer"),
+        "gaps": g("gaps"),
+        "explanation": js_or(g("explanation"), g("explanationEnglish")),
+        "explanationNepali": g("explanationNepali"),
+        "explanationEnglish": js_or(g("explanationEnglish"), g("explanation")),
+    })
+
+
+def science_id(q, index):
+    g = partial(js_get, q)
+    question = js_get(q, "question")
+    return js_or(g("idEnglish"), g("id"), js_str(g("questionNumber")), g("questionId"), g("_id"), f"q{index}"), question
+
+
+def adapt_group_a(q, index):
+    g = partial(js_get, q)
+    question_id, question = science_id(q, index)
+    options = []
+    for opt in js_or(g("options"), []):
+        o = partial(js_get, opt)
+        options.append({
+            "id": js_or(o("idEnglish"), o("id"), ""),
+            "nepali": js_or(o("Nepali"), o("nepali"), ""),
+            "english": js_or(o("English"), o("english"), ""),
+        })
+    return js_object({
+        "id": question_id,
+        "nepali": js_or(g("questionNepali"), js_get(question, "nepali"), ""),
+        "english": js_or(g("questionEnglish"), js_get(question, "english"), ""),
+        "options": options,
+        "correctAnswer": js_or(g("correctAnswerEnglish"), g("correctAnswer"), ""),
+        "marks": js_or(g("marksEnglish"), g("marks"), 1),
+        "explanation": js_or(g("explanationEnglish"), g("explanation")),
+        "explanationNepali": g("explanationNepali"),
+    })
+
+
+def adapt_free_response(q, index):
+    g = partial(js_get, q)
+    question_id, question = science_id(q, index)
+    return js_object({
+        "id": question_id,
+        "nepali": js_or(g("questionNepali"), js_get(question, "nepali"), ""),
+        "english": js_or(g("questionEnglish"), js_get(question, "english"), ""),
+        "marks": js_or(g("marksEnglish"), g("marks"), 1),
+        "sampleAnswer": js_or(g("sampleAnswerEnglish"), g("sampleAnswer")),
+        "sampleAnswerNepali": g("sampleAnswerNepali"),
+        "sampleAnswerEnglish": js_or(g("sampleAnswerEnglish"), g("sampleAnswer")),
+        "explanation": js_or(g("explanationEnglish"), g("explanation")),
+        "explanationNepali": g("explanationNepali"),
+        "explanationEnglish": js_or(g("explanationEnglish"), g("explanation")),
+    })
+
+
+def adapt_database_questions(db_questions):
+    """Python port of adaptDatabaseQuestions() in lib/question-adapter.ts."""
+    adapted = {
+        "groupA": [],
+        "groupB": [],
+        "groupC": [],
+        "groupD": [],
+        "englishQuestions": [],
+        "socialStudiesGroups": [],
+        "nepaliQuestions": [],
+        "mathQuestions": [],
+    }
+
+    if isinstance(db_questions.get("mathQuestions"), list):
+        adapted["mathQuestions"] = db_questions["mathQuestions"]
+        return adapted
+
+    if isinstance(db_questions.get("nepaliQuestions"), list):
+        adapted["nepaliQuestions"] = [adapt_nepali(q) for q in db_questions["nepaliQuestions"]]
+        return adapted
+
+    if isinstance(db_questions.get("socialStudiesGroups"), list):
+        adapted["socialStudiesGroups"] = [adapt_social_group(group, i)
+                                          for i, group in enumerate(db_questions["socialStudiesGroups"])]
+        return adapted
+
+    if js_truthy(js_get(db_questions, "englishQuestions")):
+        adapted["englishQuestions"] = [adapt_english(q, i) for i, q in enumerate(db_questions["englishQuestions"])]
+
+    for group_key, questions in db_questions.items():
+        if group_key in ("englishQuestions", "socialStudiesGroups") or not isinstance(questions, list):
+            continue
+        for i, q in enumerate(questions):
+            if group_key in ("groupA", "A"):
+                adapted["groupA"].append(adapt_group_a(q, i))
+            else:
+                question = adapt_free_response(q, i)
+                target = {"groupB": "groupB", "B": "groupB", "groupC": "groupC", "C": "groupC",
+                          "groupD": "groupD", "D": "groupD"}.get(group_key)
+                if target:
+                    adapted[target].append(question)
+
+    return adapted
+
+
+def route_metadata(test_id):
+    # The stored questions document only has {testId, questions}, so the route
+    # always falls back to these defaults.
+    return {
+        "durationEnglish": 180,
+        "durationNepali": "१८०",
+        "titleEnglish": test_id,
+        "titleNepali": test_id,
+        "fullMarksEnglish": 75,
+    }
+
+
+# --- lib/answer-key.ts ------------------------------------------------------
+
+ANSWER_KEYS = {
+    "correctAnswer",
+    "correctAnswerNepali",
+    "correctAnswerEnglish",
+    "sampleAnswer",
+    "sampleAnswerNepali",
+    "sampleAnswerEnglish",
+    "answerNepali",
+    "answerEnglish",
+    "explanation",
+    "explanationNepali",
+    "explanationEnglish",
+}
+
+# Renderers that build the question itself from correctAnswer keep it inline.
+INLINE_ANSWER_TYPES = {"parts_of_speech", "note_taking"}
+
+
+def split_answer_key(questions):
+    """Port of splitAnswerKey(): returns (questions without answers, [[path, removed], ...])."""
+    answers = []
+
+    def visit(node, path):
+        if isinstance(node, list):
+            return [visit(item, path + [i]) for i, item in enumerate(node)]
+        if not isinstance(node, dict):
+            return node
+        inline = node.get("type") in INLINE_ANSWER_TYPES
+        kept, removed = {}, {}
+        for key, value in node.items():
+            if key in ANSWER_KEYS and not (inline and key.startswith("correctAnswer")):
+                removed[key] = value
+            else:
+                kept[key] = value
+        if removed:
+            answers.append([path, removed])
+        return {key: visit(value, path + [key]) for key, value in kept.items()}
+
+    return visit(questions, []), answers
+
+
+# --- Build ------------------------------------------------------------------
+
+def write_variants(out_dir, name, output):
+    """Write name.json plus precompressed variants. Returns True if anything changed."""
+    changed = corpus_io.write_bytes(os.path.join(out_dir, name + ".json"), output)
+    # mtime=0 keeps the gzip bytes reproducible.
+    changed |= corpus_io.write_bytes(os.path.join(out_dir, name + ".json.gz"),
+                                     gzip.compress(output, compresslevel=9, mtime=0))
+    if brotli is not None:
+        changed |= corpus_io.write_bytes(os.path.join(out_dir, name + ".json.br"), brotli.compress(output))
+    return changed
+
+
+def bundle_bodies(compiled, math_path=table_path):
+    """The /api/questions/[testId] and .../answers response bodies of a compiled test."""
+    questions, answers = split_answer_key(adapt_database_questions(compiled["questions"]))
+    body = {
+        "success": True,
+        "questions": questions,
+        "metadata": route_metadata(compiled["testId"]),
+        "answersDeferred": True,
+    }
+    answers_body = {"success": True, "answers": answers}
+    for part, tree in ((body, questions), (answers_body, answers)):
+        markup = markup_for(tree, math_path)
+        if markup:
+            part["math"] = markup
+    return body, answers_body
+
+
+def build_bundle(file_path, out_dir=None, math_path=table_path):
+    return write_bundle(load_test(file_path), out_dir, math_path)
+
+
+def write_bundle(compiled, out_dir=None, math_path=table_path):
+    out_dir = out_dir or bundle_dir
+    test_id = compiled["testId"]
+    body, answers_body = bundle_bodies(compiled, math_path)
+    output = corpus_io.dumps_compact(body)
+    answers_output = corpus_io.dumps_compact(answers_body)
+    os.makedirs(out_dir, exist_ok=True)
+    changed = write_variants(out_dir, test_id, output)
+    changed |= write_variants(out_dir, test_id + ".answers", answers_output)
+    return {
+        "changes": int(changed),
+        "testId": test_id,
+        "hash": content_hash(output)[:32],
+        "bytes": len(output),
+        "answersHash": content_hash(answers_output)[:32],
+        "answersBytes": len(answers_output),
+    }
+
+
+def write_index(report, out_dir):
+    tests = {}
+    for entry in report["files"]:
+        result = entry["result"]
+        if result:
+            tests[result["testId"]] = {key: result[key] for key in ("hash", "bytes", "answersHash", "answersBytes")}
+    corpus_io.write_json(os.path.join(out_dir, "index.json"), {
+        "encodings": ["gzip"] + (["br"] if brotli is not None else []),
+        "tests": tests,
+    })
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Build precompressed question bundles."))
+    parser.add_argument("--out", default=bundle_dir, help=f"output directory (default: {bundle_dir})")
+    parser.add_argument("--math", default=table_path, help=f"pre-rendered math table (default: {table_path})")
+    args = parser.parse_args(argv)
+
+    report = run_from_args(partial(build_bundle, out_dir=args.out, math_path=args.math), args, label="written")
+    if not args.files and not report["failedFiles"]:
+        write_index(report, args.out)
+    return 1 if report["failedFiles"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import argparse
+import os
+import sys
+
+import corpus_io
+from compile_corpus import load_test
+from corpus_runner import add_runner_args, run_from_args
+from corpus_text import normalize_text, parse_quantity, text_key
+from corpus_walk import iter_nodes
+
+# Deterministic grading spec for POST /api/grade (lib/grading-spec.ts).
+# Questions whose answer key settles an answer without judgement get a spec:
+#   - numeric: the reference answer is just a quantity ("Rs. 47,500",
+#     "6.16 m³", "५, -२"); the spec holds the expected values with a
+#     tolerance each, the expected units and whether order matters (ratios)
+#   - choice: multiple-choice questions; the normalised ids and texts of the
+#     correct option and of the other options
+# The grader checks an answer against the spec before anything else. An answer
+# it can settle (the right quantity, a plainly wrong one, a named option) is
+# graded in-process; anything else goes on to the answer index and the model.
+#
+# Specs are keyed like the answer index (corpus_text.text_key of each question
+# text). Math sub-questions are also keyed by the text the exam page sends:
+# "<context>\n\nPart (<label>): <question>", which is unique per test.
+#
+# build/grading-spec.json:
+# {
+#   "version": 2,
+#   "questions": {
+#     "<text key>": {"kind": "numeric", "expected": "Rs. 47,500", "values": [47500],
+#                    "tolerances": [0], "units": ["rs"], "ordered": true},
+#     "<text key>": {"kind": "choice", "expected": "ii", "correct": [...], "wrong": [...]}
+#   }
+# }
+#
+# Usage:
+#   python scripts/build_grading_spec.py
+
+SPEC_VERSION = 2
+
+spec_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build", "grading-spec.json"))
+
+QUESTION_TEXT_KEYS = ("questionEnglish", "questionNepali", "question", "english", "nepali")
+
+NUMERIC_ANSWER_KEYS = ("answerEnglish", "answerNepali", "correctAnswerEnglish", "correctAnswerNepali", "correctAnswer")
+CHOICE_ANSWER_KEYS = ("correctAnswerEnglish", "correctAnswerNepali", "correctAnswer")
+
+# Same fallback text the exam page uses for a math sub-question without its own text
+DEFAULT_SUB_QUESTION = "Solve the above problem."
+
+# Relative slack for rounded decimals (intermediate rounding, pi as 3.14 vs 22/7)
+RELATIVE_TOLERANCE = 0.001
+
+
+def tolerance(value, decimals):
+    if decimals == 0:
+        return 0
+    if decimals is None:
+        return round(abs(value) * RELATIVE_TOLERANCE, 12)
+    return round(max(0.5 * 10 ** -decimals, abs(value) * RELATIVE_TOLERANCE), 12)
+
+
+def numeric_spec(node):
+    """Spec from the node's reference answers, if the first one is a plain quantity."""
+    answers = [node[key] for key in NUMERIC_ANSWER_KEYS
+               if isinstance(node.get(key), (str, int, float)) and not isinstance(node.get(key), bool)]
+    if not answers:
+        return None
+    # The first answer (English where there is one) decides; the others must agree
+    # when they parse ("८ से.मि." doesn't, and is no reason to drop "8 cm")
+    quantities = [parse_quantity(answer) for answer in answers]
+    if quantities[0] is None:
+        return None
+    quantities = [quantity for quantity in quantities if quantity is not None]
+    values = [value for value, _ in quantities[0]["values"]]
+    if any([value for value, _ in quantity["values"]] != values for quantity in quantities[1:]):
+        return None
+    units = next((quantity["units"] for quantity in quantities if quantity["units"]), [])
+    return {
+        "kind": "numeric",
+        "expected": str(answers[0]),
+        "values": values,
+        "tolerances": [tolerance(value, decimals) for value, decimals in quantities[0]["values"]],
+        "units": units,
+        "ordered": ":" in str(answers[0]),
+    }
+
+
+def option_labels(option):
+    labels = {option.get(key) for key in ("idEnglish", "idNepali", "id", "English", "Nepali", "text")}
+    return {normalize_text(label) for label in labels if isinstance(label, str)} - {""}
+
+
+def choice_spec(node):
+    """Spec for a multiple-choice node with a known correct option."""
+    correct_ids = {node[key] for key in CHOICE_ANSWER_KEYS if isinstance(node.get(key), str)}
+    if not correct_ids or not isinstance(node.get("options"), list):
+        return None
+    correct, wrong = set(), set()
+    for option in node["options"]:
+        if not isinstance(option, dict):
+            continue
+        ids = {option.get(key) for key in ("idEnglish", "idNepali", "id")}
+        (correct if ids & correct_ids else wrong).update(option_labels(option))
+    if not correct:
+        return None
+    return {
+        "kind": "choice",
+        "expected": next(node[key] for key in CHOICE_ANSWER_KEYS if isinstance(node.get(key), str)),
+        "correct": sorted(correct),
+        "wrong": sorted(wrong - correct),
+    }
+
+
+def question_keys(node):
+    return {text_key(node[key]) for key in QUESTION_TEXT_KEYS
+            if isinstance(node.get(key), str) and normalize_text(node[key])}
+
+
+def spec_test(file_path):
+    """Specs for one test file. Returns {"changes": questions with a spec, "entries": [[key, spec], ...]}."""
+    return spec_compiled(load_test(file_path))
+
+
+def sub_questions(node):
+    """(sub-question, text the exam page sends for it) for each labelled part of a math problem."""
+    context = node.get("context")
+    if not (isinstance(context, dict) and isinstance(context.get("English"), str) and isinstance(node.get("sub_questions"), list)):
+        return []
+    return [(sub, f"{context['English']}\n\nPart ({sub['labelEnglish']}): {sub.get('questionEnglish') or DEFAULT_SUB_QUESTION}")
+            for sub in node["sub_questions"] if isinstance(sub, dict) and sub.get("labelEnglish")]
+
+
+def spec_compiled(compiled):
+    entries = []
+    specified = 0
+    for node, _ in iter_nodes(compiled["questions"]):
+        for sub, text in sub_questions(node):
+            spec = numeric_spec(sub)
+            if spec:
+                entries.append([text_key(text), spec])
+
+        spec = choice_spec(node) if "options" in node else numeric_spec(node)
+        if not spec:
+            continue
+        keys = question_keys(node)
+        entries.extend([key, spec] for key in sorted(keys))
+        specified += bool(keys)
+    return {"changes": specified, "entries": entries}
+
+
+def merge_entries(report):
+    """Combine all entries; a question text with conflicting specs is dropped."""
+    merged = {}
+    ambiguous = set()
+    for entry in report["files"]:
+        for key, spec in (entry["result"] or {}).get("entries") or []:
+            if key in merged and merged[key] != spec:
+                ambiguous.add(key)
+            merged.setdefault(key, spec)
+    for key in ambiguous:
+        del merged[key]
+    return dict(sorted(merged.items())), len(ambiguous)
+
+
+def write_spec(report, out_path):
+    """Merge the report's entries into the spec file. Returns (questions, ambiguous count)."""
+    questions, ambiguous = merge_entries(report)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    corpus_io.write_json(out_path, {"version": SPEC_VERSION, "questions": questions})
+    return questions, ambiguous
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Build the deterministic grading spec."))
+    parser.add_argument("--out", default=spec_path, help=f"output file (default: {spec_path})")
+    args = parser.parse_args(argv)
+
+    report = run_from_args(spec_test, args, label="questions")
+    if report["failedFiles"]:
+        return 1
+    questions, ambiguous = write_spec(report, args.out)
+    kinds = [spec["kind"] for spec in questions.values()]
+    print(f"Specified {len(questions)} question texts ({kinds.count('numeric')} numeric, "
+          f"{kinds.count('choice')} choice; {ambiguous} ambiguous dropped) -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import argparse
+import fnmatch
+import os
+import re
+import sys
+from functools import partial
+
+import corpus_io
+from build_bundles import brotli, bundle_bodies, write_variants
+from compile_corpus import load_test
+from corpus_cache import content_hash
+from corpus_runner import add_runner_args, run_from_args, subject_of
+from prerender_math import markup_for, table_path
+
+# Build offline exam packs for schools with poor connectivity
+# (public/sw.js installs them in the browser).
+# A pack is a manifest over content-addressed chunks. Every test's
+# /api/questions bodies (questions and answer key, as build_bundles.py
+# builds them) are cut into chunks bottom-up: any list element (a question,
+# a group, a passage) whose compact JSON is at least CHUNK_MIN_BYTES once its
+# own large children are chunks is replaced by {"$chunk": id}, and what is
+# left of the body is the test's root chunk. A chunk is
+# {"value": ..., "math": {key: html}} with the KaTeX markup of its own math,
+# and its id is the first 32 hex digits of its SHA-256, so a question shared
+# by several tests or packs is stored and downloaded once, and a rebuilt
+# bank only changes the chunks along the edited paths. Chunks are written as
+# chunks/<id>.json plus .json.gz (and .json.br with brotli) and served as
+# immutable by /api/offline/chunks/[chunk].
+#
+# Packs default to one per subject; --pack NAME=GLOB[,GLOB] defines others
+# (e.g. one per school). build/offline/packs/<name>.json:
+# {"version": 1, "pack", "hash", "tests": {testId: {"questions": id, "answers": id}},
+#  "catalog": [/api/tests entries], "chunks": [ids], "bytes"}
+# index.json lists every pack's hash, tests and size; when a pack's hash
+# moves, the service worker downloads only the chunks it doesn't have yet.
+# Chunks no manifest references any more are deleted.
+#
+# Usage:
+#   python scripts/build_offline_packs.py                 # a pack per subject -> build/offline/
+#   python scripts/build_offline_packs.py --pack school-a="see_2081_*,see_2080_science*"
+
+PACK_VERSION = 1
+
+CHUNK_MIN_BYTES = 512
+
+offline_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build", "offline"))
+
+pack_name_pattern = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+chunk_file_pattern = re.compile(r"^([0-9a-f]{32})\.json(\.gz|\.br)?$")
+
+
+# --- Chunking ---------------------------------------------------------------
+
+class Chunker:
+    """Cuts bodies into chunks, writing the ones not on disk yet."""
+
+    def __init__(self, chunk_dir, math_path):
+        self.chunk_dir = chunk_dir
+        self.math_path = math_path
+        self.chunks = {}  # id -> bytes
+        self.written = 0
+
+    def add(self, value):
+        chunk = {"value": value}
+        markup = markup_for(value, self.math_path)
+        if markup:
+            chunk["math"] = markup
+        output = corpus_io.dumps_compact(chunk)
+        chunk_id = content_hash(output)[:32]
+        if chunk_id not in self.chunks:
+            self.chunks[chunk_id] = len(output)
+            # Content-addressed: a file that exists already has these bytes
+            if not os.path.exists(os.path.join(self.chunk_dir, chunk_id + ".json")):
+                self.written += int(write_variants(self.chunk_dir, chunk_id, output))
+        return chunk_id
+
+    def reduce(self, value):
+        """value with its large list elements replaced by chunk references."""
+        if isinstance(value, dict):
+            return {key: self.reduce(item) for key, item in value.items()}
+        if isinstance(value, list):
+            reduced = []
+            for item in value:
+                item = self.reduce(item)
+                if isinstance(item, (dict, list)) and len(corpus_io.dumps_compact(item)) >= CHUNK_MIN_BYTES:
+                    item = {"$chunk": self.add(item)}
+                reduced.append(item)
+            return reduced
+        return value
+
+    def root(self, body):
+        """Chunk a response body; returns its root chunk id. Math rides on the chunks instead of body["math"]."""
+        body = dict(body)
+        body.pop("math", None)
+        return self.add(self.reduce(body))
+
+
+def catalog_entry(test_id, practice):
+    # The shape GET /api/tests returns (lib/test-catalog.ts)
+    return {
+        "id": test_id,
+        "title": practice.get("title"),
+        "titleNepali": practice.get("titleNepali"),
+        "titleEnglish": practice.get("titleEnglish") or practice.get("title"),
+        "subject": practice.get("subject"),
+        "year": practice.get("year"),
+        "totalMarks": practice.get("totalMarks"),
+        "duration": practice.get("duration"),
+        "sections": practice.get("sections"),
+        "isActive": practice.get("isActive") is not False,
+    }
+
+
+def pack_test(file_path, out_dir=None, math_path=table_path):
+    out_dir = out_dir or offline_dir
+    chunk_dir = os.path.join(out_dir, "chunks")
+    os.makedirs(chunk_dir, exist_ok=True)
+    compiled = load_test(file_path)
+    test_id = compiled["testId"]
+    body, answers_body = bundle_bodies(compiled, math_path)
+    chunker = Chunker(chunk_dir, math_path)
+    questions, answers = chunker.root(body), chunker.root(answers_body)
+    return {
+        "changes": chunker.written,
+        "testId": test_id,
+        "questions": questions,
+        "answers": answers,
+        "catalog": catalog_entry(test_id, compiled.get("practice") or {}),
+        "chunks": chunker.chunks,
+    }
+
+
+# --- Packs ------------------------------------------------------------------
+
+def parse_pack(spec):
+    name, _, globs = spec.partition("=")
+    name = name.strip()
+    if not pack_name_pattern.match(name) or not globs.strip():
+        raise argparse.ArgumentTypeError(f"expected NAME=GLOB[,GLOB] with a lowercase name, got {spec!r}")
+    return name, [pattern.strip() for pattern in globs.split(",") if pattern.strip()]
+
+
+def packs_of(file_path, packs):
+    """Names of the packs a test file belongs to: the --pack globs, else its subject."""
+    base = os.path.basename(file_path)
+    if packs:
+        return [name for name, patterns in packs if any(fnmatch.fnmatch(base, p) for p in patterns)]
+    subject = subject_of(file_path)
+    return [subject] if subject else []
+
+
+def build_manifest(name, results):
+    chunks = {}
+    for result in results:
+        chunks.update(result["chunks"])
+    manifest = {
+        "version": PACK_VERSION,
+        "pack": name,
+        "tests": {result["testId"]: {"questions": result["questions"], "answers": result["answers"]}
+                  for result in results},
+        "catalog": [result["catalog"] for result in results],
+        "chunks": sorted(chunks),
+        "bytes": sum(chunks.values()),
+    }
+    manifest["hash"] = content_hash(corpus_io.dumps_compact(manifest))[:32]
+    return manifest
+
+
+def load_manifests(pack_dir):
+    manifests = {}
+    for file_name in sorted(os.listdir(pack_dir)):
+        if file_name.endswith(".json"):
+            try:
+                manifest = corpus_io.load_json(os.path.join(pack_dir, file_name))
+            except ValueError:
+                continue
+            if manifest.get("version") == PACK_VERSION:
+                manifests[manifest["pack"]] = manifest
+    return manifests
+
+
+def prune_chunks(chunk_dir, referenced):
+    removed = 0
+    for file_name in os.listdir(chunk_dir):
+        match = chunk_file_pattern.match(file_name)
+        if match and match.group(1) not in referenced:
+            os.remove(os.path.join(chunk_dir, file_name))
+            removed += not match.group(2)
+    return removed
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Build offline exam packs."))
+    parser.add_argument("--out", default=offline_dir, help=f"output directory (default: {offline_dir})")
+    parser.add_argument("--math", default=table_path, help=f"pre-rendered math table (default: {table_path})")
+    parser.add_argument("--pack", action="append", type=parse_pack, default=[], metavar="NAME=GLOB[,GLOB]",
+                        help="a pack of the test files matching the globs (repeatable; default: a pack per subject)")
+    args = parser.parse_args(argv)
+
+    report = run_from_args(partial(pack_test, out_dir=args.out, math_path=args.math), args, label="chunks written")
+    if report["failedFiles"]:
+        return 1
+    if args.files:
+        # Packs describe whole sets of tests: only chunks are written for single files
+        return 0
+
+    grouped = {}
+    for entry in report["files"]:
+        for name in packs_of(entry["file"], args.pack):
+            grouped.setdefault(name, []).append(entry["result"])
+
+    pack_dir = os.path.join(args.out, "packs")
+    os.makedirs(pack_dir, exist_ok=True)
+    for name, results in sorted(grouped.items()):
+        manifest = build_manifest(name, sorted(results, key=lambda result: result["testId"]))
+        corpus_io.write_bytes(os.path.join(pack_dir, name + ".json"), corpus_io.dumps_compact(manifest))
+
+    # Packs built by earlier runs (other --pack sets, other subjects) are kept
+    manifests = load_manifests(pack_dir)
+    referenced = set()
+    for manifest in manifests.values():
+        referenced.update(manifest["chunks"])
+    removed = prune_chunks(os.path.join(args.out, "chunks"), referenced)
+
+    corpus_io.write_json(os.path.join(args.out, "index.json"), {
+        "version": PACK_VERSION,
+        "encodings": ["gzip"] + (["br"] if brotli is not None else []),
+        "packs": {name: {"hash": manifest["hash"], "tests": sorted(manifest["tests"]),
+                         "chunks": len(manifest["chunks"]), "bytes": manifest["bytes"]}
+                  for name, manifest in manifests.items()},
+    })
+    for name in sorted(grouped):
+        manifest = manifests[name]
+        print(f"📦 {name}: {len(manifest['tests'])} tests, {len(manifest['chunks'])} chunks, "
+              f"{manifest['bytes'] / 1e6:.2f} MB")
+    print(f"{len(referenced)} chunks referenced, {removed} unreferenced removed -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
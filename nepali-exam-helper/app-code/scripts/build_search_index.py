@@ -0,0 +1,209 @@
+import argparse
+import os
+import struct
+import sys
+from collections import Counter
+
+import corpus_io
+from compile_corpus import load_test
+from corpus_runner import add_runner_args, run_from_args
+from corpus_text import parse_citation, search_tokens
+from corpus_walk import iter_nodes
+
+# Full-text search index over every question bank, for GET /api/search
+# (lib/search-index.ts). One document per question (any node with a question,
+# explanation or passage text); math sub-questions carry their problem's
+# context. Text is tokenised in both languages with corpus_text.search_tokens
+# (Devanagari runs with postpositions stripped, light English stemming).
+# Facet terms come from the citations at the end of explanations
+# ("Citation: Chapter 3", "उद्धरण: अध्याय ४, पाठ २") and the test header:
+#   chapter:<n>  lesson:<n>  subject:<subject>  test:<testId>
+# so "chapter 3 pressure" is two posting-list intersections.
+#
+# build/search-index.bin is read in place, never parsed into objects; all
+# integers are little-endian u32 unless noted:
+#   header    "NSIX", version, doc count, term count, total doc length (tokens),
+#             then the offsets of the four sections below
+#   terms     term count x (string offset, string length, postings offset, document count),
+#             sorted by the terms' UTF-8 bytes for binary search
+#   strings   the terms' UTF-8 bytes
+#   postings  per term, (doc id delta, term frequency) pairs as unsigned LEB128 varints
+#   docs      doc count x (meta offset, meta length, doc length in tokens)
+#   meta      compact JSON per doc: {"testId", "subject", "path", "question", "questionNepali",
+#             "chapter", "lesson"} (question texts cut to SNIPPET_CHARS)
+#
+# Usage:
+#   python scripts/build_search_index.py
+
+INDEX_VERSION = 1
+MAGIC = b"NSIX"
+
+index_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build", "search-index.bin"))
+
+DOCUMENT_KEYS = ("questionEnglish", "questionNepali", "explanationEnglish", "explanationNepali",
+                 "passageEnglish", "passageNepali", "contentEnglish", "contentNepali")
+
+# Strings that are identifiers or numbering, not text anyone searches for
+SKIPPED_KEY_PREFIXES = ("id", "type", "marks", "label", "questionNumber", "question_number", "wordCount")
+
+SNIPPET_CHARS = 160
+
+HEADER = struct.Struct("<4s9I")
+TERM = struct.Struct("<4I")
+DOC = struct.Struct("<3I")
+
+
+def is_document(node):
+    return any(isinstance(node.get(key), str) and node[key].strip() for key in DOCUMENT_KEYS)
+
+
+def node_strings(node):
+    """The searchable strings of a node and of its children that aren't documents themselves."""
+    strings = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        children = []
+        for key, value in current.items():
+            if isinstance(value, str):
+                if not key.startswith(SKIPPED_KEY_PREFIXES):
+                    strings.append(value)
+            elif isinstance(value, dict):
+                children.append(value)
+            elif isinstance(value, list):
+                children.extend(item for item in value if isinstance(item, dict))
+        stack.extend(reversed([child for child in children if not is_document(child)]))
+    return strings
+
+
+def snippet(text):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= SNIPPET_CHARS else text[:SNIPPET_CHARS - 1].rstrip() + "…"
+
+
+def citation_of(node):
+    for key in ("explanationEnglish", "explanationNepali"):
+        if isinstance(node.get(key), str):
+            citation = parse_citation(node[key])
+            if citation:
+                return citation
+    return {}
+
+
+def index_test(file_path):
+    """Search documents for one test file. Returns {"changes": document count, "docs": [...]}."""
+    return index_compiled(load_test(file_path))
+
+
+def index_compiled(compiled):
+    test_id = compiled["testId"]
+    subject = compiled["practice"].get("subject") or compiled["layout"]
+
+    # Math problems: each sub-question is searched together with the problem it belongs to
+    contexts = {}
+    docs = []
+    for node, path in iter_nodes(compiled["questions"]):
+        context = node.get("context")
+        if isinstance(context, dict) and isinstance(node.get("sub_questions"), list):
+            strings = [value for value in context.values() if isinstance(value, str)]
+            for sub in node["sub_questions"]:
+                if isinstance(sub, dict):
+                    contexts[id(sub)] = strings
+        if not is_document(node):
+            continue
+
+        strings = node_strings(node) + contexts.get(id(node), [])
+        terms = Counter(token for text in strings for token in search_tokens(text))
+        citation = citation_of(node)
+        length = sum(terms.values())
+        for facet in (f"subject:{subject}", f"test:{test_id}", f"chapter:{citation.get('chapter', '')}",
+                      f"lesson:{citation.get('lesson', '')}"):
+            if not facet.endswith(":"):
+                terms[facet] = 1
+        docs.append({
+            "meta": {
+                "testId": test_id,
+                "subject": subject,
+                "path": list(path),
+                "question": snippet(node.get("questionEnglish") or node.get("titleEnglish")
+                                    or node.get("passageEnglish") or node.get("contentEnglish")),
+                "questionNepali": snippet(node.get("questionNepali") or node.get("titleNepali")
+                                          or node.get("passageNepali") or node.get("contentNepali")),
+                "chapter": citation.get("chapter"),
+                "lesson": citation.get("lesson"),
+            },
+            "terms": dict(terms),
+            "length": length,
+        })
+    return {"changes": len(docs), "docs": docs}
+
+
+def varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_index(docs):
+    """The binary index for a list of documents (see the format above)."""
+    postings = {}
+    for doc_id, doc in enumerate(docs):
+        for term, frequency in doc["terms"].items():
+            postings.setdefault(term, []).append((doc_id, frequency))
+
+    terms = sorted(postings, key=lambda term: term.encode("utf-8"))
+    term_table = bytearray()
+    strings = bytearray()
+    posting_bytes = bytearray()
+    for term in terms:
+        encoded = term.encode("utf-8")
+        term_table += TERM.pack(len(strings), len(encoded), len(posting_bytes), len(postings[term]))
+        strings += encoded
+        previous = 0
+        for doc_id, frequency in postings[term]:
+            varint(doc_id - previous, posting_bytes)
+            varint(frequency, posting_bytes)
+            previous = doc_id
+
+    doc_table = bytearray()
+    meta = bytearray()
+    for doc in docs:
+        encoded = corpus_io.dumps_compact(doc["meta"])
+        doc_table += DOC.pack(len(meta), len(encoded), doc["length"])
+        meta += encoded
+
+    terms_offset = HEADER.size
+    strings_offset = terms_offset + len(term_table)
+    postings_offset = strings_offset + len(strings)
+    docs_offset = postings_offset + len(posting_bytes)
+    meta_offset = docs_offset + len(doc_table)
+    header = HEADER.pack(MAGIC, INDEX_VERSION, len(docs), len(terms), sum(doc["length"] for doc in docs),
+                         terms_offset, strings_offset, postings_offset, docs_offset, meta_offset)
+    return bytes(header + term_table + strings + posting_bytes + doc_table + meta), len(terms)
+
+
+def write_index(report, out_path):
+    """Encode every document of the report into the index file. Returns (docs, term count, bytes)."""
+    docs = [doc for entry in report["files"] for doc in (entry["result"] or {}).get("docs") or []]
+    output, term_count = encode_index(docs)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    corpus_io.write_bytes(out_path, output)
+    return docs, term_count, output
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Build the full-text search index."))
+    parser.add_argument("--out", default=index_path, help=f"output file (default: {index_path})")
+    args = parser.parse_args(argv)
+
+    report = run_from_args(index_test, args, label="documents")
+    if report["failedFiles"]:
+        return 1
+    docs, term_count, output = write_index(report, args.out)
+    print(f"Indexed {len(docs)} documents, {term_count} terms ({len(output) / 1024:.0f} KB) -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+import argparse
+import os
+import re
+import sys
+from functools import partial
+
+import corpus_binary
+import corpus_io
+import corpus_profile
+from corpus_cache import content_hash
+from corpus_runner import add_runner_args, run_from_args
+
+# Schema-normalising compiler for the data/ question banks.
+# The banks come in five layouts (science groupA..D, English/Nepali question
+# arrays, social `groups`, math `sub_questions`, and single-object files whose
+# header also carries the questions). compile_test() turns any of them into one
+# canonical, versioned document; the CLI writes one artifact per test to
+# build/corpus/<testId>.json plus an index.json, so nothing downstream has to
+# sniff the layout again.
+#
+# Canonical document (schemaVersion 1):
+# {
+#   "schemaVersion": 1,
+#   "testId": "see_2081_science_practice_1_generated",
+#   "sourceFile": "see_2081_science_practice_1_generated.json",
+#   "layout": "science" | "english" | "nepali" | "mathematics" | "social_studies",
+#   "questionCount": 40,
+#   "practice": {...practice_tests document...},
+#   "questions": {"groupA": [...], ...} | {"englishQuestions": [...]} | {"nepaliQuestions": [...]}
+#                | {"mathQuestions": [...]} | {"socialStudiesGroups": [...]}
+# }
+#
+# Usage:
+#   python scripts/compile_corpus.py                  # compile every test in data/
+#   python scripts/compile_corpus.py --check          # validate only
+
+SCHEMA_VERSION = 1
+
+build_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build", "corpus"))
+
+GROUP_KEYS = ("groupA", "groupB", "groupC", "groupD")
+
+LAYOUT_KEYS = {
+    "science": GROUP_KEYS,
+    "english": ("englishQuestions",),
+    "nepali": ("nepaliQuestions",),
+    "mathematics": ("mathQuestions",),
+    "social_studies": ("socialStudiesGroups",),
+}
+
+
+class CompileError(Exception):
+    """Raised when a test file can't be normalised; carries every problem found."""
+
+    def __init__(self, file_name, errors):
+        self.file_name = file_name
+        self.errors = errors
+        super().__init__(f"{file_name}: " + "; ".join(errors))
+
+
+def normalize_extended_json(value):
+    # {"$oid": "..."} -> "..."; {"$date": ...} is left for the Mongo import.
+    if isinstance(value, list):
+        return [normalize_extended_json(item) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1 and "$oid" in value:
+            return str(value["$oid"])
+        return {key: normalize_extended_json(item) for key, item in value.items()}
+    return value
+
+
+year_pattern = re.compile(r"\d{4}")
+
+
+def normalize_practice(header):
+    """Build the practice_tests document from either header format."""
+    practice = dict(header)
+    practice.pop("questions", None)
+    if not (header.get("title") and header.get("subject")):
+        title = header.get("titleEnglish") or header.get("titleNepali")
+        subject = (header.get("subjectEnglish") or "").lower()
+        practice["title"] = title
+        practice["titleNepali"] = header.get("titleNepali") or header.get("titleEnglish")
+        practice["titleEnglish"] = header.get("titleEnglish") or header.get("titleNepali")
+        practice["subject"] = "mathematics" if "math" in subject or not subject else subject
+        practice["totalMarks"] = header.get("totalMarksEnglish") or header.get("totalMarks") or 75
+        practice["duration"] = header.get("durationEnglish") or header.get("duration") or 180
+        match = year_pattern.search(title or "")
+        practice["year"] = int(match.group(0)) if match else 2081
+        practice["isActive"] = True
+    return practice
+
+
+def find_header(docs):
+    for doc in docs:
+        if isinstance(doc.get("_id"), str) and doc.get("title") and doc.get("subject"):
+            return doc
+    for doc in docs:
+        if (isinstance(doc.get("_id"), str)
+                and (doc.get("titleEnglish") or doc.get("titleNepali"))
+                and (doc.get("subjectEnglish") or doc.get("subjectNepali"))):
+            return doc
+    return None
+
+
+def find_questions_doc(docs, header):
+    for doc in docs:
+        questions = doc.get("questions")
+        if not doc.get("testId") or not questions:
+            continue
+        if isinstance(questions, list) or (isinstance(questions, dict) and any(k in questions for k in GROUP_KEYS)):
+            return doc
+    for doc in docs:
+        if doc.get("testId") and isinstance(doc.get("groups"), list):
+            return doc
+    for doc in docs:
+        if doc.get("testId") and isinstance(doc.get("questions"), dict):
+            return doc
+    # Single-object format: the header itself carries the questions.
+    if header is not None and isinstance(header.get("questions"), list) and header["questions"]:
+        return {"testId": header["_id"], "questions": header["questions"]}
+    return None
+
+
+def is_math_question(question):
+    context = question.get("context")
+    return bool(question.get("sub_questions")) or (
+        isinstance(context, dict) and bool(context.get("Nepali") or context.get("English")))
+
+
+def classify(questions_doc, subject):
+    """Return (layout, questions) in the shape the app adapter expects."""
+    questions = questions_doc.get("questions")
+    if isinstance(questions, list):
+        if subject == "nepali":
+            return "nepali", {"nepaliQuestions": questions}
+        if subject == "mathematics" or (questions and is_math_question(questions[0])):
+            return "mathematics", {"mathQuestions": questions}
+        return "english", {"englishQuestions": questions}
+    if isinstance(questions, dict):
+        for layout, keys in LAYOUT_KEYS.items():
+            if any(key in questions for key in keys):
+                return layout, questions
+        return None, questions
+    if isinstance(questions_doc.get("groups"), list):
+        return "social_studies", {"socialStudiesGroups": questions_doc["groups"]}
+    return None, None
+
+
+def count_questions(layout, questions):
+    if layout == "science":
+        return sum(len(questions.get(key) or []) for key in GROUP_KEYS)
+    if layout == "mathematics":
+        return sum(len(q.get("sub_questions") or []) or 1 for q in questions["mathQuestions"])
+    if layout == "social_studies":
+        return sum(len(group.get("questions") or []) for group in questions["socialStudiesGroups"])
+    return len(questions[LAYOUT_KEYS[layout][0]])
+
+
+def validate(layout, questions):
+    errors = []
+
+    def require(question, where, *keys):
+        for key in keys:
+            if key not in question:
+                errors.append(f"{where}: missing {key}")
+
+    if layout == "science":
+        for group in GROUP_KEYS:
+            for i, q in enumerate(questions.get(group) or []):
+                where = f"{group}[{i}]"
+                require(q, where, "questionNepali", "questionEnglish")
+                if group == "groupA":
+                    require(q, where, "options")
+                    if "correctAnswerEnglish" not in q and "correctAnswer" not in q:
+                        errors.append(f"{where}: missing correctAnswerEnglish")
+    elif layout == "mathematics":
+        for i, q in enumerate(questions["mathQuestions"]):
+            for j, sub in enumerate(q.get("sub_questions") or []):
+                require(sub, f"mathQuestions[{i}].sub_questions[{j}]", "questionNepali", "questionEnglish")
+    elif layout == "social_studies":
+        for i, group in enumerate(questions["socialStudiesGroups"]):
+            for j, q in enumerate(group.get("questions") or []):
+                require(q, f"socialStudiesGroups[{i}].questions[{j}]", "type", "questionNepali")
+    else:
+        for i, q in enumerate(questions[LAYOUT_KEYS[layout][0]]):
+            require(q, f"{LAYOUT_KEYS[layout][0]}[{i}]", "type")
+    return errors
+
+
+def compile_test(data, file_name):
+    """Normalise one parsed test file into the canonical document."""
+    docs = data if isinstance(data, list) else [data]
+    docs = [normalize_extended_json(doc) for doc in docs if isinstance(doc, dict)]
+
+    # Old math format: one object with exam_metadata + questions.
+    if isinstance(data, dict) and isinstance(data.get("exam_metadata"), dict) and isinstance(data.get("questions"), list):
+        title = data["exam_metadata"].get("title") or ""
+        test_id = re.sub(r"^_|_$", "", re.sub(r"[^a-z0-9]+", "_", title.lower()))
+        match = year_pattern.search(title)
+        header = {"_id": test_id, "title": title, "subject": "mathematics",
+                  "year": int(match.group(0)) if match else 2081,
+                  "totalMarks": data["exam_metadata"].get("totalMarks") or 75,
+                  "duration": data["exam_metadata"].get("duration") or 180, "isActive": True}
+        docs = [header, {"testId": test_id, "questions": data["questions"]}]
+
+    header = find_header(docs)
+    if header is None:
+        raise CompileError(file_name, ["missing practice_tests document with string _id"])
+
+    practice = normalize_practice(header)
+    questions_doc = find_questions_doc(docs, header)
+    if questions_doc is None:
+        raise CompileError(file_name, ["missing questions document"])
+
+    layout, questions = classify(questions_doc, practice.get("subject"))
+    if layout is None:
+        keys = ", ".join(questions) if isinstance(questions, dict) else "none"
+        raise CompileError(file_name, [f"unknown question layout (keys: {keys})"])
+
+    errors = validate(layout, questions)
+    if errors:
+        raise CompileError(file_name, errors)
+
+    return {
+        "schemaVersion": SCHEMA_VERSION,
+        "testId": practice["_id"],
+        "sourceFile": file_name,
+        "layout": layout,
+        "questionCount": count_questions(layout, questions),
+        "practice": practice,
+        "questions": questions,
+    }
+
+
+def load_test(file_path):
+    """Parse and compile one data/ file: the shared loader of every script that reads the banks.
+
+    A file that build/corpus.bin was built from, and that hasn't changed since,
+    is decoded from there instead (scripts/corpus_binary.py).
+    """
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    file_name = os.path.basename(file_path)
+    with corpus_profile.timed("parse"):
+        compiled = corpus_binary.current_test(file_name, raw)
+    return compiled if compiled is not None else parse_test(raw, file_name)
+
+
+def parse_test(raw, file_name):
+    """Parse and compile the bytes of one data/ file."""
+    data = corpus_io.loads(raw)
+    with corpus_profile.timed("compile"):
+        return compile_test(data, file_name)
+
+
+def compile_file(file_path, out_dir=None, check=False):
+    """Compile one data/ file. Returns a summary dict for the batch report."""
+    return write_compiled(load_test(file_path), out_dir, check)
+
+
+def write_compiled(compiled, out_dir=None, check=False):
+    """Write one compiled test's artifact. Returns compile_file()'s summary dict."""
+    output = corpus_io.dumps(compiled)
+    written = False
+    if not check:
+        os.makedirs(out_dir or build_dir, exist_ok=True)
+        written = corpus_io.write_bytes(os.path.join(out_dir or build_dir, compiled["testId"] + ".json"), output)
+    return {
+        "changes": int(written),
+        "testId": compiled["testId"],
+        "layout": compiled["layout"],
+        "questionCount": compiled["questionCount"],
+        "hash": content_hash(output),
+    }
+
+
+def load_compiled(file_path):
+    compiled = corpus_io.load_json(file_path)
+    if compiled.get("schemaVersion") != SCHEMA_VERSION:
+        raise CompileError(os.path.basename(file_path),
+                           [f"schemaVersion {compiled.get('schemaVersion')} != {SCHEMA_VERSION}; recompile"])
+    return compiled
+
+
+def write_index(report, out_dir):
+    tests = {}
+    for entry in report["files"]:
+        result = entry["result"]
+        if result:
+            tests[result["testId"]] = {
+                "file": result["testId"] + ".json",
+                "sourceFile": entry["file"],
+                "layout": result["layout"],
+                "questionCount": result["questionCount"],
+                "hash": result["hash"],
+            }
+    # Drop artifacts of tests that no longer exist in data/.
+    for name in os.listdir(out_dir):
+        if name.endswith(".json") and name != "index.json" and name[:-len(".json")] not in tests:
+            os.remove(os.path.join(out_dir, name))
+    corpus_io.write_json(os.path.join(out_dir, "index.json"), {"schemaVersion": SCHEMA_VERSION, "tests": tests})
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Compile data/ test files to the canonical schema."))
+    parser.add_argument("--out", default=build_dir, help=f"output directory (default: {build_dir})")
+    parser.add_argument("--check", action="store_true", help="validate only, write nothing")
+    args = parser.parse_args(argv)
+
+    report = run_from_args(partial(compile_file, out_dir=args.out, check=args.check), args, label="written")
+    if not args.check and not args.files and not report["failedFiles"]:
+        write_index(report, args.out)
+    return 1 if report["failedFiles"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,547 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections.abc import Mapping, Sequence
+
+import compile_corpus
+import corpus_io
+from corpus_cache import content_hash, source_hash
+from corpus_runner import add_runner_args, files_from_args, run_from_args
+
+# Compact binary form of the compiled corpus, read through mmap.
+# The banks repeat the same keys, option ids, instructions and marks schemas
+# in every question; here every distinct string is stored once in a string
+# pool and every distinct key set (a dict "shape") once in a shape table, so a
+# dict is a shape id plus its values. Lists and dicts carry their byte length,
+# so a reader can step over one without decoding it.
+#
+# CorpusReader is the whole pool as a mapping of test id -> lazy view: opening
+# the file reads only the header and the test table, and a MappedDict /
+# MappedList decodes a member only when it is read (and keeps it). Strings and
+# shapes are decoded on first use and shared by every view, so what has been
+# read holds each distinct string once. reader.test(testId) decodes a whole
+# test into plain dicts and lists.
+#
+# compile_corpus.load_test(), the loader every corpus script shares, reads a
+# data/ file from here when the file still has the content it was built from
+# (same source hash, same compile_corpus.py); anything else is parsed and
+# compiled from the JSON as before.
+#
+# build/corpus.bin (little-endian, offsets absolute):
+#   header        "SEEC", format version, schemaVersion, string/shape/test
+#                 counts, the offsets of the three tables below and the
+#                 compiler key (string id of the compile_corpus.py hash)
+#   strings       u32 offsets[count + 1], then the UTF-8 bytes
+#   shapes        u32 offsets[count + 1], then varint key string ids per shape
+#   tests         per test, sorted by id: u32 id, source file and source
+#                 sha256 string ids, record offset
+#   records       per test: the compiled document
+# Values are a tag byte and a payload: varints for ints and string ids,
+# count (or shape id) and byte length before the items of a list (or dict).
+#
+# Usage:
+#   python scripts/corpus_binary.py                          # data/ -> build/corpus.bin
+#   python scripts/corpus_binary.py --get see_2081_math_practice_1_final_verified:3
+
+FORMAT_VERSION = 2
+
+MAGIC = b"SEEC"
+
+binary_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build", "corpus.bin"))
+
+# A built file is only read while the compiler that produced it is unchanged
+COMPILER_KEY = source_hash(compile_corpus.__file__)
+
+HEADER = struct.Struct("<4sIIIIIIIII")
+TEST_ENTRY = struct.Struct("<IIII")
+U32 = struct.Struct("<I")
+U32_PAIR = struct.Struct("<II")
+FLOAT = struct.Struct("<d")
+
+NULL, FALSE, TRUE, INT, NEG_INT, FLOAT_TAG, STR, LIST, DICT = range(9)
+
+_UNREAD = object()
+
+
+def put_varint(out, n):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def read_varint(buf, pos):
+    byte = buf[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    n, shift = 0, 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+# --- Writing ----------------------------------------------------------------
+
+class CorpusWriter:
+    def __init__(self):
+        self.strings = {}  # str -> id
+        self.shapes = {}   # tuple of key string ids -> id
+
+    def string(self, value):
+        string_id = self.strings.get(value)
+        if string_id is None:
+            string_id = self.strings[value] = len(self.strings)
+        return string_id
+
+    def encode(self, value, out):
+        if value is None:
+            out.append(NULL)
+        elif value is True:
+            out.append(TRUE)
+        elif value is False:
+            out.append(FALSE)
+        elif isinstance(value, str):
+            out.append(STR)
+            put_varint(out, self.string(value))
+        elif isinstance(value, int):
+            out.append(INT if value >= 0 else NEG_INT)
+            put_varint(out, value if value >= 0 else -value - 1)
+        elif isinstance(value, float):
+            out.append(FLOAT_TAG)
+            out += FLOAT.pack(value)
+        elif isinstance(value, list):
+            body = bytearray()
+            for item in value:
+                self.encode(item, body)
+            out.append(LIST)
+            put_varint(out, len(value))
+            put_varint(out, len(body))
+            out += body
+        elif isinstance(value, dict):
+            shape = tuple(self.string(key) for key in value)
+            shape_id = self.shapes.get(shape)
+            if shape_id is None:
+                shape_id = self.shapes[shape] = len(self.shapes)
+            body = bytearray()
+            for item in value.values():
+                self.encode(item, body)
+            out.append(DICT)
+            put_varint(out, shape_id)
+            put_varint(out, len(body))
+            out += body
+        else:
+            raise TypeError(f"can't encode {type(value).__name__}")
+
+    def build(self, tests):
+        """The corpus.bin bytes for [(compiled test, sha256 of its source file)]."""
+        tests = sorted(tests, key=lambda test: test[0]["testId"])
+        records = bytearray()
+        entries = []
+        for compiled, digest in tests:
+            entries.append((self.string(compiled["testId"]), self.string(compiled["sourceFile"]),
+                            self.string(digest), len(records)))
+            self.encode(compiled, records)
+        compiler_key = self.string(COMPILER_KEY)
+
+        def table(blobs, at):
+            offsets, data = bytearray(), bytearray()
+            start = at + U32.size * (len(blobs) + 1)
+            for blob in blobs:
+                offsets += U32.pack(start + len(data))
+                data += blob
+            offsets += U32.pack(start + len(data))
+            return offsets + data
+
+        strings_at = HEADER.size
+        strings = table([value.encode("utf-8") for value in self.strings], strings_at)
+        shapes_at = strings_at + len(strings)
+        shape_blobs = []
+        for shape in self.shapes:
+            blob = bytearray()
+            for key_id in shape:
+                put_varint(blob, key_id)
+            shape_blobs.append(bytes(blob))
+        shapes = table(shape_blobs, shapes_at)
+        tests_at = shapes_at + len(shapes)
+        records_at = tests_at + TEST_ENTRY.size * len(entries)
+
+        output = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, compile_corpus.SCHEMA_VERSION, len(self.strings),
+                                       len(self.shapes), len(entries), strings_at, shapes_at, tests_at,
+                                       compiler_key))
+        output += strings + shapes
+        for test_id, source_file, digest, record_at in entries:
+            output += TEST_ENTRY.pack(test_id, source_file, digest, records_at + record_at)
+        output += records
+        return bytes(output)
+
+
+# --- Reading ----------------------------------------------------------------
+
+class MappedList(Sequence):
+    """A list in the mapped file; an item is decoded when it is first read."""
+
+    __slots__ = ("_reader", "_at", "_start", "_count", "_offsets", "_items")
+
+    def __init__(self, reader, at, start, count):
+        self._reader = reader
+        self._at = at
+        self._start = start
+        self._count = count
+        self._offsets = None
+        self._items = None
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("list index out of range")
+        if self._items is None:
+            self._offsets = self._reader._offsets(self._start, self._count)
+            self._items = [_UNREAD] * self._count
+        item = self._items[index]
+        if item is _UNREAD:
+            item = self._items[index] = self._reader._value(self._offsets[index])
+        return item
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, MappedList)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<MappedList of {self._count}>"
+
+    def decode(self):
+        """The whole list as plain lists and dicts."""
+        return self._reader._decode_at(self._at)
+
+
+class MappedDict(Mapping):
+    """A dict in the mapped file; a value is decoded when it is first read."""
+
+    __slots__ = ("_reader", "_at", "_start", "_shape_id", "_offsets", "_values")
+
+    def __init__(self, reader, at, start, shape_id):
+        self._reader = reader
+        self._at = at
+        self._start = start
+        self._shape_id = shape_id
+        self._offsets = None
+        self._values = None
+
+    def __len__(self):
+        return len(self._reader._shape(self._shape_id))
+
+    def __iter__(self):
+        return iter(self._reader._shape(self._shape_id))
+
+    def __contains__(self, key):
+        return key in self._reader._shape_index(self._shape_id)
+
+    def __getitem__(self, key):
+        index = self._reader._shape_index(self._shape_id)[key]
+        if self._values is None:
+            self._offsets = self._reader._offsets(self._start, len(self))
+            self._values = [_UNREAD] * len(self)
+        value = self._values[index]
+        if value is _UNREAD:
+            value = self._values[index] = self._reader._value(self._offsets[index])
+        return value
+
+    def __repr__(self):
+        return f"<MappedDict {list(self)}>"
+
+    def decode(self):
+        """The whole dict as plain dicts and lists."""
+        return self._reader._decode_at(self._at)
+
+
+def plain(value):
+    """A value read from a view, with any MappedDict / MappedList decoded."""
+    return value.decode() if isinstance(value, (MappedDict, MappedList)) else value
+
+
+class CorpusReader(Mapping):
+    """The tests of build/corpus.bin by id, as lazy views of their compiled documents."""
+
+    def __init__(self, path=binary_path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, schema_version, string_count, shape_count, test_count,
+         self._strings_at, self._shapes_at, tests_at, compiler_key) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or schema_version != compile_corpus.SCHEMA_VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: not a version {FORMAT_VERSION} corpus "
+                             f"(schemaVersion {compile_corpus.SCHEMA_VERSION}); "
+                             f"rebuild it with python scripts/corpus_binary.py")
+        self._strings = [None] * string_count
+        self._shapes = [None] * shape_count
+        self._shape_indexes = [None] * shape_count
+        self._tests = {}
+        self._sources = {}
+        for index in range(test_count):
+            test_id, source_file, digest, record_at = TEST_ENTRY.unpack_from(
+                self._map, tests_at + TEST_ENTRY.size * index)
+            self._tests[self._string(test_id)] = record_at
+            self._sources[self._string(source_file)] = (self._string(digest), self._string(test_id))
+        self.compiler_key = self._string(compiler_key)
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def test_ids(self):
+        return list(self._tests)
+
+    def __iter__(self):
+        return iter(self._tests)
+
+    def __len__(self):
+        return len(self._tests)
+
+    def __contains__(self, test_id):
+        return test_id in self._tests
+
+    def __getitem__(self, test_id):
+        """A lazy view (MappedDict) of the test's compiled document."""
+        try:
+            return self._value(self._tests[test_id])
+        except KeyError:
+            raise KeyError(f"no test {test_id!r} in the corpus") from None
+
+    def _string(self, string_id):
+        value = self._strings[string_id]
+        if value is None:
+            start, end = U32_PAIR.unpack_from(self._map, self._strings_at + U32.size * string_id)
+            value = self._strings[string_id] = self._map[start:end].decode("utf-8")
+        return value
+
+    def _shape(self, shape_id):
+        shape = self._shapes[shape_id]
+        if shape is None:
+            start, end = U32_PAIR.unpack_from(self._map, self._shapes_at + U32.size * shape_id)
+            blob = self._map[start:end]
+            keys, pos = [], 0
+            while pos < len(blob):
+                key_id, pos = read_varint(blob, pos)
+                keys.append(self._string(key_id))
+            shape = self._shapes[shape_id] = tuple(keys)
+        return shape
+
+    def _shape_index(self, shape_id):
+        index = self._shape_indexes[shape_id]
+        if index is None:
+            index = self._shape_indexes[shape_id] = {key: i for i, key in enumerate(self._shape(shape_id))}
+        return index
+
+    def _offsets(self, pos, count):
+        """Offsets of `count` consecutive values from pos, stepping over (not decoding) each."""
+        buf = self._map
+        offsets = [0] * count
+        for index in range(count):
+            offsets[index] = pos
+            tag = buf[pos]
+            pos += 1
+            if tag == STR or tag == INT or tag == NEG_INT:
+                pos = read_varint(buf, pos)[1]
+            elif tag == DICT or tag == LIST:
+                pos = read_varint(buf, pos)[1]
+                size, pos = read_varint(buf, pos)
+                pos += size
+            elif tag == FLOAT_TAG:
+                pos += FLOAT.size
+        return offsets
+
+    def _value(self, pos):
+        """The value at pos: a view for a dict or list, else the decoded scalar."""
+        tag = self._map[pos]
+        if tag == DICT:
+            shape_id, start = read_varint(self._map, pos + 1)
+            return MappedDict(self, pos, read_varint(self._map, start)[1], shape_id)
+        if tag == LIST:
+            count, start = read_varint(self._map, pos + 1)
+            return MappedList(self, pos, read_varint(self._map, start)[1], count)
+        return self._decode(self._map, pos)[0]
+
+    def _decode_at(self, pos):
+        """The value at pos as plain dicts and lists; containers are copied out of the map in one read."""
+        tag = self._map[pos]
+        if tag != DICT and tag != LIST:
+            return self._decode(self._map, pos)[0]
+        size, start = read_varint(self._map, read_varint(self._map, pos + 1)[1])
+        return self._decode(self._map[pos:start + size], 0)[0]
+
+    def _decode(self, buf, pos):
+        """(value, next position) of the value at pos in buf, as plain dicts and lists."""
+        tag = buf[pos]
+        pos += 1
+        if tag == STR:
+            string_id, pos = read_varint(buf, pos)
+            value = self._strings[string_id]
+            return (self._string(string_id) if value is None else value), pos
+        if tag == DICT:
+            shape_id, pos = read_varint(buf, pos)
+            pos = read_varint(buf, pos)[1]
+            value = {}
+            for key in self._shape(shape_id):
+                value[key], pos = self._decode(buf, pos)
+            return value, pos
+        if tag == LIST:
+            count, pos = read_varint(buf, pos)
+            pos = read_varint(buf, pos)[1]
+            value = [None] * count
+            for index in range(count):
+                value[index], pos = self._decode(buf, pos)
+            return value, pos
+        if tag == INT:
+            return read_varint(buf, pos)
+        if tag == NEG_INT:
+            n, pos = read_varint(buf, pos)
+            return -n - 1, pos
+        if tag == FLOAT_TAG:
+            return FLOAT.unpack_from(buf, pos)[0], pos + FLOAT.size
+        if tag == NULL:
+            return None, pos
+        if tag == TRUE:
+            return True, pos
+        if tag == FALSE:
+            return False, pos
+        raise ValueError(f"corrupt corpus: tag {tag} at {pos - 1}")
+
+    def header(self, test_id):
+        """The compiled document of a test without its questions."""
+        view = self[test_id]
+        return {key: plain(view[key]) for key in view if key != "questions"}
+
+    def question_count(self, test_id):
+        return sum(len(value) if isinstance(value, MappedList) else 1
+                   for value in self[test_id]["questions"].values())
+
+    def question(self, test_id, index):
+        """Item `index` of the test's question lists, in order (a group for social studies)."""
+        position = index
+        for value in self[test_id]["questions"].values():
+            items = value if isinstance(value, MappedList) else [value]
+            if 0 <= position < len(items):
+                return plain(items[position])
+            position -= len(items)
+        raise IndexError(f"{test_id} has no question {index}")
+
+    def test(self, test_id):
+        """The full compiled document, equal to compile_corpus.load_test() of its file."""
+        try:
+            return self._decode_at(self._tests[test_id])
+        except KeyError:
+            raise KeyError(f"no test {test_id!r} in the corpus") from None
+
+    def source_test(self, file_name, digest):
+        """test() of the data/ file the corpus was built from, if its sha256 is still digest; else None."""
+        built = self._sources.get(file_name)
+        if built is None or built[0] != digest:
+            return None
+        return self.test(built[1])
+
+    def iter_tests(self):
+        for test_id in self._tests:
+            yield self.test(test_id)
+
+
+# Readers kept open per process by current_test(), with the stat they were opened at
+_open_readers = {}
+
+
+def current_test(file_name, raw, path=binary_path):
+    """The compiled test of data/ file `file_name` from the built corpus, if it was built
+    from exactly these bytes by this compile_corpus.py; else None."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    opened = _open_readers.get(path)
+    if opened is None or opened[0] != key:
+        try:
+            reader = CorpusReader(path)
+        except (OSError, ValueError, struct.error):
+            reader = None
+        # A replaced file is a new inode; the old map is dropped, not closed, while tests may still use it
+        opened = _open_readers[path] = (key, reader)
+    reader = opened[1]
+    if reader is None or reader.compiler_key != COMPILER_KEY:
+        return None
+    return reader.source_test(file_name, content_hash(raw))
+
+
+# --- CLI --------------------------------------------------------------------
+
+def compile_source(file_path):
+    # Always from the JSON: the corpus being rebuilt may be the one load_test() would read
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    return {"changes": 1, "compiled": compile_corpus.parse_test(raw, os.path.basename(file_path)),
+            "hash": content_hash(raw)}
+
+
+def print_item(reader, spec):
+    test_id, _, index = spec.partition(":")
+    value = reader.question(test_id, int(index)) if index else reader.test(test_id)
+    print(json.dumps(value, ensure_ascii=False, indent=2))
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Build the binary corpus (build/corpus.bin)."))
+    parser.add_argument("--out", default=binary_path, help=f"output file (default: {binary_path})")
+    parser.add_argument("--get", metavar="TEST_ID[:INDEX]",
+                        help="print a test (or one question of it) from the built file instead of building")
+    args = parser.parse_args(argv)
+
+    if args.get:
+        with CorpusReader(args.out) as reader:
+            print_item(reader, args.get)
+        return 0
+
+    report = run_from_args(compile_source, args, label="compiled")
+    if report["failedFiles"]:
+        return 1
+    tests = [(entry["result"]["compiled"], entry["result"]["hash"]) for entry in report["files"]]
+    writer = CorpusWriter()
+    output = writer.build(tests)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    corpus_io.write_bytes(args.out, output)
+
+    source_bytes = sum(os.path.getsize(path) for path in files_from_args(args))
+    start = time.perf_counter()
+    with CorpusReader(args.out) as reader:
+        views = [reader[test_id] for test_id in reader]
+        opened = time.perf_counter() - start
+        decoded = sum(1 for _ in reader.iter_tests())
+        seconds = time.perf_counter() - start - opened
+    print(f"{len(views)} tests, {len(writer.strings)} strings, {len(writer.shapes)} shapes: "
+          f"{len(output) / 1e6:.2f} MB ({source_bytes / 1e6:.2f} MB of JSON) -> {args.out}")
+    print(f"open every test {opened * 1e3:.2f} ms, decode all {decoded} {seconds * 1e3:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+
+from corpus_runner import data_dir
+
+# Persistent incremental cache for corpus passes.
+# The manifest (data/.pipeline-cache.json) remembers, per file and per
+# transform key, the content hash the file had after that transform set last
+# ran over it. If the file still hashes the same, running the same transforms
+# again is a no-op, so the file is neither parsed nor rewritten.
+#
+# {
+#   "version": 1,
+#   "files": {
+#     "see_2081_social_practice_1_generated.json": {"<transform key>": "<sha256>"}
+#   }
+# }
+
+MANIFEST_VERSION = 1
+
+manifest_path = os.path.join(data_dir, ".pipeline-cache.json")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(file_path):
+    with open(file_path, "rb") as f:
+        return content_hash(f.read())
+
+
+def source_hash(*paths):
+    """Hash of the given source files; changes whenever a pass is edited."""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def transform_key(version, names):
+    # version is the source hash of the pass implementations; names the enabled passes.
+    return f"{version}:{','.join(sorted(names))}"
+
+
+class PipelineCache:
+    def __init__(self, path=manifest_path):
+        self.path = path
+        self.files = {}
+        self.dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.files = manifest.get("files", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def known(self, key):
+        """Map of file name -> content hash already processed under key."""
+        return {name: keys[key] for name, keys in self.files.items() if key in keys}
+
+    def record(self, key, file_name, digest):
+        keys = self.files.setdefault(file_name, {})
+        # Keys from older pass versions can never hit again.
+        version = key.split(":", 1)[0]
+        for stale in [k for k in keys if not k.startswith(version + ":")]:
+            del keys[stale]
+        if keys.get(key) != digest:
+            keys[key] = digest
+            self.dirty = True
+
+    def record_report(self, key, report):
+        for entry in report["files"]:
+            result = entry["result"]
+            if isinstance(result, dict) and result.get("hash"):
+                self.record(key, entry["file"], result["hash"])
+
+    def save(self):
+        if not self.dirty:
+            return
+        root = os.path.dirname(self.path)
+        for name in [name for name in self.files if not os.path.exists(os.path.join(root, name))]:
+            del self.files[name]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, ensure_ascii=False, indent=2)
+        self.dirty = False
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+
+import corpus_profile
+
+# Shared reader/writer for the data/ test files.
+# Every tool writes through dumps() so the files stay byte-stable: key order
+# as parsed, two-space indentation, Devanagari kept as UTF-8 (not \u escapes)
+# and no trailing newline, which is exactly what the banks use today.
+
+
+def loads(raw):
+    corpus_profile.count("bytesIn", len(raw))
+    with corpus_profile.timed("parse"):
+        return json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+
+
+def load_json(file_path):
+    with open(file_path, "rb") as f:
+        return loads(f.read())
+
+
+def dumps(data):
+    """Canonical serialized bytes for a test file."""
+    with corpus_profile.timed("serialize"):
+        output = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    corpus_profile.count("bytesOut", len(output))
+    return output
+
+
+def dumps_compact(data):
+    """Compact bytes, as JSON.stringify() would send them over the wire."""
+    with corpus_profile.timed("serialize"):
+        output = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    corpus_profile.count("bytesOut", len(output))
+    return output
+
+
+def write_bytes(file_path, output):
+    """Replace file_path with output unless it already has those bytes.
+
+    The write goes through a temp file + rename, so a crash can never leave a
+    half-written bank behind. Returns True if the file changed.
+    """
+    with corpus_profile.timed("write"):
+        changed = _write_bytes(file_path, output)
+    if changed:
+        corpus_profile.count("bytesWritten", len(output))
+    return changed
+
+
+def _write_bytes(file_path, output):
+    try:
+        with open(file_path, "rb") as f:
+            if f.read() == output:
+                return False
+    except FileNotFoundError:
+        pass
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(output)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+def write_json(file_path, data):
+    return write_bytes(file_path, dumps(data))
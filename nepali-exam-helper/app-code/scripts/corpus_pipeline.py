@@ -0,0 +1,349 @@
+import argparse
+import os
+import re
+import shutil
+import sys
+import time
+from collections import namedtuple
+from functools import partial
+
+import corpus_io
+import corpus_profile
+import corpus_walk
+from corpus_cache import PipelineCache, content_hash, source_hash, transform_key
+from corpus_runner import add_runner_args, run_from_args, subject_of
+
+# Single-pass transform engine for the data/ question banks.
+# Each corpus fix is a registered visitor. A file is parsed once, every
+# enabled visitor is applied to each dict node in one iterative walk
+# (corpus_walk.iter_nodes), and the file is written once (only if something
+# changed). Visitors mutate nodes in place; nothing copies the tree.
+# Files whose content hash matches the last run of the same passes (see
+# corpus_cache.py) are skipped without being parsed.
+#
+# Usage:
+#   python scripts/corpus_pipeline.py                      # all passes, all files
+#   python scripts/corpus_pipeline.py --only translate_ids  # one pass
+#   python scripts/corpus_pipeline.py --subject social --dry-run
+
+Visitor = namedtuple("Visitor", ["name", "subjects", "fn"])
+
+# Registration order is application order.
+VISITORS = {}
+
+
+def visitor(name, subjects=None):
+    """Register fn(node, path) -> change count as a pipeline pass.
+
+    `subjects` restricts the pass to files of those subjects (None = all).
+    `path` is the corpus_walk.Path of keys/indexes leading from the root to
+    `node`; index it from the end (path[-1]) so the tuple is never built.
+    """
+    def register(fn):
+        VISITORS[name] = Visitor(name, tuple(subjects) if subjects else None, fn)
+        return fn
+    return register
+
+
+def rebuild(node, items):
+    # Replace a dict's contents in place so parents keep their reference.
+    node.clear()
+    node.update(items)
+
+
+def rename_key(node, old, new):
+    """Rename a key in place, keeping its position."""
+    rebuild(node, [(new if key == old else key, value) for key, value in list(node.items())])
+
+
+def split_key(node, key, new_items):
+    """Replace key with new_items (a list of (key, value)) at the same position."""
+    items = []
+    for k, value in list(node.items()):
+        if k == key:
+            items.extend(new_items)
+        else:
+            items.append((k, value))
+    rebuild(node, items)
+
+
+# --- Passes -----------------------------------------------------------------
+
+english_to_nepali = str.maketrans("0123456789", "०१२३४५६७८९")
+nepali_to_english = str.maketrans("०१२३४५६७८९", "0123456789")
+
+
+@visitor("translate_ids", subjects=["science"])
+def translate_ids(node, path):
+    # Questions live at questions.<group>[i]; give numeric ids Nepali digits.
+    if len(path) < 3 or path[-3] != "questions":
+        return 0
+    if "idEnglish" not in node or "idNepali" not in node:
+        return 0
+    id_eng = str(node["idEnglish"]).strip()
+    if not id_eng.isdigit():
+        return 0
+    translated_id = id_eng.translate(english_to_nepali)
+    if node["idNepali"] == translated_id:
+        return 0
+    node["idNepali"] = translated_id
+    return 1
+
+
+# space(optional) + ( + ASCII letters/digits/space/%,.&- + )
+# Anything in parentheses at the end of a Nepali option is a leftover translation.
+english_parens_pattern = re.compile(r"\s*\([a-zA-Z0-9\s%.,&-]+\)")
+
+
+@visitor("remove_english_parens", subjects=["science"])
+def remove_english_parens(node, path):
+    if len(path) < 2 or path[-2] != "options" or not isinstance(node.get("Nepali"), str):
+        return 0
+    cleaned = english_parens_pattern.sub("", node["Nepali"])
+    if cleaned == node["Nepali"]:
+        return 0
+    node["Nepali"] = cleaned
+    return 1
+
+
+option_id_pattern = re.compile(r"^[iv]+$")
+
+
+@visitor("split_correct_answer", subjects=["science"])
+def split_correct_answer(node, path):
+    # "correctAnswer": "ii" -> "correctAnswerNepali": "ii", "correctAnswerEnglish": "ii"
+    value = node.get("correctAnswer")
+    if not isinstance(value, str) or not option_id_pattern.match(value):
+        return 0
+    split_key(node, "correctAnswer", [("correctAnswerNepali", value), ("correctAnswerEnglish", value)])
+    return 1
+
+
+@visitor("translate_social_numerals", subjects=["social"])
+def translate_social_numerals(node, path):
+    changes = 0
+    for key, value in node.items():
+        if key.endswith("English") and isinstance(value, str):
+            translated = value.translate(nepali_to_english)
+            if translated != value:
+                node[key] = translated
+                changes += 1
+    return changes
+
+
+# Desired header field order (after _id)
+header_fields = [
+    "titleNepali",
+    "titleEnglish",
+    "subjectNepali",
+    "subjectEnglish",
+    "totalMarksNepali",
+    "totalMarksEnglish",
+    "durationNepali",
+    "durationEnglish",
+    "instructionsNepali",
+    "instructionsEnglish"
+]
+
+
+@visitor("reorder_social_headers", subjects=["social"])
+def reorder_social_headers(node, path):
+    # The header is the first document of the root list.
+    if len(path) != 1 or path[-1] != 0:
+        return 0
+    order = [key for key in ["_id"] + header_fields if key in node]
+    order += [key for key in node if key not in order]
+    if order == list(node):
+        return 0
+    rebuild(node, [(key, node[key]) for key in order])
+    return 1
+
+
+localized_key_pattern = re.compile(r"^(.*)(Nepali|English)$")
+
+
+@visitor("reorder_social_recursive", subjects=["social"])
+def reorder_social_recursive(node, path):
+    # _id first, then every Nepali/English pair with Nepali before English.
+    order = ["_id"] if "_id" in node else []
+    handled = set(order)
+    for key in node:
+        if key in handled:
+            continue
+        match = localized_key_pattern.match(key)
+        if match:
+            nepali_key = match.group(1) + "Nepali"
+            english_key = match.group(1) + "English"
+            if nepali_key in node and english_key in node:
+                order += [nepali_key, english_key]
+                handled.update((nepali_key, english_key))
+                continue
+        order.append(key)
+        handled.add(key)
+    if order == list(node):
+        return 0
+    rebuild(node, [(key, node[key]) for key in order])
+    return 1
+
+
+# Nepali answer keys
+NEPALI_KEY_MAP = {
+    "word": "शब्द",
+    "pos": "पदवर्ग",
+    "term": "शब्द",
+    "sentence": "वाक्य",
+    "formation": "निर्माण_प्रक्रिया",
+    "split": "विग्रह",
+    "phrase": "विग्रह",
+    "compound": "समस्त_शब्द"
+}
+
+nepali_answer_fields = {"sampleAnswerNepali", "correctAnswerNepali"}
+
+
+@visitor("translate_nepali_keys", subjects=["nepali"])
+def translate_nepali_keys(node, path):
+    if not any(key in NEPALI_KEY_MAP for key in node):
+        return 0
+    if not any(field in path for field in nepali_answer_fields):
+        return 0
+    changes = sum(1 for key in node if key in NEPALI_KEY_MAP)
+    rebuild(node, [(NEPALI_KEY_MAP.get(key, key), value) for key, value in list(node.items())])
+    return changes
+
+
+# --- Engine -----------------------------------------------------------------
+
+def walk(data, visitors):
+    if corpus_profile.active() is not None:
+        return profiled_walk(data, visitors)
+    changes = 0
+    for node, path in corpus_walk.iter_nodes(data):
+        for v in visitors:
+            changes += v.fn(node, path)
+    return changes
+
+
+def profiled_walk(data, visitors):
+    # walk() with every pass timed on its own; only used under --profile
+    clock = time.perf_counter
+    seconds = [0.0] * len(visitors)
+    counts = [0] * len(visitors)
+    start = clock()
+    for node, path in corpus_walk.iter_nodes(data):
+        for i, v in enumerate(visitors):
+            before = clock()
+            counts[i] += v.fn(node, path)
+            seconds[i] += clock() - before
+    corpus_profile.add_time("walk", clock() - start)
+    for v, pass_seconds, pass_changes in zip(visitors, seconds, counts):
+        corpus_profile.add_pass(v.name, pass_seconds, pass_changes)
+    corpus_profile.count("rewrites", sum(counts))
+    return sum(counts)
+
+
+def select_visitors(names=None, subject=None):
+    selected = []
+    for name, v in VISITORS.items():
+        if names is not None and name not in names:
+            continue
+        if v.subjects is not None and subject not in v.subjects:
+            continue
+        selected.append(v)
+    return selected
+
+
+def process_file(file_path, names=None, dry_run=False, backup=False, known=None):
+    """Run the enabled passes over one test file.
+
+    `known` maps file names to the content hash they had after the same passes
+    last ran; a matching file is skipped. Returns {"changes", "hash", "cached"}.
+    """
+    file_name = os.path.basename(file_path)
+    visitors = select_visitors(names, subject_of(file_name))
+    if not visitors:
+        return {"changes": 0, "hash": None, "cached": False}
+
+    try:
+        with open(file_path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        print(f"Error: File not found - {file_path}")
+        return {"changes": 0, "hash": None, "cached": False}
+
+    digest = content_hash(raw)
+    if known and known.get(file_name) == digest:
+        return {"changes": 0, "hash": digest, "cached": True}
+
+    print(f"Processing {file_name}...")
+    try:
+        data = corpus_io.loads(raw)
+    except ValueError as e:
+        print(f"Error: JSON Error in {file_name} - {e}")
+        return {"changes": 0, "hash": None, "cached": False}
+
+    changes = walk(data, visitors)
+
+    if changes == 0:
+        print(f"No changes needed for {file_name}")
+        return {"changes": 0, "hash": None if dry_run else digest, "cached": False}
+
+    if dry_run:
+        print(f"Would update {file_name} ({changes} changes)")
+        return {"changes": changes, "hash": None, "cached": False}
+
+    if backup:
+        shutil.copy(file_path, file_path + ".bak")
+    output = corpus_io.dumps(data)
+    corpus_io.write_bytes(file_path, output)
+    print(f"Updated {file_name} ({changes} changes)")
+    return {"changes": changes, "hash": content_hash(output), "cached": False}
+
+
+# Any edit to the passes, the walker or the writer invalidates cached results.
+PASSES_VERSION = source_hash(__file__, corpus_walk.__file__, corpus_io.__file__)
+
+
+def add_pipeline_args(parser):
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and don't update data/.pipeline-cache.json")
+    return parser
+
+
+def run_passes(args, names=None, backup=False):
+    """Run the named passes (default: all) over the files selected by args."""
+    key = transform_key(PASSES_VERSION, names or VISITORS)
+    cache = None if args.no_cache or args.dry_run else PipelineCache()
+    task = partial(process_file, names=names, dry_run=args.dry_run, backup=backup,
+                   known=cache.known(key) if cache else None)
+    report = run_from_args(task, args)
+    if cache:
+        cache.record_report(key, report)
+        cache.save()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply corpus fixes to data/ test files in a single pass.")
+    add_pipeline_args(add_runner_args(parser))
+    parser.add_argument("--only", help="comma-separated pass names (default: all)")
+    parser.add_argument("--list", action="store_true", help="list registered passes and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, v in VISITORS.items():
+            print(f"{name}: {', '.join(v.subjects) if v.subjects else 'all subjects'}")
+        return 0
+
+    names = set(args.only.split(",")) if args.only else None
+    if names:
+        unknown = names - set(VISITORS)
+        if unknown:
+            parser.error(f"unknown pass(es): {', '.join(sorted(unknown))}")
+
+    report = run_passes(args, names)
+    return 1 if report["failedFiles"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
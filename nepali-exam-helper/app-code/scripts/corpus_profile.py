@@ -0,0 +1,214 @@
+import cProfile
+import contextlib
+import os
+import pstats
+import time
+
+try:
+    import pyinstrument
+except ImportError:  # optional: only --capture *.html needs it
+    pyinstrument = None
+
+# Timing and counter hooks for the corpus scripts (--profile on any script
+# built on corpus_runner).
+# While a file is processed with profiling on, the shared layers report into
+# that file's FileProfile:
+#   stages    seconds in parse (corpus_io.loads, or load_test() reading
+#             build/corpus.bin), compile (compile_corpus.load_test), walk
+#             (corpus_pipeline.walk, lint), serialize (corpus_io.dumps*) and
+#             write (corpus_io.write_bytes); "other" is the rest of the task
+#   passes    per corpus_pipeline pass: seconds and changes
+#   counters  nodesVisited (corpus_walk), rewrites (changes made by passes),
+#             bytesIn (parsed), bytesOut (serialised), bytesWritten
+# corpus_runner keeps each file's profile in its report entry and sums them
+# into report["profile"]: per stage, pass, counter and subject layout, plus
+# the slowest files. With profiling off, every hook is a global lookup.
+#
+# --capture PATH also records a function-level profile: cProfile in every
+# worker, merged into one pstats file (python -m pstats PATH, or snakeviz), or
+# for a PATH ending in .html a pyinstrument report (pyinstrument must be
+# installed; the files then run inline in one process).
+
+STAGES = ("parse", "compile", "walk", "serialize", "write", "other")
+
+SLOWEST_FILES = 5
+
+_current = None
+
+
+class FileProfile:
+    __slots__ = ("stages", "passes", "counters")
+
+    def __init__(self):
+        self.stages = {}
+        self.passes = {}
+        self.counters = {}
+
+    def as_dict(self, seconds):
+        stages = {name: round(value, 6) for name, value in self.stages.items()}
+        # The task's time outside every stage (its own logic, file reads)
+        stages["other"] = round(max(0.0, seconds - sum(self.stages.values())), 6)
+        return {
+            "seconds": round(seconds, 6),
+            "stages": stages,
+            "passes": {name: {"seconds": round(p["seconds"], 6), "changes": p["changes"]}
+                       for name, p in self.passes.items()},
+            "counters": dict(self.counters),
+        }
+
+
+def active():
+    """The profile of the file being processed in this process, or None when profiling is off."""
+    return _current
+
+
+def add_time(stage, seconds):
+    if _current is not None:
+        _current.stages[stage] = _current.stages.get(stage, 0.0) + seconds
+
+
+def add_pass(name, seconds, changes):
+    if _current is not None:
+        entry = _current.passes.setdefault(name, {"seconds": 0.0, "changes": 0})
+        entry["seconds"] += seconds
+        entry["changes"] += changes
+
+
+def count(counter, n=1):
+    if _current is not None:
+        _current.counters[counter] = _current.counters.get(counter, 0) + n
+
+
+@contextlib.contextmanager
+def timed(stage):
+    if _current is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(stage, time.perf_counter() - start)
+
+
+class _Stats:
+    # What pstats.Stats.add() accepts: an object with create_stats() and .stats
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profile_call(fn, arg, capture=False):
+    """Run fn(arg) with a fresh FileProfile.
+
+    Returns (result, seconds, profile dict, cProfile stats or None); the stats
+    are a plain dict so they can come back from a pool worker.
+    """
+    global _current
+    previous, _current = _current, FileProfile()
+    profiler = cProfile.Profile() if capture else None
+    start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        try:
+            result = fn(arg)
+        finally:
+            if profiler:
+                profiler.disable()
+        seconds = time.perf_counter() - start
+        profile = _current.as_dict(seconds)
+    finally:
+        _current = previous
+    stats = None
+    if profiler:
+        profiler.create_stats()
+        stats = profiler.stats
+    return result, seconds, profile, stats
+
+
+def write_pstats(path, stats_list):
+    """Merge per-file cProfile stats into one pstats file."""
+    stats_list = [stats for stats in stats_list if stats]
+    if not stats_list:
+        return
+    merged = pstats.Stats(_Stats(stats_list[0]))
+    for stats in stats_list[1:]:
+        merged.add(_Stats(stats))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    merged.dump_stats(path)
+
+
+@contextlib.contextmanager
+def pyinstrument_capture(path):
+    """Record everything inside the block with pyinstrument and write it as HTML to path."""
+    if pyinstrument is None:
+        raise SystemExit("--capture *.html needs pyinstrument (pip install pyinstrument)")
+    profiler = pyinstrument.Profiler()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+
+
+# --- Summary ----------------------------------------------------------------
+
+def _add(totals, values):
+    for name, value in values.items():
+        totals[name] = totals.get(name, 0) + value
+
+
+def summarize(entries, subject_of):
+    """Sum the per-file profiles of report entries by stage, pass, counter and subject."""
+    profiled = [entry for entry in entries if entry.get("profile")]
+    stages, counters, passes, subjects = {}, {}, {}, {}
+    for entry in profiled:
+        profile = entry["profile"]
+        _add(stages, profile["stages"])
+        _add(counters, profile["counters"])
+        for name, p in profile["passes"].items():
+            _add(passes.setdefault(name, {}), p)
+        subject = subjects.setdefault(subject_of(entry["file"]) or "other", {"files": 0, "seconds": 0.0})
+        subject["files"] += 1
+        subject["seconds"] += profile["seconds"]
+        _add(subject, {name: profile["counters"].get(name, 0) for name in ("bytesIn", "nodesVisited")})
+
+    def rounded(values):
+        return {name: round(value, 4) if isinstance(value, float) else value for name, value in values.items()}
+
+    slowest = sorted(profiled, key=lambda entry: -entry["profile"]["seconds"])[:SLOWEST_FILES]
+    return {
+        "files": len(profiled),
+        "seconds": round(sum(entry["profile"]["seconds"] for entry in profiled), 4),
+        "stages": rounded({name: stages[name] for name in STAGES if name in stages}),
+        "passes": {name: rounded(p) for name, p in passes.items()},
+        "counters": dict(sorted(counters.items())),
+        "subjects": {name: rounded(s) for name, s in sorted(subjects.items())},
+        "slowest": [{"file": entry["file"], "seconds": round(entry["profile"]["seconds"], 4)} for entry in slowest],
+    }
+
+
+def print_summary(summary):
+    total = summary["seconds"] or 1e-9
+    print(f"Profile: {summary['seconds']:.2f}s of task time over {summary['files']} files")
+    print(f"  {'stage':<28}{'seconds':>10}{'share':>8}")
+    for name, seconds in summary["stages"].items():
+        print(f"  {name:<28}{seconds:>10.3f}{seconds / total:>8.1%}")
+    if summary["passes"]:
+        print(f"  {'pass':<28}{'seconds':>10}{'changes':>8}")
+        for name, p in summary["passes"].items():
+            print(f"  {name:<28}{p['seconds']:>10.3f}{p['changes']:>8}")
+    print(f"  {'subject':<18}{'files':>6}{'seconds':>10}{'MB in':>8}{'nodes':>10}")
+    for name, s in summary["subjects"].items():
+        print(f"  {name:<18}{s['files']:>6}{s['seconds']:>10.3f}{s.get('bytesIn', 0) / 1e6:>8.2f}"
+              f"{s.get('nodesVisited', 0):>10}")
+    if summary["counters"]:
+        print("  " + ", ".join(f"{name} {value}" for name, value in summary["counters"].items()))
+    if summary["slowest"]:
+        print("  slowest: " + ", ".join(f"{entry['file']} ({entry['seconds']:.3f}s)" for entry in summary["slowest"]))
@@ -0,0 +1,209 @@
+import argparse
+import fnmatch
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import corpus_profile
+
+# Shared batch runner for the corpus maintenance and audit scripts.
+# Finds test files under data/ by glob and/or subject, fans the per-file work
+# out over a process pool and collects every result into one report.
+#
+# A task is a top-level (picklable) function taking a file path and returning
+# either a change/issue count, a list of issues, or a dict with a "changes" key.
+# --profile times and counts what every file costs (see corpus_profile.py).
+# CORPUS_DATA_DIR points every script at another data/ (bench_corpus.py runs
+# them on its synthetic corpora that way).
+
+data_dir = os.path.abspath(os.environ.get("CORPUS_DATA_DIR")
+                           or os.path.join(os.path.dirname(__file__), "..", "data"))
+
+SUBJECTS = ("science", "social", "math", "nepali", "english")
+
+subject_pattern = re.compile(r"_(" + "|".join(SUBJECTS) + r")_")
+
+
+def subject_of(file_name):
+    match = subject_pattern.search(os.path.basename(file_name))
+    return match.group(1) if match else None
+
+
+def discover_files(pattern="*.json", subjects=None, root=None):
+    """Return sorted paths of the test files in data/ matching pattern and subjects."""
+    root = root or data_dir
+    paths = []
+    for name in sorted(os.listdir(root)):
+        if name.startswith(".") or not fnmatch.fnmatch(name, pattern):
+            continue
+        if subjects and subject_of(name) not in subjects:
+            continue
+        path = os.path.join(root, name)
+        if os.path.isfile(path):
+            paths.append(path)
+    return paths
+
+
+def count_changes(result):
+    if isinstance(result, bool) or result is None:
+        return int(bool(result))
+    if isinstance(result, int):
+        return result
+    if isinstance(result, dict):
+        return result.get("changes", 0)
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 0
+
+
+def _entry(file_path, result=None, error=None, seconds=0.0, profile=None):
+    entry = {
+        "file": os.path.basename(file_path),
+        "changes": count_changes(result),
+        "result": result,
+        "error": error,
+        "seconds": round(seconds, 4),
+    }
+    if profile is not None:
+        entry["profile"] = profile
+    return entry
+
+
+def _timed(task, file_path, profile=False, capture=False):
+    if profile:
+        return corpus_profile.profile_call(task, file_path, capture=capture)
+    start = time.perf_counter()
+    result = task(file_path)
+    return result, time.perf_counter() - start, None, None
+
+
+def run_batch(task, files, workers=None, profile=None):
+    """Run task over files on a process pool and return the combined report.
+
+    workers=1 runs inline in this process, which is handy under a debugger.
+    `profile` (from profile_options()) adds per-file profiles and their
+    summary as report["profile"].
+    """
+    capture = (profile or {}).get("capture")
+    if capture and capture.endswith(".html"):
+        with corpus_profile.pyinstrument_capture(capture):
+            return run_batch(task, files, workers=1, profile=dict(profile, capture=None))
+    cprofile = bool(capture)
+
+    start = time.perf_counter()
+    entries = []
+    captured = []
+
+    def collect(file_path, outcome):
+        result, seconds, file_profile, stats = outcome
+        entries.append(_entry(file_path, result, seconds=seconds, profile=file_profile))
+        captured.append(stats)
+
+    if workers == 1 or len(files) <= 1:
+        for file_path in files:
+            try:
+                collect(file_path, _timed(task, file_path, bool(profile), cprofile))
+            except Exception as e:
+                entries.append(_entry(file_path, error=f"{type(e).__name__}: {e}"))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_timed, task, file_path, bool(profile), cprofile): file_path
+                       for file_path in files}
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    collect(file_path, future.result())
+                except Exception as e:
+                    entries.append(_entry(file_path, error=f"{type(e).__name__}: {e}"))
+
+    entries.sort(key=lambda entry: entry["file"])
+    report = {
+        "files": entries,
+        "totalFiles": len(entries),
+        "totalChanges": sum(entry["changes"] for entry in entries),
+        "failedFiles": [entry["file"] for entry in entries if entry["error"]],
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+    if profile:
+        report["profile"] = corpus_profile.summarize(entries, subject_of)
+        if profile.get("json"):
+            os.makedirs(os.path.dirname(os.path.abspath(profile["json"])), exist_ok=True)
+            with open(profile["json"], "w", encoding="utf-8") as f:
+                json.dump(report["profile"], f, ensure_ascii=False, indent=2)
+        if cprofile:
+            corpus_profile.write_pstats(capture, captured)
+    return report
+
+
+def print_report(report, label="changes"):
+    print("=" * 50)
+    for entry in report["files"]:
+        if entry["error"]:
+            print(f"  {entry['file']}: FAILED ({entry['error']})")
+        else:
+            cached = isinstance(entry["result"], dict) and entry["result"].get("cached")
+            print(f"  {entry['file']}: {entry['changes']} {label}{' (cached)' if cached else ''}")
+    print(f"{report['totalChanges']} {label} across {report['totalFiles']} files "
+          f"in {report['seconds']:.2f}s")
+    if report["failedFiles"]:
+        print(f"Failed files: {', '.join(report['failedFiles'])}")
+    print_profile(report)
+
+
+def print_profile(report):
+    if report.get("profile"):
+        corpus_profile.print_summary(report["profile"])
+
+
+def add_runner_args(parser, default_subjects=None):
+    """Add the shared file-selection and pool options to a script's parser."""
+    parser.add_argument("files", nargs="*", help="explicit test files (overrides --glob/--subject)")
+    parser.add_argument("--glob", default="*.json", help="file name pattern inside data/ (default: *.json)")
+    parser.add_argument("--subject", action="append", choices=SUBJECTS,
+                        help="only files of this subject (repeatable)"
+                             + (f"; default: {', '.join(default_subjects)}" if default_subjects else ""))
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--report", help="also write the JSON report to this path")
+    parser.add_argument("--profile", action="store_true",
+                        help="time parse/walk/serialize/write, every pass and subject, and print a summary")
+    parser.add_argument("--profile-json", metavar="PATH", help="also write the profile summary here (implies --profile)")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="record a cProfile pstats file, or pyinstrument HTML for *.html (implies --profile)")
+    parser.set_defaults(default_subjects=default_subjects)
+    return parser
+
+
+def profile_options(args):
+    """run_batch()'s profile argument for the parsed --profile/--profile-json/--capture options."""
+    if not (args.profile or args.profile_json or args.capture):
+        return None
+    return {"json": args.profile_json, "capture": args.capture}
+
+
+def files_from_args(args):
+    if args.files:
+        return list(args.files)
+    return discover_files(args.glob, args.subject or args.default_subjects)
+
+
+def run_from_args(task, args, label="changes"):
+    report = run_batch(task, files_from_args(args), workers=args.workers, profile=profile_options(args))
+    print_report(report, label)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def main(argv=None):
+    # List what a given selection would process.
+    parser = add_runner_args(argparse.ArgumentParser(description="List data/ test files matching a selection."))
+    args = parser.parse_args(argv)
+    for path in files_from_args(args):
+        print(f"{subject_of(path) or '-':8} {os.path.basename(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import functools
+import hashlib
+import re
+import unicodedata
+
+# Text normalisation shared by the answer index and the app's local grader.
+# lib/answer-index.ts implements the same steps; keep the two in sync (and
+# bump INDEX_VERSION in build_answer_index.py when they change):
+#   1. NFC, lower-case, Nepali digits -> ASCII, "%" -> "percent"
+#   2. anything but a-z, 0-9 and Devanagari letters/signs becomes a space
+#      (so punctuation and the danda separate words)
+#   3. numbers are split from attached letters: "10m" -> "10 m"
+#   4. unit words in either language collapse to one token: "metres", "मिटर" -> "m"
+#
+# parse_quantity() reads numeric answers ("Rs. 47,500", "6.16 m³", "५, -२") for
+# the grading spec; lib/grading-spec.ts mirrors it (bump SPEC_VERSION in
+# build_grading_spec.py when it changes).
+#
+# search_tokens() and parse_citation() feed the search index; lib/search-index.ts
+# mirrors them (bump INDEX_VERSION in build_search_index.py when they change).
+#
+# math_spans() splits text the way components/math-text.tsx does, and math_key()
+# is lib/math-markup.ts's key for a span (bump RENDER_VERSION in
+# prerender_math.py when either changes).
+
+nepali_digits = str.maketrans("०१२३४५६७८९", "0123456789")
+
+separator_pattern = re.compile(r"[^a-z0-9ऀ-ॣ॰-ॿ]+")
+digit_letter_pattern = re.compile(r"([0-9])([^0-9\s])")
+letter_digit_pattern = re.compile(r"([^0-9\s])([0-9])")
+
+UNIT_ALIASES = {
+    "m": ["metre", "metres", "meter", "meters", "मिटर"],
+    "cm": ["centimetre", "centimetres", "centimeter", "centimeters", "सेन्टिमिटर"],
+    "km": ["kilometre", "kilometres", "kilometer", "kilometers", "किलोमिटर"],
+    "kg": ["kilogram", "kilograms", "kgs", "किलोग्राम", "केजी"],
+    "g": ["gram", "grams", "ग्राम"],
+    "s": ["sec", "secs", "second", "seconds", "सेकेन्ड", "सेकेण्ड"],
+    "min": ["minute", "minutes", "मिनेट"],
+    "h": ["hr", "hrs", "hour", "hours", "घण्टा"],
+    "n": ["newton", "newtons", "न्युटन"],
+    "j": ["joule", "joules", "जुल"],
+    "w": ["watt", "watts", "वाट"],
+    "v": ["volt", "volts", "भोल्ट"],
+    "a": ["ampere", "amperes", "amp", "amps", "एम्पियर"],
+    "pa": ["pascal", "pascals", "प्यास्कल"],
+    "hz": ["hertz", "हर्ज"],
+    "c": ["celsius", "centigrade", "सेल्सियस"],
+    "rs": ["rupee", "rupees", "nrs", "रुपैयाँ", "रु"],
+    "percent": ["प्रतिशत"],
+    # "30 degree celsius" and "30°C" should agree
+    "": ["degree", "degrees", "डिग्री"],
+}
+
+unit_tokens = {alias: unit for unit, aliases in UNIT_ALIASES.items() for alias in aliases}
+
+
+def normalize_text(text):
+    """Normalised form of an answer or question: space-separated tokens."""
+    text = unicodedata.normalize("NFC", str(text)).lower().translate(nepali_digits).replace("%", " percent ")
+    text = separator_pattern.sub(" ", text)
+    text = letter_digit_pattern.sub(r"\1 \2", digit_letter_pattern.sub(r"\1 \2", text))
+    tokens = (unit_tokens.get(token, token) for token in text.split())
+    return " ".join(token for token in tokens if token)
+
+
+def text_key(text):
+    """Content-addressed id of a question: hash of its normalised text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+# --- Quantities ---------------------------------------------------------------
+
+QUANTITY_UNITS = {unit for unit in UNIT_ALIASES if unit} | {"mm", "ft", "l", "ml"}
+
+# Area and volume markers before a unit: "sq. cm", "cubic metres", "वर्ग मिटर" -> "cm2", "m3"
+UNIT_POWERS = {"sq": "2", "square": "2", "वर्ग": "2", "cubic": "3", "cu": "3", "घन": "3"}
+# Words that may accompany a number without changing what it measures
+COUNT_WORDS = {
+    "year", "years", "month", "months", "day", "days", "students", "people", "persons", "times",
+    "units", "unit", "वर्ष", "महिना", "दिन", "जना",
+}
+LIST_WORDS = {"and", "र"}
+
+latex_text_pattern = re.compile(r"\\(?:text|mathrm)\{([^{}]*)\}")
+answer_prefix_pattern = re.compile(r"^\s*(?:ans(?:wer)?\b\.?\s*[:=-]?|[a-z]\s*=)\s*")
+# "47,500" and the lakh grouping "4,25,250"
+thousands_pattern = re.compile(r"(?<=\d),(?=(?:\d{2},)*\d{3}(?!\d))")
+superscript_powers = str.maketrans({"²": "^2", "³": "^3"})
+# "cm^2", "cm2", "m³" (after superscript_powers): rewritten as "sq cm", "cubic m"
+power_pattern = re.compile(r"([a-zऀ-ॣ॰-ॿ]+)\^?([23])(?![0-9.])")
+power_words = {"2": "sq", "3": "cubic"}
+number_pattern = re.compile(r"(?<![a-z0-9.])-?\d+(?:\.\d+)?(?:/\d+)?(?![0-9])")
+
+
+def parse_number(token):
+    """(value, decimals) of "12", "-0.75" or "3/4"; fractions report decimals=None."""
+    if "/" in token:
+        numerator, denominator = token.split("/")
+        return (float(numerator) / float(denominator), None) if float(denominator) else (None, None)
+    decimals = len(token.split(".")[1]) if "." in token else 0
+    return float(token), decimals
+
+
+def parse_quantity(text):
+    """Numbers and units of an answer that is nothing but a quantity, else None.
+
+    Returns {"values": [(value, decimals), ...], "units": [unit, ...]}; an area or
+    volume unit keeps its power ("cm2", "m3").
+    """
+    text = unicodedata.normalize("NFC", str(text)).lower().translate(nepali_digits).translate(superscript_powers)
+    text = latex_text_pattern.sub(r"\1", text).replace("\\%", "%").replace("$", " ")
+    text = answer_prefix_pattern.sub("", text)
+    # "2(3), 3(1)" pairs values up; leave structured answers to the model
+    if any(bracket in text for bracket in "()[]"):
+        return None
+    text = power_pattern.sub(lambda match: f" {power_words[match.group(2)]} {match.group(1)}",
+                             thousands_pattern.sub("", text))
+
+    values = [parse_number(token) for token in number_pattern.findall(text)]
+    if not values or any(value is None for value, _ in values):
+        return None
+    units = []
+    power = ""
+    for token in normalize_text(number_pattern.sub(" ", text)).split():
+        if token in COUNT_WORDS or token in LIST_WORDS:
+            continue
+        if token in UNIT_POWERS and not power:
+            power = UNIT_POWERS[token]
+            continue
+        if token not in QUANTITY_UNITS:
+            return None
+        token += power
+        power = ""
+        if token not in units:
+            units.append(token)
+    # "24 square units": an area without a unit to attach it to
+    if power:
+        return None
+    return {"values": values, "units": units}
+
+
+# --- Search -------------------------------------------------------------------
+# Tokens for the search index (build_search_index.py); lib/search-index.ts
+# tokenises queries with the same steps. Unlike normalize_text() there are no
+# unit aliases: "a", "c" and "s" are words here, not units.
+
+search_token_pattern = re.compile(r"[a-z0-9]+|[ऀ-ॣ॰-ॿ]+")
+
+SEARCH_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "from", "by", "with", "and", "or", "is", "are",
+    "was", "were", "be", "it", "its", "this", "that", "these", "those", "what", "which", "who", "how", "why",
+    "when", "where", "do", "does", "your", "you", "their", "as", "into", "about", "all", "any", "question",
+    "questions", "related",
+    "र", "वा", "छ", "छन्", "हो", "हुन्", "के", "कुन", "को", "का", "की", "मा", "ले", "लाई", "पनि", "यो", "त्यो", "सबै", "प्रश्न",
+}
+
+# Postpositions and the plural marker, longest first
+NEPALI_SUFFIXES = (
+    "हरूलाई", "हरूबाट", "हरूको", "हरूका", "हरूकी", "हरूले", "हरूमा", "हरुको", "हरुले", "हरुमा",
+    "द्वारा", "हरू", "हरु", "लाई", "बाट", "देखि", "सम्म", "को", "का", "की", "ले", "मा",
+)
+
+doubled_consonant_pattern = re.compile(r"([b-df-hj-np-tv-z])\1$")
+
+
+def stem_english(word):
+    """Light stemmer: plurals, -ing/-ed, -ly and a final e ("pressures" -> "pressur")."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith(("xes", "ches", "shes", "zes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if doubled_consonant_pattern.search(word) and not word.endswith(("ll", "ss", "zz")):
+                word = word[:-1]
+            break
+    if word.endswith("ly") and len(word) >= 6:
+        word = word[:-2]
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def stem_nepali(word):
+    for suffix in NEPALI_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[:-len(suffix)]
+    return word
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def stem_token(token):
+    # The same few thousand words recur across every bank
+    return stem_nepali(token) if token[0] >= "ऀ" else stem_english(token)
+
+
+def search_tokens(text):
+    """Stemmed search tokens of a text in either language, stopwords removed."""
+    text = unicodedata.normalize("NFC", str(text)).lower().translate(nepali_digits)
+    tokens = []
+    for token in search_token_pattern.findall(text):
+        if token in SEARCH_STOPWORDS:
+            continue
+        token = stem_token(token)
+        if token not in SEARCH_STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+# Citations at the end of explanations (mirrors lib/citation-utils.ts)
+citation_marker_pattern = re.compile(r"(Citation:|उद्धरण:)\s*(.+?)$", re.IGNORECASE)
+citation_lesson_pattern = re.compile(r"(?:Chapter|अध्याय)\s*(\d+)\s*[,;]\s*(?:Lesson|पाठ)\s*(\d+)", re.IGNORECASE)
+citation_chapter_pattern = re.compile(r"(?:Chapter|अध्याय|पाठ)\s*(\d+)", re.IGNORECASE)
+
+
+def parse_citation(text):
+    """{"chapter": n, "lesson": n} from a "Citation: Chapter 3" / "उद्धरण: अध्याय ३" ending, else None."""
+    marker = citation_marker_pattern.search(str(text))
+    if not marker:
+        return None
+    citation = marker.group(2).translate(nepali_digits)
+    match = citation_lesson_pattern.search(citation)
+    if match:
+        return {"chapter": int(match.group(1)), "lesson": int(match.group(2))}
+    match = citation_chapter_pattern.search(citation)
+    return {"chapter": int(match.group(1))} if match else None
+
+
+# $$...$$ display math and $...$ inline math; at the same position display math wins
+math_block_pattern = re.compile(r"\$\$([\s\S]*?)\$\$")
+math_inline_pattern = re.compile(r"\$([^$\n]+?)\$")
+
+
+def math_spans(text):
+    """(source with its delimiters, TeX, display) for every math span of text, in order."""
+    spans = []
+    position = 0
+    while True:
+        block = math_block_pattern.search(text, position)
+        inline = math_inline_pattern.search(text, position)
+        match = block if block and (not inline or block.start() <= inline.start()) else inline
+        if not match:
+            return spans
+        spans.append((match.group(0), match.group(1), match is block))
+        position = match.end()
+
+
+FNV_OFFSET = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+
+
+def math_key(source):
+    """64-bit FNV-1a of a delimited span's UTF-8 bytes, as 16 hex digits."""
+    h = FNV_OFFSET
+    for byte in source.encode("utf-8"):
+        h = ((h ^ byte) * FNV_PRIME) & 0xFFFFFFFFFFFFFFFF
+    return f"{h:016x}"
@@ -0,0 +1,191 @@
+import json
+
+try:
+    import ijson
+except ImportError:  # optional: without it, stream mode parses the file with json first
+    ijson = None
+
+import corpus_profile
+
+# Shared tree walkers for the data/ question banks.
+# iter_nodes() visits every dict of a parsed tree with an explicit stack (no
+# recursion limit), reading a node's children only after the caller is done
+# with it, so passes can mutate nodes in place. Paths are Path chains that
+# cost one small object per container; the tuple is only built when a caller
+# asks for it (e.g. to report an issue).
+# iter_shallow_nodes() is the event-streaming counterpart for audit-only
+# passes: it rebuilds one object at a time from parse events, keeping only
+# its scalar members, so memory stays flat however large the bank is.
+
+
+class Path:
+    """A key/index path from the root, stored as a parent chain."""
+
+    __slots__ = ("parent", "key", "depth", "_parts")
+
+    def __init__(self, parent=None, key=None):
+        self.parent = parent
+        self.key = key
+        self.depth = 0 if parent is None else parent.depth + 1
+        self._parts = None
+
+    def child(self, key):
+        return Path(self, key)
+
+    def parts(self):
+        if self._parts is None:
+            parts = []
+            node = self
+            while node.depth:
+                parts.append(node.key)
+                node = node.parent
+            self._parts = tuple(reversed(parts))
+        return self._parts
+
+    def __len__(self):
+        return self.depth
+
+    def __getitem__(self, index):
+        # path[-1], path[-2], ... walk up the chain without building the tuple.
+        if isinstance(index, int) and -self.depth <= index < 0:
+            node = self
+            for _ in range(-index - 1):
+                node = node.parent
+            return node.key
+        return self.parts()[index]
+
+    def __contains__(self, key):
+        node = self
+        while node.depth:
+            if node.key == key:
+                return True
+            node = node.parent
+        return False
+
+    def __iter__(self):
+        return iter(self.parts())
+
+    def __eq__(self, other):
+        if isinstance(other, Path):
+            other = other.parts()
+        return isinstance(other, tuple) and len(other) == self.depth and self.parts() == other
+
+    def __hash__(self):
+        return hash(self.parts())
+
+    def __repr__(self):
+        return f"Path{self.parts()!r}"
+
+
+ROOT = Path()
+
+
+def iter_nodes(data):
+    """Yield (node, path) for every dict in document order, iteratively."""
+    stack = [(data, ROOT)]
+    visited = 0
+    try:
+        while stack:
+            node, path = stack.pop()
+            if isinstance(node, dict):
+                visited += 1
+                yield node, path
+                # Read after the yield: the caller may have rebuilt the node.
+                children = list(node.items())
+            elif isinstance(node, list):
+                children = list(enumerate(node))
+            else:
+                continue
+            for key, value in reversed(children):
+                if isinstance(value, (dict, list)):
+                    stack.append((value, path.child(key)))
+    finally:
+        corpus_profile.count("nodesVisited", visited)
+
+
+# --- Event streaming --------------------------------------------------------
+
+def tree_events(data):
+    """ijson.basic_parse()-style events generated from an already parsed tree."""
+    stack = [("value", data)]
+    while stack:
+        kind, value = stack.pop()
+        if kind == "key":
+            yield "map_key", value
+        elif kind == "end":
+            yield value, None
+        elif isinstance(value, dict):
+            yield "start_map", None
+            stack.append(("end", "end_map"))
+            for key, item in reversed(list(value.items())):
+                stack.append(("value", item))
+                stack.append(("key", key))
+        elif isinstance(value, list):
+            yield "start_array", None
+            stack.append(("end", "end_array"))
+            stack.extend(("value", item) for item in reversed(value))
+        else:
+            yield "scalar", value
+
+
+def iter_events(f):
+    """Parse events for a binary file object: ijson when installed, else json."""
+    if ijson is not None:
+        for event, value in ijson.basic_parse(f, use_float=True):
+            if event in ("start_map", "end_map", "start_array", "end_array", "map_key"):
+                yield event, value
+            else:
+                yield "scalar", value
+    else:
+        yield from tree_events(json.loads(f.read().decode("utf-8")))
+
+
+CONTAINER = object()  # stands in for nested dicts/lists in a shallow node
+
+
+def iter_shallow_nodes(f):
+    """Yield (order, shallow node, path) for every object in a streamed file.
+
+    A shallow node has the object's keys in order, with scalars kept and
+    nested containers replaced by CONTAINER. Objects are yielded when they
+    close (children first); `order` is their document (pre-order) position,
+    so callers can restore document order for what they report.
+    """
+    # Frames: [container, path, next index or current key, order]
+    stack = []
+    order = 0
+
+    def child_path():
+        if not stack:
+            return ROOT
+        container, path, key, _ = stack[-1]
+        if isinstance(container, list):
+            stack[-1][2] += 1
+            return path.child(key)
+        container[key] = CONTAINER
+        return path.child(key)
+
+    for event, value in iter_events(f):
+        if event == "map_key":
+            stack[-1][2] = value
+        elif event == "start_map":
+            stack.append([{}, child_path(), None, order])
+            order += 1
+        elif event == "start_array":
+            stack.append([[], child_path(), 0, None])
+        elif event == "end_map":
+            node, path, _, node_order = stack.pop()
+            corpus_profile.count("nodesVisited")
+            yield node_order, node, path
+        elif event == "end_array":
+            stack.pop()
+        elif stack:
+            container, path, key, _ = stack[-1]
+            if isinstance(container, dict):
+                container[key] = value
+            else:
+                stack[-1][2] += 1
+
+
+# What a malformed file raises in either mode.
+parse_errors = (ValueError,) + ((ijson.JSONError,) if ijson is not None else ())
@@ -0,0 +1,356 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+
+import corpus_io
+import corpus_text
+from compile_corpus import load_test
+from corpus_cache import file_hash, source_hash
+from corpus_runner import add_runner_args, data_dir, files_from_args, print_report, profile_options, run_batch
+from corpus_walk import iter_nodes
+
+# Near-duplicate question detection across the question banks.
+# Every question text (questionEnglish / questionNepali, or the context of a
+# math problem; its sub-questions mean nothing on their own) is cut into
+# character shingles of its normalised text (corpus_text.normalize_text) and
+# summarised by a MinHash signature. Questions with the same signature are
+# matched once, as a group. LSH banding puts signatures that agree on a whole
+# band in the same bucket, so only groups sharing a bucket are compared, each
+# pair once: the work grows with the number of questions, not with its square.
+# A bucket shared by more than MAX_BUCKET_GROUPS different signatures is
+# boilerplate and is skipped (the run says how many). Candidate pairs whose
+# estimated Jaccard similarity (share of equal signature slots) reaches
+# --threshold are joined into clusters; English is compared with English and
+# Nepali with Nepali, and a pair counts when either language is close enough.
+#
+# Signatures use one-permutation hashing: each shingle is hashed once and
+# lands in one of NUM_HASHES bins, which keep their minimum; empty bins borrow
+# from the next filled bin (rotation densification). That is one hash per
+# shingle instead of one per shingle per permutation, fast enough in plain
+# Python.
+#
+# Signatures are kept in build/dedupe-signatures.json per file and content
+# hash, so only new or changed banks are read and signed; they are then
+# looked up against the stored index. Questions within one test are not
+# compared with each other (English passages share their wording by design).
+#
+# --block-above S exits 1 when a new or changed bank has a question at least S
+# similar to one in another bank, and leaves that bank out of the store so it
+# is checked again next time. Run it ahead of the import to keep duplicates out:
+#   python scripts/dedupe_corpus.py --block-above 0.9 && node scripts/import-all-tests.mjs
+#
+# build/duplicates.json:
+# {"threshold": 0.7, "clusters": [[{"testId", "path", "text", "similarity"}, ...], ...]}
+#
+# Usage:
+#   python scripts/dedupe_corpus.py                    # report clusters
+#   python scripts/dedupe_corpus.py --threshold 0.6    # looser matching
+#   python scripts/dedupe_corpus.py --rebuild          # re-sign every bank
+
+STORE_VERSION = 1
+
+build_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build"))
+store_path = os.path.join(build_dir, "dedupe-signatures.json")
+report_path = os.path.join(build_dir, "duplicates.json")
+
+SHINGLE_CHARS = 5
+NUM_HASHES = 128
+BANDS = 32
+ROWS = NUM_HASHES // BANDS
+
+# Shorter texts ("Define force.") recur everywhere and say nothing about a bank
+MIN_TEXT_CHARS = 30
+
+DEFAULT_THRESHOLD = 0.7
+
+# Distinct signatures in one LSH bucket beyond which the bucket is skipped (and counted)
+MAX_BUCKET_GROUPS = 200
+
+SNIPPET_CHARS = 100
+
+# Stored signatures are only reused while this file and the text normalisation are unchanged
+SIGNATURE_KEY = source_hash(__file__, corpus_text.__file__)
+
+LANGUAGES = {"en": ("questionEnglish", "English"), "ne": ("questionNepali", "Nepali")}
+
+SLOT_BITS = NUM_HASHES.bit_length() - 1
+SIGNATURE = struct.Struct(f"<{NUM_HASHES}Q")
+
+
+def shingles(text):
+    text = corpus_text.normalize_text(text)
+    if len(text) < MIN_TEXT_CHARS:
+        return set()
+    return {text[i:i + SHINGLE_CHARS] for i in range(len(text) - SHINGLE_CHARS + 1)}
+
+
+def signature(shingle_set):
+    """One-permutation MinHash of a shingle set, as a tuple of NUM_HASHES ints."""
+    bins = [None] * NUM_HASHES
+    for shingle in shingle_set:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        slot, value = h & (NUM_HASHES - 1), h >> SLOT_BITS
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+    # Rotation densification: an empty bin takes the next filled bin's value,
+    # offset by the distance so borrowed values only match borrowed values
+    filled = [i for i, value in enumerate(bins) if value is not None]
+    if not filled:
+        return None
+    result = list(bins)
+    for i in range(NUM_HASHES):
+        if result[i] is None:
+            distance = 1
+            while bins[(i + distance) % NUM_HASHES] is None:
+                distance += 1
+            result[i] = bins[(i + distance) % NUM_HASHES] + (distance << (64 - SLOT_BITS))
+    return tuple(value & 0xFFFFFFFFFFFFFFFF for value in result)
+
+
+def encode_signature(values):
+    return base64.b64encode(SIGNATURE.pack(*values)).decode("ascii")
+
+
+def decode_signature(encoded):
+    return SIGNATURE.unpack(base64.b64decode(encoded))
+
+
+def question_texts(node):
+    """{"en": text, "ne": text} for a question node or math problem."""
+    context = node.get("context") if isinstance(node.get("context"), dict) else {}
+    texts = {}
+    for language, (key, context_key) in LANGUAGES.items():
+        text = node.get(key) if isinstance(node.get(key), str) else context.get(context_key)
+        if isinstance(text, str) and text.strip():
+            texts[language] = text
+    return texts
+
+
+def sign_test(file_path):
+    """Signatures for one test file. Returns {"changes": questions signed, "testId", "questions": [...]}."""
+    compiled = load_test(file_path)
+    questions = []
+    for node, path in iter_nodes(compiled["questions"]):
+        # A math sub-question ("Find the area of the triangle.") is its problem's context
+        if "sub_questions" in path:
+            continue
+        signatures = {}
+        texts = question_texts(node)
+        for language, text in texts.items():
+            values = signature(shingles(text))
+            if values:
+                signatures[language] = encode_signature(values)
+        if signatures:
+            text = texts.get("en") or texts.get("ne")
+            questions.append({
+                "path": "/".join(map(str, path)),
+                "text": " ".join(text.split())[:SNIPPET_CHARS],
+                "signatures": signatures,
+            })
+    return {"changes": len(questions), "testId": compiled["testId"], "questions": questions}
+
+
+# --- Store ------------------------------------------------------------------
+
+def load_store(path):
+    try:
+        store = corpus_io.load_json(path)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if store.get("version") != STORE_VERSION or store.get("key") != SIGNATURE_KEY:
+        return {}
+    return store.get("files", {})
+
+
+def save_store(path, files):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    corpus_io.write_bytes(path, corpus_io.dumps_compact(
+        {"version": STORE_VERSION, "key": SIGNATURE_KEY, "files": dict(sorted(files.items()))}))
+
+
+# --- Matching ---------------------------------------------------------------
+
+def similarity(a, b):
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def find_pairs(questions, threshold):
+    """Question pairs from different tests at or above threshold.
+
+    Returns ({(i, j): similarity}, number of oversized buckets skipped). A
+    question repeated in N banks costs N, not N², comparisons: each member of
+    a same-signature group is paired with one member of another test, which
+    puts them all in one cluster.
+    """
+    pairs = {}
+
+    def add(i, j, score):
+        pair = (i, j) if i < j else (j, i)
+        if score > pairs.get(pair, 0):
+            pairs[pair] = score
+
+    oversized = 0
+    for language in LANGUAGES:
+        groups = {}
+        for index, question in enumerate(questions):
+            values = question["values"].get(language)
+            if values:
+                groups.setdefault(values, []).append(index)
+
+        # Per group, up to two members from different tests: a partner for any member
+        anchors = []
+        for members in groups.values():
+            first = members[0]
+            other = next((i for i in members if questions[i]["testId"] != questions[first]["testId"]), None)
+            anchors.append((first,) if other is None else (first, other))
+
+        def partner(group, i):
+            return next((j for j in anchors[group] if questions[j]["testId"] != questions[i]["testId"]), None)
+
+        signatures = list(groups)
+        members_of = list(groups.values())
+        for group, members in enumerate(members_of):
+            for i in members:
+                j = partner(group, i)
+                if j is not None:
+                    add(i, j, 1.0)
+
+        buckets = {}
+        for group, values in enumerate(signatures):
+            for band in range(BANDS):
+                buckets.setdefault((band, values[band * ROWS:(band + 1) * ROWS]), []).append(group)
+
+        scored = set()
+        for bucket in buckets.values():
+            if len(bucket) < 2:
+                continue
+            # A band shared by this many different questions is boilerplate; real
+            # near-duplicates still meet in their other bands
+            if len(bucket) > MAX_BUCKET_GROUPS:
+                oversized += 1
+                continue
+            for position, a in enumerate(bucket):
+                for b in bucket[position + 1:]:
+                    if (a, b) in scored:
+                        continue
+                    scored.add((a, b))
+                    score = similarity(signatures[a], signatures[b])
+                    if score < threshold:
+                        continue
+                    for i in members_of[a]:
+                        j = partner(b, i)
+                        if j is not None:
+                            add(i, j, score)
+                    for i in members_of[b]:
+                        j = partner(a, i)
+                        if j is not None:
+                            add(i, j, score)
+    return pairs, oversized
+
+
+def clusters_of(pairs):
+    """Connected components of the pair graph, largest first."""
+    parent = {}
+
+    def root(i):
+        while parent.setdefault(i, i) != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        parent[root(i)] = root(j)
+    groups = {}
+    for i in parent:
+        groups.setdefault(root(i), []).append(i)
+    return sorted((sorted(members) for members in groups.values()), key=lambda members: (-len(members), members))
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Find near-duplicate questions across the banks."))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"minimum estimated Jaccard similarity to report (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--block-above", type=float, metavar="S",
+                        help="exit 1 if a new or changed bank duplicates another bank at similarity >= S")
+    parser.add_argument("--store", default=store_path, help=f"signature store (default: {store_path})")
+    parser.add_argument("--out", default=report_path, help=f"cluster report (default: {report_path})")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the store and re-sign every bank")
+    args = parser.parse_args(argv)
+
+    stored = {} if args.rebuild else load_store(args.store)
+    files = files_from_args(args)
+    hashes = {os.path.basename(path): file_hash(path) for path in files}
+    changed = [path for path in files
+               if (stored.get(os.path.basename(path)) or {}).get("hash") != hashes[os.path.basename(path)]]
+
+    report = run_batch(sign_test, changed, workers=args.workers, profile=profile_options(args))
+    if changed:
+        print_report(report, label="questions signed")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if report["failedFiles"]:
+        return 2
+    signed = {os.path.basename(entry["file"]): entry["result"] for entry in report["files"]}
+
+    # Banks outside this run's selection stay in the index they're compared against,
+    # as long as they're still in data/
+    current = {name: entry for name, entry in stored.items()
+               if name not in signed and (name in hashes or os.path.isfile(os.path.join(data_dir, name)))}
+    for name, result in signed.items():
+        current[name] = {"hash": hashes[name], "testId": result["testId"], "questions": result["questions"]}
+
+    questions = []
+    for name, entry in sorted(current.items()):
+        for question in entry["questions"]:
+            values = {language: decode_signature(encoded) for language, encoded in question["signatures"].items()}
+            questions.append({"file": name, "testId": entry["testId"], "path": question["path"],
+                              "text": question["text"], "values": values})
+
+    pairs, oversized = find_pairs(questions, min(args.threshold, args.block_above or args.threshold))
+    best = {}
+    for (i, j), score in pairs.items():
+        best[i] = max(best.get(i, 0), score)
+        best[j] = max(best.get(j, 0), score)
+    clusters = clusters_of({pair: score for pair, score in pairs.items() if score >= args.threshold})
+
+    print(f"{len(signed)} new or changed files signed; {len(questions)} questions in the index")
+    for members in clusters:
+        print(f"\n{len(members)} similar questions:")
+        for i in members:
+            question = questions[i]
+            print(f"  {best[i]:.2f}  {question['testId']} {question['path']}: {question['text']}")
+    print(f"\n{len(clusters)} clusters at similarity >= {args.threshold}")
+    if oversized:
+        print(f"⚠️  {oversized} LSH buckets with over {MAX_BUCKET_GROUPS} different questions skipped")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    corpus_io.write_json(args.out, {
+        "threshold": args.threshold,
+        "clusters": [[{"testId": questions[i]["testId"], "path": questions[i]["path"], "text": questions[i]["text"],
+                       "similarity": round(best[i], 3)} for i in members] for members in clusters],
+    })
+
+    blocked = set()
+    if args.block_above is not None:
+        for (i, j), score in pairs.items():
+            if score < args.block_above:
+                continue
+            # Only new or changed banks are blocked; the rest was accepted on an earlier run
+            for k in (i, j):
+                if questions[k]["file"] in signed:
+                    blocked.add(questions[k]["file"])
+        for name in sorted(blocked):
+            print(f"⛔ {name}: duplicates questions of another bank (similarity >= {args.block_above})")
+            del current[name]
+
+    save_store(args.store, current)
+    return 1 if blocked else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,50 @@
 ﻿// Universal script to sync ALL test JSON files from data/ folder with database
 // Usage: node scripts/import-all-tests.mjs
-// This script will: ADD new tests, UPDATE existing tests, REMOVE tests not in data folder
+//        node scripts/import-all-tests.mjs --compiled   (import build/corpus/ from scripts/compile_corpus.py)
+//        node scripts/import-all-tests.mjs --dry-run    (report what would change, write nothing)
+//        node scripts/import-all-tests.mjs --full       (rewrite every test even if unchanged)
+//        node scripts/import-all-tests.mjs --only a,b   (sync just these files, with or without .json;
+//                                                        with --compiled, test ids; nothing is removed)
+// This script will: ADD new tests, UPDATE changed tests, REMOVE tests not in data folder
+// Each practice_tests/questions doc stores the contentHash of the test it was written from, so
+// unchanged tests cost nothing and all writes go out as one bulkWrite per collection.
+// After any write it bumps the test catalog version so running servers reload /api/tests.
 // Env: MONGODB_URI (default: mongodb://127.0.0.1:47017/see_exam_system)
 
 import { MongoClient } from "mongodb"
+import crypto from "node:crypto"
 import fs from "node:fs/promises"
 import path from "node:path"
 
 const uri = process.env.MONGODB_URI || "mongodb://127.0.0.1:47017/see_exam_system"
 
+// Compiled artifacts are already normalised to one schema, so no layout sniffing is needed
+const useCompiled = process.argv.includes("--compiled")
+const compiledDir = path.join("build", "corpus")
+const COMPILED_SCHEMA_VERSION = 1
+
+const dryRun = process.argv.includes("--dry-run")
+const fullSync = process.argv.includes("--full")
+
+// Used by scripts/watch_corpus.py to push one saved test
+const onlyIndex = process.argv.indexOf("--only")
+const only = onlyIndex === -1 ? null : new Set((process.argv[onlyIndex + 1] || "").split(",").filter(Boolean).map(name => name.replace(/\.json$/, "")))
+
+// analytics document whose version the app's test catalog cache watches (lib/test-catalog.ts)
+const CATALOG_STAMP_ID = "test_catalog"
+
+// Hash of exactly what gets written for a test; bumping SYNC_VERSION forces a rewrite of everything
+const SYNC_VERSION = 1
+
+function testContentHash({ practiceDoc, questionsDoc }) {
+  const { createdAt, updatedAt, ...practice } = practiceDoc
+  return crypto
+    .createHash("sha256")
+    .update(JSON.stringify([SYNC_VERSION, practice, questionsDoc.questions]))
+    .digest("hex")
+    .slice(0, 32)
+}
+
 function normalizeExtendedJSON(value) {
   if (Array.isArray(value)) return value.map(normalizeExtendedJSON)
   if (value && typeof value === "object") {
@@ -26,6 +62,27 @@ function normalizeExtendedJSON(value) {
   return value
 }
 
+async function loadCompiledTest(filePath) {
+  try {
+    const compiled = JSON.parse(await fs.readFile(filePath, "utf8"))
+    if (compiled.schemaVersion !== COMPILED_SCHEMA_VERSION) {
+      console.warn(`     Skipping ${path.basename(filePath)} - schemaVersion ${compiled.schemaVersion}, expected ${COMPILED_SCHEMA_VERSION} (re-run python scripts/compile_corpus.py)`)
+      return null
+    }
+    console.log(` Loaded: ${path.basename(filePath)} (${compiled.layout}, ${compiled.questionCount} questions)`)
+    return {
+      practiceDoc: normalizeExtendedJSON(compiled.practice),
+      questionsDoc: { testId: compiled.testId, questions: compiled.questions },
+      testId: compiled.testId,
+      fileName: compiled.sourceFile,
+      testType: compiled.layout,
+    }
+  } catch (error) {
+    console.error(`    Error loading ${path.basename(filePath)}:`, error.message)
+    return null
+  }
+}
+
 async function processTestFile(filePath) {
   try {
     console.log(` Processing: ${path.basename(filePath)}`)
@@ -302,7 +359,7 @@ async function processTestFile(filePath) {
 async function importAllTests() {
   console.log(" Syncing database with data/ folder")
   console.log("    Adding new tests")
-  console.log("    Updating existing tests")
+  console.log("    Updating changed tests (unchanged ones are skipped by content hash)")
   console.log("    Removing tests not in data folder")
   console.log("=".repeat(50))
 
@@ -321,9 +378,24 @@ async function importAllTests() {
     return
   }
 
-  // Get all JSON files from data folder
-  const files = await fs.readdir("data")
-  const jsonFiles = files.filter(f => f.endsWith('.json'))
+  // Get all JSON files from data folder (or the compiled artifacts)
+  const sourceDir = useCompiled ? compiledDir : "data"
+  let files
+  try {
+    files = await fs.readdir(sourceDir)
+  } catch {
+    console.log(` ${sourceDir}/ not found. Run 'python scripts/compile_corpus.py' first.`)
+    return
+  }
+  // Skip dotfiles such as the Python pipeline's .pipeline-cache.json manifest
+  const jsonFiles = files.filter(f => f.endsWith('.json') && !f.startsWith('.') && !(useCompiled && f === "index.json")
+    && (!only || only.has(f.replace(/\.json$/, ""))))
+
+  if (only && jsonFiles.length === 0) {
+    console.error(` --only matched no files in ${sourceDir}/`)
+    process.exitCode = 1
+    return
+  }
 
   if (jsonFiles.length === 0) {
     console.log("     No JSON files found in data/ folder.")
@@ -340,8 +412,8 @@ async function importAllTests() {
   const failedFiles = []
 
   for (const file of jsonFiles) {
-    const filePath = path.join("data", file)
-    const result = await processTestFile(filePath)
+    const filePath = path.join(sourceDir, file)
+    const result = useCompiled ? await loadCompiledTest(filePath) : await processTestFile(filePath)
     if (result) {
       processedTests.push(result)
     } else {
@@ -377,99 +449,132 @@ async function importAllTests() {
     const practiceTests = db.collection("practice_tests")
     const questions = db.collection("questions")
 
-    // Get all existing tests from database
-    const existingTests = await practiceTests.find({}).toArray()
-    const existingTestIds = new Set(existingTests.map(t => t._id))
+    // Only the ids and stored hashes are read back, never the question bodies
+    const existingTests = await practiceTests.find({}, { projection: { _id: 1, contentHash: 1, subject: 1, title: 1 } }).toArray()
+    const existingQuestions = await questions.find({}, { projection: { testId: 1, contentHash: 1 } }).toArray()
+    const practiceHashes = new Map(existingTests.map(t => [t._id, t.contentHash]))
+    const questionHashes = new Map(existingQuestions.map(q => [q.testId, q.contentHash]))
 
     // Get test IDs from data folder
     const dataFolderTestIds = new Set(processedTests.map(t => t.testId))
 
-    // Find tests to remove (in database but not in data folder)
-    const testsToRemove = existingTests.filter(t => !dataFolderTestIds.has(t._id))
-
-    console.log(`\n Database Analysis:`)
-    console.log(`   Existing tests in database: ${existingTests.length}`)
-    console.log(`   Tests in data folder: ${processedTests.length}`)
-    console.log(`   Tests to remove: ${testsToRemove.length}`)
+    // Find tests to remove (in database but not in data folder); --only never removes anything
+    const testsToRemove = only ? [] : existingTests.filter(t => !dataFolderTestIds.has(t._id))
+    const testIdsToRemove = testsToRemove.map(t => t._id)
+    const orphanedQuestionIds = only ? [] : existingQuestions
+      .filter(q => !dataFolderTestIds.has(q.testId) && !practiceHashes.has(q.testId))
+      .map(q => q.testId)
+
+    const added = []
+    const updated = []
+    const unchanged = []
+    const practiceOps = []
+    const questionOps = []
+    const now = new Date()
+
+    for (const test of processedTests) {
+      const { practiceDoc, questionsDoc, testId } = test
+      const hash = testContentHash(test)
+      const practiceCurrent = !fullSync && practiceHashes.get(testId) === hash
+      const questionsCurrent = !fullSync && questionHashes.get(testId) === hash
+
+      if (practiceCurrent && questionsCurrent) {
+        unchanged.push(test)
+        continue
+      }
+      ;(practiceHashes.has(testId) ? updated : added).push(test)
 
-    if (testsToRemove.length > 0) {
-      console.log(`\n  Removing ${testsToRemove.length} tests no longer in data folder:`)
-      for (const test of testsToRemove) {
-        console.log(`   - ${test._id} (${test.subject}: ${test.title})`)
+      if (!practiceCurrent) {
+        const { _id: practiceId, createdAt, updatedAt, ...practiceRest } = practiceDoc
+        practiceOps.push({
+          updateOne: {
+            filter: { _id: practiceId },
+            update: {
+              $set: { ...practiceRest, contentHash: hash, updatedAt: now },
+              $setOnInsert: { createdAt: createdAt instanceof Date ? createdAt : now },
+            },
+            upsert: true,
+          },
+        })
+      }
+      if (!questionsCurrent) {
+        questionOps.push({
+          updateOne: {
+            filter: { testId },
+            update: { $set: { testId, questions: questionsDoc.questions, contentHash: hash } },
+            upsert: true,
+          },
+        })
       }
     }
 
-    let importedCount = 0
-    let updatedCount = 0
-    let removedCount = 0
-
-    // Remove tests not in data folder
-    if (testsToRemove.length > 0) {
-      const testIdsToRemove = testsToRemove.map(t => t._id)
+    if (testIdsToRemove.length > 0) {
+      practiceOps.push({ deleteMany: { filter: { _id: { $in: testIdsToRemove } } } })
+    }
+    if (testIdsToRemove.length + orphanedQuestionIds.length > 0) {
+      questionOps.push({ deleteMany: { filter: { testId: { $in: [...testIdsToRemove, ...orphanedQuestionIds] } } } })
+    }
 
-      // Remove from practice_tests collection
-      const practiceDeleteResult = await practiceTests.deleteMany({
-        _id: { $in: testIdsToRemove }
-      })
+    console.log(`\n Database Analysis${fullSync ? " (--full)" : ""}:`)
+    console.log(`   Existing tests in database: ${existingTests.length}`)
+    console.log(`   Tests in data folder: ${processedTests.length}`)
+    console.log(`   New: ${added.length}, changed: ${updated.length}, unchanged: ${unchanged.length}, to remove: ${testsToRemove.length}`)
 
-      // Remove from questions collection
-      const questionsDeleteResult = await questions.deleteMany({
-        testId: { $in: testIdsToRemove }
-      })
+    for (const { testId, fileName, testType } of added) {
+      console.log(`   + ${testId} (${testType} test from ${fileName})`)
+    }
+    for (const { testId, fileName, testType } of updated) {
+      console.log(`   ~ ${testId} (${testType} test from ${fileName})`)
+    }
+    for (const test of testsToRemove) {
+      console.log(`   - ${test._id} (${test.subject}: ${test.title})`)
+    }
 
-      removedCount = practiceDeleteResult.deletedCount
-      console.log(`    Removed ${removedCount} practice tests`)
-      console.log(`    Removed ${questionsDeleteResult.deletedCount} question sets`)
+    if (dryRun) {
+      console.log(`\n Dry run: ${practiceOps.length + questionOps.length} write operations skipped`)
+      return
     }
 
-    // Import/update tests from data folder
-    console.log(`\n Processing tests from data folder:`)
-    for (const { practiceDoc, questionsDoc, testId, fileName, testType } of processedTests) {
+    // One round trip per collection; unordered so one bad document doesn't block the rest
+    const results = []
+    for (const [name, collection, ops] of [["practice_tests", practiceTests, practiceOps], ["questions", questions, questionOps]]) {
+      if (ops.length === 0) continue
       try {
-        // Check if test already exists (after removals)
-        const existingTest = await practiceTests.findOne({ _id: testId })
-        const isUpdate = !!existingTest
-
-        // Upsert practice test
-        const { _id: practiceId, createdAt, updatedAt, ...practiceRest } = practiceDoc
-        await practiceTests.updateOne(
-          { _id: practiceId },
-          {
-            $set: { ...practiceRest, updatedAt: new Date() },
-            $setOnInsert: { createdAt: createdAt instanceof Date ? createdAt : new Date() },
-          },
-          { upsert: true }
-        )
-
-        // Upsert questions
-        await questions.updateOne(
-          { testId },
-          { $set: { testId, questions: questionsDoc.questions } },
-          { upsert: true }
-        )
-
-        if (isUpdate) {
-          console.log(`    Updated: ${testId} (${testType} test from ${fileName})`)
-          updatedCount++
-        } else {
-          console.log(`    Imported: ${testId} (${testType} test from ${fileName})`)
-          importedCount++
-        }
+        const result = await collection.bulkWrite(ops, { ordered: false })
+        console.log(`    ${name}: ${result.upsertedCount} inserted, ${result.modifiedCount} modified, ${result.deletedCount} deleted`)
+        results.push(result)
       } catch (error) {
-        console.error(`    Failed to import ${testId}:`, error.message)
+        console.error(`    ${name} bulkWrite failed:`, error.message)
+        process.exitCode = 1
+        for (const writeError of error.writeErrors || []) {
+          console.error(`      op ${writeError.index}: ${writeError.errmsg}`)
+        }
       }
     }
 
+    // Running servers reload their cached test list (lib/test-catalog.ts) when this version moves
+    if (results.some(r => r.upsertedCount + r.modifiedCount + r.deletedCount > 0)) {
+      const stamp = await db.collection("analytics").findOneAndUpdate(
+        { _id: CATALOG_STAMP_ID },
+        { $inc: { version: 1 }, $set: { updatedAt: now } },
+        { upsert: true, returnDocument: "after" }
+      )
+      console.log(`    Test catalog version: ${stamp?.version}`)
+    }
+
+    const removedCount = testsToRemove.length
+
     console.log("\n" + "=".repeat(50))
     console.log(" Sync Summary:")
-    console.log(`   New tests imported: ${importedCount}`)
-    console.log(`   Existing tests updated: ${updatedCount}`)
+    console.log(`   New tests imported: ${added.length}`)
+    console.log(`   Existing tests updated: ${updated.length}`)
+    console.log(`   Unchanged tests skipped: ${unchanged.length}`)
     console.log(`   Tests removed: ${removedCount}`)
-    console.log(`   Total processed: ${importedCount + updatedCount}`)
+    console.log(`   Documents written: ${results.reduce((n, r) => n + r.upsertedCount + r.modifiedCount + r.deletedCount, 0)}`)
     console.log(`   Failed files: ${failedFiles.length}`)
 
     // Show final database state by subject
-    const finalTests = await practiceTests.find({}).toArray()
+    const finalTests = await practiceTests.find({}, { projection: { subject: 1 } }).toArray()
     const testsBySubject = finalTests.reduce((acc, test) => {
       acc[test.subject] = (acc[test.subject] || 0) + 1
       return acc
@@ -502,6 +607,7 @@ async function importAllTests() {
 
   } catch (error) {
     console.error(" Database error:", error)
+    process.exitCode = 1
   } finally {
     await client.close()
   }
@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+from functools import partial
+
+import corpus_io
+import corpus_profile
+from corpus_pipeline import english_parens_pattern, nepali_answer_fields, nepali_to_english
+from corpus_runner import add_runner_args, files_from_args, print_profile, profile_options, run_batch
+from corpus_walk import iter_nodes, iter_shallow_nodes, parse_errors
+
+# Bilingual corpus linter.
+# Every enabled rule is evaluated in a single walk per file, and paths are
+# only formatted for nodes that actually have an issue. With --stream the
+# file is never held as a tree: rules see one object at a time, rebuilt from
+# parse events with only its scalar members (corpus_walk.iter_shallow_nodes),
+# so rules must ignore values that aren't strings or numbers.
+#
+# Usage:
+#   python scripts/lint_corpus.py                          # text report, all files
+#   python scripts/lint_corpus.py --format sarif > lint.sarif
+#   python scripts/lint_corpus.py --rule english-devanagari --subject social
+#   python scripts/lint_corpus.py --stream                 # flat memory (faster with ijson installed)
+#
+# Exit codes: 0 clean, 1 errors found (or warnings with --strict),
+# 2 a file could not be read or parsed.
+
+Rule = namedtuple("Rule", ["id", "level", "description", "check"])
+
+# Registration order is report order.
+RULES = {}
+
+
+def rule(rule_id, level, description):
+    """Register check(node, path) -> iterable of (key, message) as a lint rule."""
+    def register(fn):
+        RULES[rule_id] = Rule(rule_id, level, description, fn)
+        return fn
+    return register
+
+
+def format_path(path, key=None):
+    out = ""
+    for part in tuple(path) + ((key,) if key is not None else ()):
+        out += f"[{part}]" if isinstance(part, int) else (f".{part}" if out else part)
+    return out
+
+
+devanagari_pattern = re.compile(r"[ऀ-ॿ]")
+nepali_digit_pattern = re.compile(r"[०-९]")
+localized_key_pattern = re.compile(r"^(.*)(Nepali|English)$")
+
+
+def preview(value, limit=60):
+    return value if len(value) <= limit else value[:limit] + "..."
+
+
+@rule("english-devanagari", "error", "English field contains Devanagari text")
+def check_english_devanagari(node, path):
+    for key, value in node.items():
+        if key.endswith("English") and isinstance(value, str) and devanagari_pattern.search(value):
+            yield key, f"Devanagari text in {key}: {preview(value)}"
+
+
+@rule("numeral-mismatch", "error", "Nepali/English numerals do not agree")
+def check_numeral_mismatch(node, path):
+    for key, value in node.items():
+        if not key.endswith("English"):
+            continue
+        if isinstance(value, str):
+            if nepali_digit_pattern.search(value):
+                yield key, f"Nepali numerals in {key}: {preview(value)}"
+        elif isinstance(value, int) and not isinstance(value, bool):
+            nepali = node.get(key[:-len("English")] + "Nepali")
+            if isinstance(nepali, str) and nepali.strip().translate(nepali_to_english) != str(value):
+                yield key, f"{key} is {value} but its Nepali pair is '{nepali}'"
+
+
+@rule("missing-pair", "warning", "Nepali/English field without its counterpart")
+def check_missing_pair(node, path):
+    for key in node:
+        match = localized_key_pattern.match(key)
+        if not match:
+            continue
+        other = match.group(1) + ("English" if match.group(2) == "Nepali" else "Nepali")
+        if other not in node:
+            yield key, f"{key} has no {other}"
+
+
+@rule("nepali-answer-ascii-key", "warning", "ASCII key inside a Nepali answer")
+def check_nepali_answer_ascii_key(node, path):
+    if not any(field in path for field in nepali_answer_fields):
+        return
+    for key in node:
+        if key.isascii():
+            yield key, f"Key '{key}' is English"
+
+
+@rule("english-parens", "warning", "Nepali option keeps an English translation in parentheses")
+def check_english_parens(node, path):
+    if len(path) < 2 or path[-2] != "options":
+        return
+    value = node.get("Nepali")
+    if isinstance(value, str) and english_parens_pattern.search(value):
+        yield "Nepali", f"English in parentheses: {preview(value)}"
+
+
+def issues_at(node, path, rules):
+    for r in rules:
+        for key, message in r.check(node, path):
+            yield {
+                "rule": r.id,
+                "level": r.level,
+                "path": format_path(path, key),
+                "message": message,
+            }
+
+
+def lint_tree(data, rules):
+    issues = []
+    for node, path in iter_nodes(data):
+        issues.extend(issues_at(node, path, rules))
+    return issues
+
+
+def lint_stream(f, rules):
+    found = []
+    for order, node, path in iter_shallow_nodes(f):
+        found.extend((order, i, issue) for i, issue in enumerate(issues_at(node, path, rules)))
+    # Objects close children-first; report in document order like lint_tree().
+    found.sort(key=lambda item: item[:2])
+    return [issue for _, _, issue in found]
+
+
+def lint_file(file_path, rule_ids=None, stream=False):
+    """Lint one test file. Returns {"changes": issue count, "issues": [...]}."""
+    rules = [r for r in RULES.values() if rule_ids is None or r.id in rule_ids]
+    try:
+        if stream:
+            # Parsing and linting interleave here, so both count as walk time
+            with open(file_path, "rb") as f, corpus_profile.timed("walk"):
+                corpus_profile.count("bytesIn", os.fstat(f.fileno()).st_size)
+                issues = lint_stream(f, rules)
+        else:
+            data = corpus_io.load_json(file_path)
+            with corpus_profile.timed("walk"):
+                issues = lint_tree(data, rules)
+    except (OSError,) + parse_errors as e:
+        raise RuntimeError(f"cannot read {os.path.basename(file_path)}: {e}")
+    return {"changes": len(issues), "issues": issues}
+
+
+def issues_of(report):
+    for entry in report["files"]:
+        if entry["result"]:
+            for issue in entry["result"]["issues"]:
+                yield entry["file"], issue
+
+
+def to_json(report):
+    return {
+        "files": report["totalFiles"],
+        "failedFiles": report["failedFiles"],
+        "issues": [dict(issue, file=file_name) for file_name, issue in issues_of(report)],
+    }
+
+
+def to_sarif(report, rule_ids):
+    rules = [r for r in RULES.values() if rule_ids is None or r.id in rule_ids]
+    return {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {
+                "name": "lint_corpus",
+                "rules": [{"id": r.id, "shortDescription": {"text": r.description},
+                           "defaultConfiguration": {"level": r.level}} for r in rules],
+            }},
+            "results": [{
+                "ruleId": issue["rule"],
+                "level": issue["level"],
+                "message": {"text": issue["message"]},
+                "locations": [{
+                    "physicalLocation": {"artifactLocation": {"uri": f"data/{file_name}"}},
+                    "logicalLocations": [{"fullyQualifiedName": issue["path"]}],
+                }],
+            } for file_name, issue in issues_of(report)],
+        }],
+    }
+
+
+def print_text(report):
+    for file_name, issue in issues_of(report):
+        print(f"{file_name}: {issue['level']} [{issue['rule']}] {issue['path']}: {issue['message']}")
+    for entry in report["files"]:
+        if entry["error"]:
+            print(f"{entry['file']}: FAILED ({entry['error']})")
+    print(f"{report['totalChanges']} issues across {report['totalFiles']} files in {report['seconds']:.2f}s")
+
+
+def exit_code(report, strict=False):
+    if report["failedFiles"]:
+        return 2
+    levels = {issue["level"] for _, issue in issues_of(report)}
+    if "error" in levels or (strict and levels):
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Lint the bilingual question banks."))
+    parser.add_argument("--rule", action="append", choices=list(RULES), help="only this rule (repeatable)")
+    parser.add_argument("--format", choices=["text", "json", "sarif"], default="text")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    parser.add_argument("--stream", action="store_true", help="lint from parse events instead of a loaded tree")
+    args = parser.parse_args(argv)
+
+    rule_ids = set(args.rule) if args.rule else None
+    report = run_batch(partial(lint_file, rule_ids=rule_ids, stream=args.stream), files_from_args(args),
+                       workers=args.workers, profile=profile_options(args))
+
+    if args.format == "text":
+        print_text(report)
+        print_profile(report)
+    else:
+        output = to_json(report) if args.format == "json" else to_sarif(report, rule_ids)
+        json.dump(output, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(to_sarif(report, rule_ids) if args.format == "sarif" else to_json(report),
+                      f, ensure_ascii=False, indent=2)
+    return exit_code(report, args.strict)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
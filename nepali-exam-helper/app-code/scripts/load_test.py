@@ -0,0 +1,609 @@
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+import corpus_io
+from compile_corpus import load_test
+from corpus_runner import SUBJECTS, discover_files
+from corpus_walk import iter_nodes
+from stub_openai import DEFAULT_PORT as DEFAULT_LLM_PORT, add_stub_args, start_stub
+
+# Exam-start load test: replays student sessions against a running server.
+# Sessions are built from the banks in data/ (each compiled as
+# compile_corpus.py does): every question with a reference answer is answered,
+# left blank, answered with the reference, or answered in the student's own
+# words, in the proportions of ANSWER_MIX. Each simulated student, like the
+# exam page:
+#   1. loads the paper              GET  /api/questions/<testId>
+#   2. makes its first full write   POST /api/progress/sync  {email, progress}
+#   3. answers over --session seconds, syncing deltas the way lib/progress-sync.ts
+#      coalesces them (2 s after the last answer, at most 10 s apart); a 409
+#      falls back to a full write
+#   4. submits: every free-response answer is graded in one
+#      POST /api/grade/batch (or one POST /api/grade each with --grade single,
+#      six at a time like a browser)
+#   5. records the attempt          POST /api/progress/sync  {email, delta: {attempts}}
+# All students start within --ramp seconds of each other (0 = 10:00 sharp).
+#
+# Run it against a production build (next build && next start) backed by a
+# local mongod with the banks imported, and with model grading pointed at the
+# stub (scripts/stub_openai.py, or --stub-llm to serve it from this process):
+#   mongod --dbpath /tmp/loadtest-db --port 47017
+#   MONGODB_URI=mongodb://127.0.0.1:47017/see_loadtest node scripts/import-all-tests.mjs --compiled
+#   MONGODB_URI=mongodb://127.0.0.1:47017/see_loadtest OPENAI_API_KEY=stub \
+#     OPENAI_BASE_URL=http://127.0.0.1:8787/v1 npm run start
+# Progress is written under loadtest-<run>-<n>@example.com, so use a throwaway
+# database.
+#
+# The report gives, per endpoint, requests, throughput, error rate and
+# p50/p95/p99/max latency; "grade item" is the time from submitting to each
+# answer's result. A 409 from /api/progress/sync is part of the protocol, not
+# an error. --json writes the report; --max-p95 / --max-error-rate make the
+# run fail (exit 1) past a limit.
+#
+# Usage:
+#   python scripts/load_test.py --stub-llm                           # 100 students, every bank
+#   python scripts/load_test.py --students 1000 --ramp 0 --test see_2081_math_practice_1_final_verified
+#   python scripts/load_test.py --students 300 --stub-llm --llm-latency 4 --llm-rate-429 0.1
+#   python scripts/load_test.py --max-p95 sync=500 --max-error-rate 0.01 --json build/load-report.json
+
+DEFAULT_BASE_URL = "http://127.0.0.1:3000"
+
+# Share of the gradable questions a student leaves blank, answers with the reference answer
+# (settled by the grading spec / answer index) or answers in their own words (the model)
+ANSWER_MIX = {"blank": 0.15, "reference": 0.45, "own": 0.40}
+
+# lib/progress-sync.ts
+SYNC_DEBOUNCE_SECONDS = 2.0
+SYNC_MAX_WAIT_SECONDS = 10.0
+
+# Keep in sync with MAX_BATCH_ITEMS in app/api/grade/batch/route.ts
+MAX_BATCH_ITEMS = 24
+
+# Connections a browser opens to one host: /api/grade requests in flight per student
+BROWSER_CONNECTIONS = 6
+
+REQUEST_TIMEOUT = 120.0
+
+ENDPOINTS = {
+    "questions": "GET /api/questions/[testId]",
+    "sync": "POST /api/progress/sync",
+    "grade": "POST /api/grade",
+    "grade-batch": "POST /api/grade/batch",
+    "grade-item": "grade item",
+}
+
+PERCENTILES = (50, 95, 99)
+
+QUESTION_TEXT_KEYS = ("questionEnglish", "questionNepali", "question", "english", "nepali",
+                      "titleEnglish", "title", "titleNepali")
+
+ANSWER_KEYS = ("answerEnglish", "correctAnswerEnglish", "sampleAnswerEnglish", "answerNepali",
+               "correctAnswerNepali", "sampleAnswerNepali", "correctAnswer", "sampleAnswer", "answer")
+
+MARKS_KEYS = ("marksEnglish", "marks")
+
+OWN_WORDS = ("I think", "In my view", "Basically", "As we learned", "The answer is that", "So")
+
+
+# --- Sessions ------------------------------------------------------------------
+
+def text_of(value):
+    # Writing tasks keep their model answer under {"content": ...}
+    if isinstance(value, dict):
+        value = value.get("content")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def marks_of(node):
+    for key in MARKS_KEYS:
+        try:
+            marks = int(node.get(key))
+        except (TypeError, ValueError):
+            continue
+        if marks > 0:
+            return marks
+    return 1
+
+
+def answer_path(parts):
+    # "<group>.<position>" passes isAnswerPath (lib/progress-sync.ts): two segments, no "." or "$"
+    return f"{parts[0]}.{'_'.join(str(part) for part in parts[1:]) or 'q'}"
+
+
+def paper_of(compiled):
+    """The questions a student can answer in one test: {"testId", "choices", "written"}."""
+    choices = []
+    written = []
+    for node, path in iter_nodes(compiled["questions"]):
+        parts = path.parts()
+        if not parts or not isinstance(parts[0], str):
+            continue
+        options = node.get("options")
+        if isinstance(options, list) and options:
+            ids = [option.get("id", index) if isinstance(option, dict) else index
+                   for index, option in enumerate(options)]
+            choices.append({"path": answer_path(parts), "options": ids})
+            continue
+        question = next((text_of(node.get(key)) for key in QUESTION_TEXT_KEYS if text_of(node.get(key))), None)
+        reference = next((text_of(node.get(key)) for key in ANSWER_KEYS if text_of(node.get(key))), None)
+        if question and reference:
+            written.append({"path": answer_path(parts), "question": question, "reference": reference,
+                            "marks": marks_of(node)})
+    return {"testId": compiled["testId"], "choices": choices, "written": written}
+
+
+def own_words(reference, rng):
+    words = reference.split()
+    if len(words) > 3:
+        # Keep the gist, not the wording: drop and swap a few words
+        words = [word for word in words if rng.random() > 0.2] or words
+        if len(words) > 1:
+            i = rng.randrange(len(words) - 1)
+            words[i], words[i + 1] = words[i + 1], words[i]
+    return f"{rng.choice(OWN_WORDS)} {' '.join(words)} ({rng.randrange(10_000)})"
+
+
+def plan_session(paper, rng, session_seconds):
+    """One student's answers: [(seconds into the session, path, answer, written item or None)]."""
+    events = []
+    for choice in paper["choices"]:
+        if rng.random() < ANSWER_MIX["blank"]:
+            continue
+        events.append((choice["path"], rng.choice(choice["options"]), None))
+    kinds = list(ANSWER_MIX)
+    weights = list(ANSWER_MIX.values())
+    for item in paper["written"]:
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "blank":
+            continue
+        answer = item["reference"] if kind == "reference" else own_words(item["reference"], rng)
+        events.append((item["path"], answer, item))
+    rng.shuffle(events)
+    times = sorted(rng.uniform(0, session_seconds) for _ in events)
+    return [(at, *event) for at, event in zip(times, events)]
+
+
+# --- Measurements --------------------------------------------------------------
+
+class Recorder:
+    """Latency samples and outcomes per endpoint, shared by every student thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}  # endpoint -> [seconds]
+        self.statuses = {}  # endpoint -> {status: count}
+        self.errors = {}  # endpoint -> count
+        self.sources = {}  # grade source -> count
+        self.sessions = {"started": 0, "completed": 0, "failed": 0}
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+
+    def record(self, endpoint, seconds, status, ok):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + (not ok)
+
+    def graded(self, source):
+        with self.lock:
+            self.sources[source] = self.sources.get(source, 0) + 1
+
+    def session(self, outcome):
+        with self.lock:
+            self.sessions[outcome] += 1
+
+
+def percentile(ordered, p):
+    # Nearest rank
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(recorder):
+    elapsed = (recorder.finished_at or time.perf_counter()) - recorder.started_at
+    endpoints = {}
+    for endpoint in ENDPOINTS:
+        samples = sorted(recorder.samples.get(endpoint, []))
+        if not samples:
+            continue
+        errors = recorder.errors.get(endpoint, 0)
+        summary = {
+            "requests": len(samples),
+            "perSecond": round(len(samples) / elapsed, 2) if elapsed else 0,
+            "errors": errors,
+            "errorRate": round(errors / len(samples), 4),
+            "statuses": {str(status): count for status, count in sorted(recorder.statuses[endpoint].items(), key=str)},
+            "maxMs": round(samples[-1] * 1e3, 1),
+        }
+        for p in PERCENTILES:
+            summary[f"p{p}Ms"] = round(percentile(samples, p) * 1e3, 1)
+        endpoints[endpoint] = summary
+    return {"seconds": round(elapsed, 2), "sessions": dict(recorder.sessions),
+            "gradeSources": dict(sorted(recorder.sources.items())), "endpoints": endpoints}
+
+
+def print_summary(report):
+    sessions = report["sessions"]
+    print("=" * 96)
+    print(f"{sessions['completed']}/{sessions['started']} sessions completed in {report['seconds']}s"
+          + (f", {sessions['failed']} failed" if sessions["failed"] else ""))
+    print(f"  {'endpoint':30} {'requests':>8} {'req/s':>7} {'errors':>7} "
+          + " ".join(f"{f'p{p} ms':>8}" for p in PERCENTILES) + f" {'max ms':>8}")
+    for endpoint, summary in report["endpoints"].items():
+        print(f"  {ENDPOINTS[endpoint]:30} {summary['requests']:8} {summary['perSecond']:7.1f} "
+              f"{summary['errorRate']:7.1%} " + " ".join(f"{summary[f'p{p}Ms']:8.0f}" for p in PERCENTILES)
+              + f" {summary['maxMs']:8.0f}")
+    for endpoint, summary in report["endpoints"].items():
+        unusual = {status: count for status, count in summary["statuses"].items() if status != "200"}
+        if unusual:
+            print(f"  {ENDPOINTS[endpoint]}: " + ", ".join(f"{status} x{count}" for status, count in unusual.items()))
+    if report["gradeSources"]:
+        print("  graded by: " + ", ".join(f"{source} {count}" for source, count in report["gradeSources"].items()))
+    if report.get("stub"):
+        stub = report["stub"]
+        print(f"  stub model: {stub['requests']} requests, {stub['rateLimited']} answered 429, "
+              f"peak {stub['peakInFlight']} in flight")
+
+
+def limit_failures(report, max_p95, max_error_rate):
+    failures = []
+    for endpoint, limit_ms in max_p95.items():
+        summary = report["endpoints"].get(endpoint)
+        if summary and summary["p95Ms"] > limit_ms:
+            failures.append(f"{ENDPOINTS[endpoint]} p95 {summary['p95Ms']:.0f} ms > {limit_ms:.0f} ms")
+    if max_error_rate is not None:
+        for endpoint, summary in report["endpoints"].items():
+            if summary["errorRate"] > max_error_rate:
+                failures.append(f"{ENDPOINTS[endpoint]} error rate {summary['errorRate']:.1%} > {max_error_rate:.1%}")
+    return failures
+
+
+# --- Students ------------------------------------------------------------------
+
+class Client:
+    """One keep-alive connection to the server, reopened after a failure."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.connection = None
+
+    def request(self, method, path, body=None, on_line=None):
+        """Returns (status, headers, body bytes). Status 0 is a connection error or timeout.
+
+        With on_line, an NDJSON body is handed over line by line as it streams in.
+        """
+        headers = {"Accept-Encoding": "gzip, deflate, br"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        try:
+            if self.connection is None:
+                self.connection = self.connection_class(self.netloc, timeout=REQUEST_TIMEOUT)
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            if on_line and response.status == 200:
+                chunks = []
+                for line in iter(response.readline, b""):
+                    chunks.append(line)
+                    on_line(line)
+                data = b"".join(chunks)
+            else:
+                data = response.read()
+            return response.status, response.headers, data
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return 0, {}, b""
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def json_body(data):
+    try:
+        return json.loads(data)
+    except ValueError:
+        return {}
+
+
+class Student:
+    def __init__(self, number, run_id, paper, args, recorder, rng):
+        self.email = f"loadtest-{run_id}-{number}@example.com"
+        self.paper = paper
+        self.args = args
+        self.recorder = recorder
+        self.rng = rng
+        self.client = Client(args.base_url)
+        self.answers = {}  # group -> {key: answer}, as the page keeps them
+        self.version = None
+
+    def call(self, endpoint, method, path, body=None, ok_statuses=(200,), client=None):
+        start = time.perf_counter()
+        status, headers, data = (client or self.client).request(method, path, body)
+        self.recorder.record(endpoint, time.perf_counter() - start, status, status in ok_statuses)
+        return status, headers, data
+
+    def set_answer(self, path, answer):
+        group, key = path.split(".", 1)
+        self.answers.setdefault(group, {})[key] = answer
+
+    def full_write(self, attempts=()):
+        progress = {"testId": self.paper["testId"], "answers": self.answers, "currentTab": "groupA",
+                    "attempts": list(attempts)}
+        status, _, data = self.call("sync", "POST", "/api/progress/sync", {"email": self.email, "progress": progress})
+        self.version = json_body(data).get("version") if status == 200 else None
+        return status == 200
+
+    def sync(self, changed, attempts=()):
+        if self.version is None:
+            return self.full_write(attempts)
+        delta = {"testId": self.paper["testId"], "baseVersion": self.version,
+                 "set": {path: answer for path, answer in changed.items()}}
+        if attempts:
+            delta["attempts"] = list(attempts)
+        status, _, data = self.call("sync", "POST", "/api/progress/sync", {"email": self.email, "delta": delta},
+                                    ok_statuses=(200, 409))
+        if status == 200:
+            self.version = json_body(data).get("version")
+            return True
+        # 409: written elsewhere since our last sync; anything else: unknown state. Both rewrite in full
+        return self.full_write(attempts)
+
+    def grade_batches(self, items):
+        # Like lib/grade-client.ts: a paper longer than one batch sends its batches at once
+        batches = [items[offset:offset + MAX_BATCH_ITEMS] for offset in range(0, len(items), MAX_BATCH_ITEMS)]
+        if len(batches) <= 1:
+            return self.grade_batch(items)
+        local = threading.local()
+
+        def grade(batch):
+            if not hasattr(local, "client"):
+                local.client = Client(self.args.base_url)
+            return self.grade_batch(batch, local.client)
+
+        with ThreadPoolExecutor(len(batches)) as pool:
+            return [score for scores in pool.map(grade, batches) for score in scores]
+
+    def grade_batch(self, items, client=None):
+        scores = []
+        start = time.perf_counter()
+        ids = set(range(len(items)))
+
+        def on_line(line):
+            result = json_body(line)
+            if result.get("id") not in ids:
+                return
+            ids.discard(result["id"])
+            ok = result.get("status") == 200
+            self.recorder.record("grade-item", time.perf_counter() - start, result.get("status", 0), ok)
+            if ok:
+                self.recorder.graded(result.get("source", "unknown"))
+                scores.append(result.get("score", 0))
+
+        body = {"items": [{"id": index, "question": item["question"], "answer": answer, "marks": item["marks"],
+                           "sampleAnswer": item["reference"]} for index, (item, answer) in enumerate(items)]}
+        status, _, _ = (client or self.client).request("POST", "/api/grade/batch", body, on_line=on_line)
+        self.recorder.record("grade-batch", time.perf_counter() - start, status, status == 200)
+        # Items the stream never reported (or a rejected batch) failed
+        for _ in ids:
+            self.recorder.record("grade-item", time.perf_counter() - start, status if status != 200 else 0, False)
+        return scores
+
+    def grade_singly(self, items):
+        local = threading.local()
+
+        def grade(entry):
+            item, answer = entry
+            if not hasattr(local, "client"):
+                local.client = Client(self.args.base_url)
+            body = {"question": item["question"], "answer": answer, "marks": item["marks"],
+                    "sampleAnswer": item["reference"]}
+            status, headers, data = self.call("grade", "POST", "/api/grade", body, client=local.client)
+            if status != 200:
+                return None
+            self.recorder.graded(headers.get("X-Grade-Source", "unknown"))
+            return json_body(data).get("score", 0)
+
+        with ThreadPoolExecutor(BROWSER_CONNECTIONS) as pool:
+            return [score for score in pool.map(grade, items) if score is not None]
+
+    def attempt(self, scores, items, started):
+        max_score = sum(item["marks"] for item, _ in items) or 1
+        total = sum(score for score in scores if isinstance(score, (int, float)))
+        return {
+            "id": f"{self.email}-{int(time.time() * 1e3)}",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "testId": self.paper["testId"],
+            "scoreA": 0, "scoreB": total, "scoreC": 0, "scoreD": 0,
+            "totalScore": total,
+            "maxScore": max_score,
+            "percentage": round(100 * total / max_score, 1),
+            "grade": "loadtest",
+            "timeTakenSeconds": round(time.perf_counter() - started),
+        }
+
+    def run(self, start_at):
+        self.recorder.session("started")
+        time.sleep(max(0.0, start_at - time.perf_counter()))
+        started = time.perf_counter()
+        try:
+            status, _, _ = self.call("questions", "GET", f"/api/questions/{quote(self.paper['testId'])}")
+            if status != 200 or not self.full_write():
+                self.recorder.session("failed")
+                return
+
+            pending = {}
+            first_pending = last_answer = None
+            written = []
+            plan = plan_session(self.paper, self.rng, self.args.session)
+            for index, (at, path, answer, item) in enumerate(plan):
+                time.sleep(max(0.0, started + at - time.perf_counter()))
+                self.set_answer(path, answer)
+                pending[path] = answer
+                if item:
+                    written.append((item, answer))
+                now = time.perf_counter()
+                first_pending = first_pending or now
+                last_answer = now
+                # Sync once the student pauses, or when the oldest unsynced answer has waited long enough
+                due = min(last_answer + SYNC_DEBOUNCE_SECONDS, first_pending + SYNC_MAX_WAIT_SECONDS)
+                next_at = started + plan[index + 1][0] if index + 1 < len(plan) else due
+                if next_at >= due:
+                    time.sleep(max(0.0, due - time.perf_counter()))
+                    self.sync(pending)
+                    pending = {}
+                    first_pending = None
+
+            scores = []
+            if self.args.grade == "single":
+                scores = self.grade_singly(written)
+            elif written:
+                scores = self.grade_batches(written)
+            self.sync(pending, attempts=[self.attempt(scores, written, started)])
+            self.recorder.session("completed")
+        except Exception as e:
+            print(f"❌ {self.email}: {type(e).__name__}: {e}")
+            self.recorder.session("failed")
+        finally:
+            self.client.close()
+
+
+# --- Main ------------------------------------------------------------------------
+
+def load_papers(args):
+    papers = []
+    for file_path in discover_files(args.glob, args.subject):
+        try:
+            paper = paper_of(load_test(file_path))
+        except Exception as e:
+            print(f"⚠️ {os.path.basename(file_path)} skipped: {e}")
+            continue
+        if args.test and paper["testId"] not in args.test:
+            continue
+        papers.append(paper)
+    return papers
+
+
+def parse_limits(values):
+    limits = {}
+    for value in values or []:
+        name, _, limit = value.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"--max-p95 {value}: endpoint must be one of {', '.join(ENDPOINTS)}")
+        limits[name] = float(limit)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay exam sessions against a running server and report latency.")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"server to load (default: {DEFAULT_BASE_URL})")
+    parser.add_argument("--students", type=int, default=100, help="simulated students (default: 100)")
+    parser.add_argument("--ramp", type=float, default=10.0,
+                        help="seconds over which the students start, 0 for all at once (default: 10)")
+    parser.add_argument("--session", type=float, default=120.0,
+                        help="seconds a student spends answering before submitting (default: 120)")
+    parser.add_argument("--grade", choices=("batch", "single"), default="batch",
+                        help="submit through /api/grade/batch like the exam page, or one /api/grade per answer")
+    parser.add_argument("--test", action="append", help="only this test id (repeatable; default: every bank)")
+    parser.add_argument("--subject", action="append", choices=SUBJECTS, help="only banks of this subject (repeatable)")
+    parser.add_argument("--glob", default="*.json", help="bank file name pattern inside data/ (default: *.json)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible sessions")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--max-p95", action="append", metavar="ENDPOINT=MS",
+                        help=f"fail when an endpoint's p95 exceeds MS ({', '.join(ENDPOINTS)}; repeatable)")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="fail when any endpoint's error rate exceeds this")
+    parser.add_argument("--stub-llm", action="store_true",
+                        help="serve the stub model (scripts/stub_openai.py) from this process for the run")
+    parser.add_argument("--llm-port", type=int, default=DEFAULT_LLM_PORT, help=f"stub model port (default: {DEFAULT_LLM_PORT})")
+    add_stub_args(parser, prefix="llm-")
+    args = parser.parse_args(argv)
+
+    try:
+        max_p95 = parse_limits(args.max_p95)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.students < 1:
+        parser.error("--students must be at least 1")
+
+    papers = load_papers(args)
+    if not papers:
+        print(f"❌ No banks to replay (glob {args.glob}, subjects {args.subject}, tests {args.test})")
+        return 1
+    rng = random.Random(args.seed)
+    run_id = f"{int(time.time()):x}"
+
+    stub = None
+    if args.stub_llm:
+        stub, stub_stats = start_stub(args.llm_port, args.llm_latency, args.llm_jitter, args.llm_rate_429,
+                                      args.llm_retry_after)
+        print(f"🤖 Stub model on http://127.0.0.1:{args.llm_port}/v1; start the server with "
+              f"OPENAI_BASE_URL=http://127.0.0.1:{args.llm_port}/v1 OPENAI_API_KEY=stub")
+
+    # Fail fast (and warm the route up) before the clock starts
+    status, _, _ = Client(args.base_url).request("GET", f"/api/questions/{quote(papers[0]['testId'])}")
+    if status != 200:
+        print(f"❌ {args.base_url} answered {status or 'nothing'} for /api/questions/{papers[0]['testId']}; "
+              f"is the server running with the banks imported?")
+        if stub:
+            stub.shutdown()
+        return 1
+
+    written = sum(len(paper["written"]) for paper in papers)
+    print(f"🎓 {args.students} students on {len(papers)} tests ({written} free-response questions), "
+          f"starting over {args.ramp:g}s, {args.session:g}s each -> {args.base_url}")
+
+    recorder = Recorder()
+    start = time.perf_counter() + 0.5
+    students = [Student(number, run_id, rng.choice(papers), args, recorder, random.Random(rng.random()))
+                for number in range(args.students)]
+    threads = [threading.Thread(target=student.run, args=(start + rng.uniform(0, args.ramp),), daemon=True)
+               for student in students]
+    recorder.started_at = start
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print("⏹️ Interrupted; reporting what finished")
+    recorder.finished_at = time.perf_counter()
+
+    report = summarize(recorder)
+    report["config"] = {"baseUrl": args.base_url, "students": args.students, "ramp": args.ramp,
+                        "session": args.session, "grade": args.grade, "tests": [paper["testId"] for paper in papers]}
+    if stub:
+        report["stub"] = stub_stats.snapshot()
+        report["config"]["stub"] = {"latency": args.llm_latency, "jitter": args.llm_jitter,
+                                    "rate429": args.llm_rate_429}
+        stub.shutdown()
+    print_summary(report)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        corpus_io.write_json(args.json, report)
+        print(f"Report -> {args.json}")
+
+    failures = limit_failures(report, max_p95, args.max_error_rate)
+    for failure in failures:
+        print(f"LIMIT {failure}")
+    return 1 if failures or report["sessions"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
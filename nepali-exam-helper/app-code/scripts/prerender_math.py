@@ -0,0 +1,165 @@
+import argparse
+import functools
+import json
+import os
+import subprocess
+import sys
+
+import corpus_io
+from compile_corpus import load_test
+from corpus_runner import add_runner_args, run_from_args
+from corpus_text import math_key, math_spans
+from corpus_walk import iter_nodes
+
+# Pre-render every $...$ / $$...$$ math span of the question banks to KaTeX
+# markup once, at build time, instead of in every student's browser.
+# Spans are found with corpus_text.math_spans() (the split
+# components/math-text.tsx makes) in every string of every question, and
+# keyed by corpus_text.math_key() of their delimited source, so each distinct
+# expression is rendered once however many banks repeat it. Rendering runs
+# KaTeX itself in one node subprocess (scripts/render-math.mjs; needs the app's
+# node_modules). Expressions already in the previous table are reused while the
+# KaTeX version and RENDER_VERSION are unchanged.
+#
+# Expressions KaTeX can't parse are listed with the tests they appear in (the
+# page shows them as red source text); --strict exits 1 when there are any.
+# build_bundles.py then ships each test's expressions in its bundle ("math"),
+# and the client injects that markup (lib/math-markup.ts).
+#
+# build/math-render.json:
+# {"version": 1, "katex": "0.16.27", "expressions": {key: {"source", "html"}},
+#  "errors": [{"key", "source", "error", "tests": [...]}]}
+#
+# Usage:
+#   python scripts/prerender_math.py
+#   python scripts/prerender_math.py --strict    # fail on unparseable expressions
+
+RENDER_VERSION = 1
+
+table_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "build", "math-render.json"))
+renderer_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render-math.mjs")
+
+
+def strings_of(node):
+    for value in node.values():
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, list):
+            yield from (item for item in value if isinstance(item, str))
+
+
+def collect_spans(file_path):
+    """Math spans of one test file. Returns {"changes": span count, "testId", "spans": {key: [source, tex, display]}}."""
+    compiled = load_test(file_path)
+    spans = {}
+    count = 0
+    for node, _ in iter_nodes(compiled["questions"]):
+        for text in strings_of(node):
+            for source, tex, display in math_spans(text):
+                spans[math_key(source)] = [source, tex, display]
+                count += 1
+    return {"changes": count, "testId": compiled["testId"], "spans": spans}
+
+
+def load_table(path):
+    try:
+        table = corpus_io.load_json(path)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return table if table.get("version") == RENDER_VERSION else {}
+
+
+@functools.lru_cache(maxsize=1)
+def _expressions(path, mtime):
+    return load_table(path).get("expressions", {})
+
+
+def markup_for(tree, path=table_path):
+    """{key: html} for the pre-rendered math spans in a tree ({} before prerender_math.py has run)."""
+    try:
+        expressions = _expressions(path, os.path.getmtime(path))
+    except OSError:
+        return {}
+    markup = {}
+    for node, _ in iter_nodes(tree):
+        for text in strings_of(node):
+            for source, _, _ in math_spans(text):
+                key = math_key(source)
+                if key in expressions:
+                    markup[key] = expressions[key]["html"]
+    return dict(sorted(markup.items()))
+
+
+def render(spans):
+    """Run KaTeX over [{"key", "tex", "display"}] in node. Returns (katex version, rendered, errors)."""
+    app_dir = os.path.dirname(os.path.dirname(renderer_path))
+    try:
+        child = subprocess.run(["node", renderer_path], input=json.dumps(spans).encode("utf-8"),
+                               capture_output=True, cwd=app_dir, check=False)
+    except FileNotFoundError:
+        raise SystemExit("node is not installed; it is needed to run KaTeX")
+    if child.returncode != 0:
+        raise SystemExit(f"render-math.mjs failed (is katex installed? run pnpm install):\n"
+                         f"{child.stderr.decode('utf-8', 'replace').strip()}")
+    output = json.loads(child.stdout)
+    return output["katex"], output["rendered"], output["errors"]
+
+
+def main(argv=None):
+    parser = add_runner_args(argparse.ArgumentParser(description="Pre-render the math in the question banks with KaTeX."))
+    parser.add_argument("--out", default=table_path, help=f"output file (default: {table_path})")
+    parser.add_argument("--strict", action="store_true", help="exit 1 if any expression fails to parse")
+    args = parser.parse_args(argv)
+
+    report = run_from_args(collect_spans, args, label="math spans")
+    if report["failedFiles"]:
+        return 2
+
+    spans = {}
+    tests = {}
+    for entry in report["files"]:
+        result = entry["result"]
+        for key, span in result["spans"].items():
+            if key in spans and spans[key][0] != span[0]:
+                raise SystemExit(f"math_key collision: {spans[key][0]!r} and {span[0]!r}")
+            spans[key] = span
+            tests.setdefault(key, []).append(result["testId"])
+
+    # Only new expressions go to KaTeX, unless its version changed
+    previous = load_table(args.out)
+    cached = previous.get("expressions", {})
+    new = [{"key": key, "tex": tex, "display": display}
+           for key, (_, tex, display) in spans.items() if key not in cached]
+    katex_version, rendered, errors = render(new)
+    if cached and previous.get("katex") != katex_version:
+        print(f"KaTeX {previous.get('katex')} -> {katex_version}: rendering everything again")
+        cached = {}
+        katex_version, rendered, errors = render([{"key": key, "tex": tex, "display": display}
+                                                  for key, (_, tex, display) in spans.items()])
+
+    expressions = {}
+    for key, (source, _, _) in sorted(spans.items()):
+        if key in rendered:
+            expressions[key] = {"source": source, "html": rendered[key]}
+        elif key in cached:
+            expressions[key] = cached[key]
+    failed = [{"key": key, "source": spans[key][0], "error": errors[key], "tests": sorted(set(tests[key]))}
+              for key in sorted(errors, key=lambda key: spans[key][0])]
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    corpus_io.write_bytes(args.out, corpus_io.dumps_compact({
+        "version": RENDER_VERSION,
+        "katex": katex_version,
+        "expressions": expressions,
+        "errors": failed,
+    }))
+
+    for error in failed:
+        print(f"⚠️ {error['source']}: {error['error']} ({', '.join(error['tests'])})")
+    print(f"{len(expressions)} expressions pre-rendered ({len(rendered)} rendered now, "
+          f"{len(expressions) - len(rendered)} reused), {len(failed)} unparseable -> {args.out}")
+    return 1 if failed and args.strict else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
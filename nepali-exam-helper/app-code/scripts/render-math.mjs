@@ -0,0 +1,28 @@
+// Renders TeX to static KaTeX markup for scripts/prerender_math.py
+// Usage: node scripts/render-math.mjs < spans.json
+// stdin:  [{ "key", "tex", "display" }, ...]
+// stdout: { "katex": version, "rendered": { key: html }, "errors": { key: message } }
+// Options match what react-katex passes (components/math-text.tsx), so the markup is what the
+// client would have rendered; errors are the expressions it would have shown as raw red text.
+
+import katex from "katex"
+
+async function readStdin() {
+  const chunks = []
+  for await (const chunk of process.stdin) chunks.push(chunk)
+  return Buffer.concat(chunks).toString("utf8")
+}
+
+const spans = JSON.parse((await readStdin()) || "[]")
+const rendered = {}
+const errors = {}
+
+for (const { key, tex, display } of spans) {
+  try {
+    rendered[key] = katex.renderToString(tex, { displayMode: display, throwOnError: true })
+  } catch (error) {
+    errors[key] = error instanceof Error ? error.message : String(error)
+  }
+}
+
+process.stdout.write(JSON.stringify({ katex: katex.version, rendered, errors }))
@@ -0,0 +1,185 @@
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stand-in for the OpenAI chat completions API, for load tests (scripts/load_test.py).
+# Answers POST /v1/chat/completions with a grade in the shape lib/grader.ts
+# parses ({"score", "feedback"} as the message content) after a simulated
+# model latency, and answers a share of requests 429 with a Retry-After header
+# the way a rate-limited key does. Point the server at it with
+#   OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=stub
+#
+# Latency is drawn per request from a log-normal distribution with the given
+# median (--latency) and spread (--jitter), so a run sees the long tail a real
+# model has. Every --stats-every seconds the request, 429 and in-flight counts
+# are printed.
+#
+# Usage:
+#   python scripts/stub_openai.py                              # :8787, 1.5s median, no 429s
+#   python scripts/stub_openai.py --latency 3 --rate-429 0.05
+
+DEFAULT_PORT = 8787
+
+DEFAULT_LATENCY = 1.5
+
+DEFAULT_JITTER = 0.5
+
+DEFAULT_RETRY_AFTER = 1
+
+# "Grade this answer (4 marks total):" in the grading prompt (lib/grader.ts)
+marks_pattern = re.compile(r"\((\d+) marks total\)")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # A whole school submitting at once connects faster than the default backlog of 5 is accepted
+    request_queue_size = 1024
+
+
+class StubStats:
+    """Request counts shared by the handler threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def started(self):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self, rate_limited=False):
+        with self.lock:
+            self.in_flight -= 1
+            self.rate_limited += rate_limited
+
+    def snapshot(self):
+        with self.lock:
+            return {"requests": self.requests, "rateLimited": self.rate_limited,
+                    "inFlight": self.in_flight, "peakInFlight": self.peak_in_flight}
+
+
+def completion(content):
+    return {
+        "id": f"chatcmpl-stub-{random.getrandbits(48):012x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def stub_grade(messages):
+    """A plausible grade: some share of the marks the prompt mentions."""
+    prompt = "\n".join(str(message.get("content", "")) for message in messages if isinstance(message, dict))
+    match = marks_pattern.search(prompt)
+    marks = int(match.group(1)) if match else 1
+    return json.dumps({"score": random.randint(0, max(marks, 0)), "feedback": "Stub grade from scripts/stub_openai.py."})
+
+
+def make_handler(latency, jitter, rate_429, retry_after, stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; don't let Nagle hold the body back
+        disable_nagle_algorithm = True
+
+        def send_json(self, status, body, headers=()):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            if self.path.rstrip("/") != "/v1/chat/completions":
+                self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+                return
+
+            stats.started()
+            rate_limited = random.random() < rate_429
+            try:
+                if rate_limited:
+                    self.send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "requests"}},
+                                   headers=[("Retry-After", str(retry_after))])
+                    return
+                try:
+                    messages = json.loads(raw or b"{}").get("messages") or []
+                except ValueError:
+                    self.send_json(400, {"error": {"message": "Body is not JSON", "type": "invalid_request_error"}})
+                    return
+                time.sleep(latency * random.lognormvariate(0, jitter) if jitter else latency)
+                self.send_json(200, completion(stub_grade(messages)))
+            finally:
+                stats.finished(rate_limited)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub(port=DEFAULT_PORT, latency=DEFAULT_LATENCY, jitter=DEFAULT_JITTER, rate_429=0.0,
+               retry_after=DEFAULT_RETRY_AFTER, host="127.0.0.1"):
+    """Serve the stub from a background thread. Returns (server, stats); server.shutdown() stops it."""
+    stats = StubStats()
+    server = StubServer((host, port), make_handler(latency, jitter, rate_429, retry_after, stats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def add_stub_args(parser, prefix=""):
+    """The stub's options; load_test.py adds them under --llm-*."""
+    parser.add_argument(f"--{prefix}latency", type=float, default=DEFAULT_LATENCY,
+                        help=f"median seconds per completion (default: {DEFAULT_LATENCY})")
+    parser.add_argument(f"--{prefix}jitter", type=float, default=DEFAULT_JITTER,
+                        help=f"log-normal sigma of the latency, 0 for a fixed latency (default: {DEFAULT_JITTER})")
+    parser.add_argument(f"--{prefix}rate-429", type=float, default=0.0,
+                        help="share of requests answered 429 Too Many Requests (default: 0)")
+    parser.add_argument(f"--{prefix}retry-after", type=int, default=DEFAULT_RETRY_AFTER,
+                        help=f"Retry-After seconds sent with a 429 (default: {DEFAULT_RETRY_AFTER})")
+    return parser
+
+
+def main(argv=None):
+    parser = add_stub_args(argparse.ArgumentParser(description="Serve a stub OpenAI-compatible grading model."))
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--stats-every", type=float, default=10.0, help="seconds between stats lines, 0 for none")
+    args = parser.parse_args(argv)
+    if not 0 <= args.rate_429 <= 1:
+        parser.error("--rate-429 must be between 0 and 1")
+
+    server, stats = start_stub(args.port, args.latency, args.jitter, args.rate_429, args.retry_after, args.host)
+    print(f"🤖 Stub model on http://{args.host}:{args.port}/v1 ({args.latency}s median, "
+          f"{args.rate_429:.0%} 429s); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(args.stats_every or 3600)
+            if args.stats_every:
+                counts = stats.snapshot()
+                print(f"   {counts['requests']} requests, {counts['rateLimited']} answered 429, "
+                      f"{counts['inFlight']} in flight (peak {counts['peakInFlight']})")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
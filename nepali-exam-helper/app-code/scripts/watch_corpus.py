@@ -0,0 +1,347 @@
+import argparse
+import fnmatch
+import os
+import queue
+import subprocess
+import sys
+import time
+
+import build_answer_index
+import build_bundles
+import build_grading_spec
+import build_search_index
+import compile_corpus
+import corpus_io
+from corpus_cache import content_hash
+from corpus_runner import SUBJECTS, data_dir, discover_files, subject_of
+from lint_corpus import RULES, lint_tree
+from prerender_math import table_path
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: without it data/ is polled
+    Observer = None
+
+# Watch mode for content editors: keeps build/ and the local database in step
+# with data/ while the banks are being edited.
+# At startup every bank is parsed and compiled once and the per-test results
+# of each build step are kept in memory. On each save only the saved file is
+# parsed again: it is linted, compiled (build/corpus), its question bundles
+# rewritten (build/bundles), and its answer index, grading spec and search
+# entries recomputed. The merged outputs are rewritten from the in-memory
+# results of every other test, and only when that test's results changed.
+# Then just that test is pushed to MongoDB
+# (node scripts/import-all-tests.mjs --compiled --only <testId>), which bumps
+# the catalog version so a running server picks it up. Start from a synced
+# database (node scripts/import-all-tests.mjs): only saves are pushed.
+#
+# Saves are debounced (editors that write a file in several steps, or save
+# through a temp file and rename), and a file that isn't valid JSON yet is
+# left alone until the next save. inotify is used through watchdog when it
+# is installed; otherwise data/ is polled a few times a second.
+# Every bank in data/ is built, whatever --glob/--subject say (those only pick
+# which saves are watched): the merged outputs always cover the whole corpus.
+# While any bank has no good build (it failed at startup, or its last save
+# failed and it has none to fall back on) the merged outputs are left as they
+# are, as the batch builders do when a file fails; they are rewritten once
+# every bank builds again.
+# Offline packs and math markup are corpus-wide builds: rerun
+# build_offline_packs.py / prerender_math.py for those.
+#
+# Usage:
+#   python scripts/watch_corpus.py                 # watch data/, push saves to MongoDB
+#   python scripts/watch_corpus.py --no-push       # rebuild build/ only
+
+DEBOUNCE_SECONDS = 0.3
+
+POLL_SECONDS = 0.25
+
+# Lint issues printed per save; the rest are counted
+MAX_ISSUES_SHOWN = 10
+
+app_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+
+# name -> per-test step over a compiled test; the "bundles" and "corpus" steps write their
+# per-test files as they go
+STEPS = {
+    "corpus": compile_corpus.write_compiled,
+    "bundles": build_bundles.write_bundle,
+    "answers": build_answer_index.index_compiled,
+    "spec": build_grading_spec.spec_compiled,
+    "search": build_search_index.index_compiled,
+}
+
+# name -> writer of the merged output from a report over every test
+MERGED = {
+    "corpus": lambda report: compile_corpus.write_index(report, compile_corpus.build_dir),
+    "bundles": lambda report: build_bundles.write_index(report, build_bundles.bundle_dir),
+    "answers": lambda report: build_answer_index.write_index(report, build_answer_index.index_path),
+    "spec": lambda report: build_grading_spec.write_spec(report, build_grading_spec.spec_path),
+    "search": lambda report: build_search_index.write_index(report, build_search_index.index_path),
+}
+
+
+def outputs_of(result):
+    # "changes" counts what this run wrote, not what it produced
+    return {key: value for key, value in result.items() if key != "changes"}
+
+
+class Corpus:
+    """The last good state of every watched bank and its build results."""
+
+    def __init__(self, push=True):
+        self.push = push
+        self.files = {}  # file name -> {"hash", "testId", "results": {step: result}}
+        self.failed = set()  # names of banks without a good build
+        self.unpushed = set()  # test ids rebuilt while the merged outputs were held back
+
+    def report(self, step):
+        return {"files": [{"file": name, "result": state["results"][step], "error": None}
+                          for name, state in sorted(self.files.items())]}
+
+    def write_merged(self, steps):
+        """Rewrite the merged outputs of steps. Returns False (writing nothing) while a bank is failing."""
+        if self.failed:
+            return False
+        for step in steps:
+            MERGED[step](self.report(step))
+        return True
+
+    def build(self, file_path, raw):
+        """Lint, compile and run every step for one bank. Returns (state, lint issues) or raises."""
+        file_name = os.path.basename(file_path)
+        data = corpus_io.loads(raw)
+        issues = lint_tree(data, list(RULES.values()))
+        compiled = compile_corpus.compile_test(data, file_name)
+        results = {name: step(compiled) for name, step in STEPS.items()}
+        return {"hash": content_hash(raw), "testId": compiled["testId"], "results": results}, issues
+
+    def load_all(self, files):
+        start = time.perf_counter()
+        for file_path in files:
+            try:
+                with open(file_path, "rb") as f:
+                    raw = f.read()
+                state, issues = self.build(file_path, raw)
+            except Exception as e:
+                print(f"❌ {os.path.basename(file_path)}: {e}")
+                self.failed.add(os.path.basename(file_path))
+                continue
+            self.files[os.path.basename(file_path)] = state
+            errors = sum(issue["level"] == "error" for issue in issues)
+            if errors:
+                print(f"⚠️ {os.path.basename(file_path)}: {errors} lint errors")
+        self.write_merged(MERGED)
+        print(f"📚 {len(self.files)} banks built in {time.perf_counter() - start:.2f}s"
+              + (f", {len(self.failed)} failed" if self.failed else ""))
+        self.report_failed()
+
+    def report_failed(self):
+        if self.failed:
+            print(f"⏸️ Merged outputs in build/ are not written until these build: {', '.join(sorted(self.failed))}")
+
+    def update(self, file_path):
+        file_name = os.path.basename(file_path)
+        start = time.perf_counter()
+        try:
+            with open(file_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            self.remove(file_name)
+            return
+        previous = self.files.get(file_name)
+        if previous and previous["hash"] == content_hash(raw):
+            return  # saved without changes
+
+        try:
+            state, issues = self.build(file_path, raw)
+        except compile_corpus.CompileError as e:
+            print(f"❌ {e}")
+            self.build_failed(file_name, previous)
+            return
+        except ValueError as e:
+            # Mid-write, or a typo: the last good version stays live until the next save
+            print(f"⏳ {file_name}: not valid JSON ({e}); waiting for the next save")
+            self.build_failed(file_name, previous)
+            return
+        except Exception as e:
+            print(f"❌ {file_name}: {type(e).__name__}: {e}")
+            self.build_failed(file_name, previous)
+            return
+
+        self.files[file_name] = state
+        if file_name in self.failed:
+            # Its first good build: the merged outputs held back for it are all due
+            self.failed.discard(file_name)
+            changed = list(MERGED)
+        else:
+            changed = [step for step in MERGED
+                       if not previous or outputs_of(previous["results"][step]) != outputs_of(state["results"][step])
+                       or previous["testId"] != state["testId"]]
+        held = not self.write_merged(changed)
+        built = time.perf_counter() - start
+
+        for issue in issues[:MAX_ISSUES_SHOWN]:
+            print(f"   {issue['level']} [{issue['rule']}] {issue['path']}: {issue['message']}")
+        if len(issues) > MAX_ISSUES_SHOWN:
+            print(f"   ... {len(issues) - MAX_ISSUES_SHOWN} more (python scripts/lint_corpus.py {file_path})")
+
+        pushed = ""
+        # The database holds what build/corpus holds (import-all-tests.mjs --compiled)
+        if self.push and "corpus" in changed:
+            self.unpushed.add(state["testId"])
+        if held:
+            pushed = ", merged outputs held back"
+        elif self.push and self.unpushed:
+            pushed = self.push_tests(sorted(self.unpushed))
+            self.unpushed.clear()
+        print(f"✅ {file_name}: built in {built * 1e3:.0f} ms ({', '.join(changed) or 'no outputs changed'})"
+              f"{pushed}, {len(issues)} lint issues, {time.perf_counter() - start:.2f}s total")
+        if held:
+            self.report_failed()
+
+    def build_failed(self, file_name, previous):
+        # A bank with a last good build keeps serving it; a new one holds the merged outputs back
+        if previous is None:
+            self.failed.add(file_name)
+        self.report_failed()
+
+    def remove(self, file_name):
+        state = self.files.pop(file_name, None)
+        was_failed = file_name in self.failed
+        self.failed.discard(file_name)
+        if state is None and not was_failed:
+            return
+        self.write_merged(MERGED)
+        if state is None:
+            return
+        print(f"🗑️ {file_name} removed from build/; run node scripts/import-all-tests.mjs to drop "
+              f"{state['testId']} from the database")
+
+    def push_tests(self, test_ids):
+        child = subprocess.run(["node", "scripts/import-all-tests.mjs", "--compiled", "--only", ",".join(test_ids)],
+                               cwd=app_dir, capture_output=True, text=True, check=False)
+        if child.returncode != 0:
+            output = (child.stdout + child.stderr).strip().splitlines()
+            print("\n".join(f"   {line}" for line in output[-10:]))
+            return ", push FAILED"
+        return f", pushed {', '.join(test_ids)}" if len(test_ids) > 1 else ", pushed"
+
+
+# --- Change sources ---------------------------------------------------------
+
+def watched(file_path, pattern, subjects, failed=()):
+    # Failing banks are watched whatever the selection: the merged outputs wait for them
+    name = os.path.basename(file_path)
+    return (os.path.dirname(os.path.abspath(file_path)) == data_dir
+            and not name.startswith(".")
+            and (name in failed or fnmatch.fnmatch(name, pattern) and (not subjects or subject_of(name) in subjects)))
+
+
+class PollingSource:
+    """Changed paths found by comparing (mtime, size) of data/ every POLL_SECONDS."""
+
+    def __init__(self, pattern, subjects, failed):
+        self.pattern = pattern
+        self.subjects = subjects
+        self.failed = failed
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for entry in os.scandir(data_dir):
+            if entry.is_file() and watched(entry.path, self.pattern, self.subjects, self.failed):
+                stat = entry.stat()
+                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self, timeout):
+        time.sleep(min(timeout, POLL_SECONDS))
+        snapshot = self.scan()
+        changed = [path for path in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(path) != self.snapshot.get(path)]
+        self.snapshot = snapshot
+        return changed
+
+    def stop(self):
+        pass
+
+
+class WatchdogSource:
+    """Changed paths reported by inotify (or the platform's equivalent) through watchdog."""
+
+    def __init__(self, pattern, subjects, failed):
+        self.queue = queue.Queue()
+        source = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                # Saving through a temp file shows up as a move onto the bank
+                for path in (event.src_path, getattr(event, "dest_path", None)):
+                    if path and watched(path, pattern, subjects, failed):
+                        source.queue.put(os.path.abspath(path))
+
+        self.observer = Observer()
+        self.observer.schedule(Handler(), data_dir, recursive=False)
+        self.observer.start()
+
+    def changes(self, timeout):
+        changed = []
+        try:
+            changed.append(self.queue.get(timeout=timeout))
+            while True:
+                changed.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return changed
+
+    def stop(self):
+        self.observer.stop()
+        self.observer.join()
+
+
+def watch(corpus, source, debounce):
+    pending = {}  # path -> time of its last event
+    while True:
+        for path in source.changes(debounce / 3 if pending else 1.0):
+            pending[path] = time.monotonic()
+        now = time.monotonic()
+        for path, last_event in sorted(pending.items()):
+            if now - last_event >= debounce:
+                del pending[path]
+                corpus.update(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild and push question banks as they are saved.")
+    parser.add_argument("--glob", default="*.json", help="file name pattern inside data/ (default: *.json)")
+    parser.add_argument("--subject", action="append", choices=SUBJECTS, help="only files of this subject (repeatable)")
+    parser.add_argument("--no-push", action="store_true", help="rebuild build/ only, don't write to MongoDB")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                        help=f"seconds a file must be quiet before it is rebuilt (default: {DEBOUNCE_SECONDS})")
+    parser.add_argument("--poll", action="store_true", help="poll data/ even when watchdog is installed")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(table_path):
+        print("ℹ️ No pre-rendered math (scripts/prerender_math.py): bundles are built without it")
+    corpus = Corpus(push=not args.no_push)
+    # The merged outputs cover every bank; --glob/--subject only narrow which saves are watched
+    corpus.load_all(discover_files())
+
+    use_watchdog = Observer is not None and not args.poll
+    source = (WatchdogSource if use_watchdog else PollingSource)(args.glob, args.subject, corpus.failed)
+    print(f"👀 Watching {data_dir} ({'inotify' if use_watchdog else f'polling every {POLL_SECONDS}s'}); Ctrl+C to stop")
+    try:
+        watch(corpus, source, args.debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())